@@ -0,0 +1,41 @@
+import discord
+from discord.ext import commands
+
+from grind.afk import afk_notices, clear_afk, set_afk
+from grind.config import get_section, get_settings, is_server_whitelisted
+from grind.outbound import send_cosmetic
+
+class Afk(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if message.author.bot or not message.guild:
+            return
+
+        # Skipping commands keeps !afk from clearing itself straight away.
+        if message.content.startswith(get_settings(message.guild.id).prefix):
+            return
+
+        if not await is_server_whitelisted(message.guild):
+            return
+
+        lines = []
+        if message.author.id in get_section(message.guild.id, 'afk').users:
+            clear_afk(message.author)
+            lines.append(f"Welcome back {message.author.mention}, I removed your AFK.")
+
+        for member, entry in afk_notices(message):
+            lines.append(f"💤 **{member.display_name}** is AFK: {entry['reason']} (<t:{entry['since']}:R>)")
+
+        if lines:
+            await send_cosmetic(message.channel, "\n".join(lines)[:2000], allowed_mentions=discord.AllowedMentions(everyone=False, roles=False, users=[message.author]))
+
+    @commands.command(name="afk", aliases=["away"])
+    async def afk(self, ctx, *, reason='AFK'):
+        set_afk(ctx.author, reason)
+        await ctx.send(f'{ctx.author.mention} is now AFK: {reason}', allowed_mentions=discord.AllowedMentions.none())
+
+async def setup(bot):
+    await bot.add_cog(Afk(bot))
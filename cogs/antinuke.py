@@ -0,0 +1,135 @@
+import discord
+from discord.ext import commands
+
+from grind.antinuke import WATCHED_ACTIONS, record_action, strip_member, unstrip_member
+from grind.cases import log_action
+from grind.config import get_section, is_server_whitelisted
+from grind.logs import logger, log_fields
+from grind.members import ensure_chunked, resolve_member
+from grind.outbound import send_cosmetic
+from grind.utils import check_role_hierarchy, is_guild_owner
+
+class Antinuke(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def cog_check(self, ctx):
+        if ctx.guild:
+            await ensure_chunked(ctx.guild)
+        return True
+
+    @commands.Cog.listener()
+    async def on_audit_log_entry_create(self, entry):
+        if not record_action(entry):
+            return
+
+        guild = entry.guild
+        if not await is_server_whitelisted(guild):
+            return
+
+        action = WATCHED_ACTIONS[entry.action]
+        member = await resolve_member(guild, entry.user_id)
+        if member is None:
+            return
+
+        reason = f"Antinuke: too many destructive actions (last: {action})"
+        try:
+            removed = await strip_member(member, reason)
+        except discord.HTTPException as e:
+            logger.warning("Antinuke could not strip %s: %s", member, e, extra=log_fields(guild=guild, category='antinuke', user_id=member.id))
+            return
+
+        logger.warning("Antinuke stripped %s", member, extra=log_fields(guild=guild, category='antinuke', user_id=member.id, action=action, roles=len(removed)))
+        if removed:
+            await log_action(guild, "antinuke", member, self.bot.user, f"{reason}. Removed {len(removed)} roles, restore them with !unstrip.")
+
+    @commands.command(name="antinuke", aliases=["an"])
+    @is_guild_owner()
+    async def antinuke(self, ctx, action=None, *args):
+        settings = get_section(ctx.guild.id, 'antinuke')
+
+        if action in (None, 'status'):
+            embed = discord.Embed(title="Antinuke", color=discord.Color.green() if settings.enabled else discord.Color.dark_grey())
+            embed.add_field(name="Status", value="Enabled" if settings.enabled else "Disabled", inline=True)
+            embed.add_field(name="Limit", value=f"{settings.limit} actions in {settings.window}s", inline=True)
+            embed.add_field(name="Watching", value=", ".join(WATCHED_ACTIONS.values()), inline=False)
+            embed.add_field(name="Trusted", value=", ".join(f"<@{user_id}>" for user_id in settings.trusted) or "Nobody", inline=False)
+            await ctx.send(embed=embed)
+
+        elif action in ('on', 'off'):
+            settings.enabled = action == 'on'
+            settings.save()
+            await ctx.send(f"Antinuke has been {'enabled' if settings.enabled else 'disabled'}.")
+
+        elif action == 'limit':
+            try:
+                limit, window = int(args[0]), int(args[1])
+            except (IndexError, ValueError):
+                await ctx.send('Usage: !antinuke limit <actions> <seconds>')
+                return
+
+            if limit < 1 or window < 1:
+                await ctx.send('The limit and window must both be at least 1.')
+                return
+
+            settings.limit = limit
+            settings.window = window
+            settings.save()
+            await ctx.send(f"Antinuke will strip anyone who makes {limit} destructive actions within {window} seconds.")
+
+        elif action in ('trust', 'untrust'):
+            try:
+                user = await commands.UserConverter().convert(ctx, args[0])
+            except (IndexError, commands.BadArgument):
+                await ctx.send(f'Usage: !antinuke {action} <user>')
+                return
+
+            if action == 'trust':
+                settings.trusted.add(user.id)
+            else:
+                settings.trusted.discard(user.id)
+            settings.save()
+            await ctx.send(f"{user} is {'now' if action == 'trust' else 'no longer'} trusted by antinuke.")
+
+        else:
+            await ctx.send('Usage:\n!antinuke [status]\n!antinuke <on|off>\n!antinuke limit <actions> <seconds>\n!antinuke <trust|untrust> <user>')
+
+    @commands.command(name="stripstaff", aliases=["strip"])
+    @commands.has_permissions(administrator=True)
+    async def stripstaff(self, ctx, member: discord.Member, *, reason='No reason provided'):
+        can_moderate, error_message = check_role_hierarchy(ctx, member)
+        if not can_moderate:
+            await ctx.send(error_message)
+            return
+
+        try:
+            removed = await strip_member(member, reason)
+        except discord.Forbidden:
+            await ctx.send("I don't have permission to edit this member's roles. Move the bot role up or check permissions.")
+            return
+
+        if not removed:
+            await ctx.send(f'{member} has no roles I can remove.')
+            return
+
+        await send_cosmetic(ctx, f'Removed {len(removed)} roles from {member}.')
+        await log_action(ctx.guild, "strip", member, ctx.author, reason)
+
+    @commands.command(name="unstrip", aliases=["restoreroles"])
+    @is_guild_owner()
+    async def unstrip(self, ctx, member: discord.Member):
+        try:
+            restored = await unstrip_member(member, f"Roles restored by {ctx.author}")
+        except discord.Forbidden:
+            await ctx.send("I don't have permission to edit this member's roles. Move the bot role up or check permissions.")
+            return
+
+        if not restored:
+            await ctx.send(f'{member} has no saved roles to restore.')
+            return
+
+        await send_cosmetic(ctx, f'Restored {len(restored)} roles to {member}.')
+        await log_action(ctx.guild, "unstrip", member, ctx.author)
+
+async def setup(bot):
+    await bot.add_cog(Antinuke(bot))
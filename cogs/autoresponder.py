@@ -0,0 +1,102 @@
+import discord
+from discord.ext import commands
+
+from grind.autoresponder import MAX_TRIGGERS, TRIGGER_TYPES, add_trigger, get_matcher, match_response, remove_trigger, set_trigger_cooldown, validate_trigger
+from grind.config import get_section, get_settings, is_server_whitelisted
+from grind.outbound import send_cosmetic
+
+TRIGGERS_PER_PAGE = 15
+
+class Autoresponder(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if message.author.bot or not message.guild:
+            return
+
+        if message.content.startswith(get_settings(message.guild.id).prefix):
+            return
+
+        if not await is_server_whitelisted(message.guild):
+            return
+
+        response = match_response(message)
+        if response:
+            await send_cosmetic(message.channel, response.replace('{user}', message.author.mention),
+                                allowed_mentions=discord.AllowedMentions(everyone=False, roles=False, users=True))
+
+    @commands.command(name="autoresponder", aliases=["ar", "autoresponse"])
+    @commands.has_permissions(manage_guild=True)
+    async def autoresponder(self, ctx, action=None, target=None, pattern=None, *, response=None):
+        section = get_section(ctx.guild.id, 'autoresponder')
+
+        if action == 'add':
+            if not target or not pattern or not response:
+                await ctx.send(f'Usage: !autoresponder add <{"|".join(TRIGGER_TYPES)}> "<trigger>" <response>')
+                return
+
+            if len(section.triggers) >= MAX_TRIGGERS:
+                await ctx.send(f'This server already has {MAX_TRIGGERS} autoresponders.')
+                return
+
+            error = validate_trigger(target, pattern, response)
+            if error:
+                await ctx.send(error)
+                return
+
+            trigger_id = add_trigger(ctx.guild.id, target, pattern, response)
+            await ctx.send(f'Added autoresponder #{trigger_id} ({target}: `{pattern}`).')
+
+        elif action == 'remove':
+            if not target or not target.isdigit():
+                await ctx.send('Usage: !autoresponder remove <id>')
+                return
+
+            if remove_trigger(ctx.guild.id, int(target)):
+                await ctx.send(f'Removed autoresponder #{target}.')
+            else:
+                await ctx.send(f'Autoresponder #{target} not found.')
+
+        elif action == 'cooldown':
+            if not target or not target.isdigit() or not pattern or not pattern.isdigit():
+                await ctx.send('Usage: !autoresponder cooldown <id> <seconds>')
+                return
+
+            if set_trigger_cooldown(ctx.guild.id, int(target), int(pattern)):
+                await ctx.send(f'Autoresponder #{target} now has a {pattern} second cooldown.')
+            else:
+                await ctx.send(f'Autoresponder #{target} not found.')
+
+        elif action == 'list':
+            page = int(target) if target and target.isdigit() else 1
+            trigger_ids = sorted(section.triggers)
+            if not trigger_ids:
+                await ctx.send('No autoresponders have been set up.')
+                return
+
+            pages = (len(trigger_ids) + TRIGGERS_PER_PAGE - 1) // TRIGGERS_PER_PAGE
+            start = (max(page, 1) - 1) * TRIGGERS_PER_PAGE
+            lines = []
+            for trigger_id in trigger_ids[start:start + TRIGGERS_PER_PAGE]:
+                trigger = section.triggers[trigger_id]
+                lines.append(f"`#{trigger_id}` {trigger['type']} `{trigger['pattern']}` → {trigger['response'][:50]} ({trigger['cooldown']}s)")
+
+            embed = discord.Embed(title="Autoresponders", description="\n".join(lines)[:4096] or "Nothing on this page.", color=discord.Color.blue())
+            embed.set_footer(text=f"Page {page}/{pages} • {len(trigger_ids)} triggers")
+            await ctx.send(embed=embed)
+
+        elif action == 'status':
+            matcher = get_matcher(ctx.guild.id)
+            regexes = sum(1 for trigger in section.triggers.values() if trigger['type'] == 'regex')
+            if regexes and not matcher.regex_enabled:
+                await ctx.send(f'{len(section.triggers)} autoresponders. Regex triggers are switched off because they were too slow, edit them to turn them back on.')
+            else:
+                await ctx.send(f'{len(section.triggers)} autoresponders ({regexes} regex).')
+
+        else:
+            await ctx.send(f'Usage:\n!autoresponder add <{"|".join(TRIGGER_TYPES)}> "<trigger>" <response>\n!autoresponder remove <id>\n!autoresponder cooldown <id> <seconds>\n!autoresponder list [page]\n!autoresponder status')
+
+async def setup(bot):
+    await bot.add_cog(Autoresponder(bot))
@@ -0,0 +1,371 @@
+import asyncio
+import datetime
+import json
+import os
+import re
+import time
+
+import discord
+from discord.ext import commands
+
+from grind.cases import log_action
+from grind.channel_policy import get_channel_policy, is_media, queue_delete, touch_sticky, update_channel_policy
+from grind.config import is_server_whitelisted
+from grind.utils import gather_bounded, parse_duration
+
+# PURGE
+# channel.history is consumed lazily and only the current bulk batch is held in
+# memory. Discord only bulk deletes messages younger than 14 days, anything
+# older has to be deleted one by one.
+PURGE_SCAN_LIMIT = 10000
+PURGE_BATCH_SIZE = 100
+PURGE_SINGLE_DELETE_DELAY = 1.2
+PURGE_PROGRESS_INTERVAL = 3
+BULK_DELETE_MAX_AGE = datetime.timedelta(days=14) - datetime.timedelta(minutes=5)
+MAX_SLOWMODE = 21600
+
+def parse_purge_filters(tokens):
+    checks = []
+    before = None
+    after = None
+
+    for token in tokens:
+        key, _, value = token.partition(':')
+        key = key.lower()
+
+        if token.startswith('<@') and token.endswith('>'):
+            user_id = int(token.strip('<@!>'))
+            checks.append(lambda m, user_id=user_id: m.author.id == user_id)
+        elif key == 'user' and value:
+            user_id = int(value.strip('<@!>'))
+            checks.append(lambda m, user_id=user_id: m.author.id == user_id)
+        elif key in ('bots', 'bot'):
+            checks.append(lambda m: m.author.bot)
+        elif key in ('humans', 'human'):
+            checks.append(lambda m: not m.author.bot)
+        elif key in ('attachments', 'files', 'images'):
+            checks.append(lambda m: bool(m.attachments))
+        elif key == 'contains' and value:
+            needle = value.lower()
+            checks.append(lambda m, needle=needle: needle in m.content.lower())
+        elif key == 'regex' and value:
+            pattern = re.compile(value)
+            checks.append(lambda m, pattern=pattern: pattern.search(m.content) is not None)
+        elif key == 'before' and value:
+            before = discord.Object(id=int(value))
+        elif key == 'after' and value:
+            after = discord.Object(id=int(value))
+        else:
+            raise commands.BadArgument(f'Unknown purge filter: {token}')
+
+    return checks, before, after
+
+# LOCKDOWN
+# Locking or hiding only touches the @everyone overwrite of channels that are
+# not already in the target state. The previous value of every permission that
+# gets changed is saved first, so unlocking puts back exactly what was there
+# and leaves any other edits made in the meantime alone.
+LOCKDOWN_CONCURRENCY = 5
+
+LOCKDOWN_PERMISSIONS = {
+    'lock': {
+        'text': ('send_messages', 'send_messages_in_threads', 'create_public_threads', 'add_reactions'),
+        'voice': ('connect',)
+    },
+    'hide': {
+        'text': ('view_channel',),
+        'voice': ('view_channel',)
+    }
+}
+
+def load_lockdown(server_id):
+    try:
+        with open(f'server_data/lockdown/{server_id}.json', 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def save_lockdown(server_id, snapshot):
+    os.makedirs('server_data/lockdown', exist_ok=True)
+    with open(f'server_data/lockdown/{server_id}.json.tmp', 'w') as f:
+        json.dump(snapshot, f, separators=(',', ':'))
+    os.replace(f'server_data/lockdown/{server_id}.json.tmp', f'server_data/lockdown/{server_id}.json')
+
+def lockdown_permissions(mode, channel):
+    if isinstance(channel, (discord.VoiceChannel, discord.StageChannel)):
+        return LOCKDOWN_PERMISSIONS[mode]['voice']
+    return LOCKDOWN_PERMISSIONS[mode]['text']
+
+async def apply_lockdown(guild, mode, channels, reason):
+    server_id = str(guild.id)
+    snapshot = load_lockdown(server_id)
+    saved = snapshot.setdefault(mode, {})
+    default_role = guild.default_role
+    changes = []
+
+    for channel in channels:
+        if str(channel.id) in saved:
+            continue
+
+        overwrite = channel.overwrites_for(default_role)
+        permissions = lockdown_permissions(mode, channel)
+        previous = {permission: getattr(overwrite, permission) for permission in permissions}
+        if all(value is False for value in previous.values()):
+            continue
+
+        saved[str(channel.id)] = previous
+        overwrite.update(**{permission: False for permission in permissions})
+        changes.append(channel.set_permissions(default_role, overwrite=overwrite, reason=reason))
+
+    # The snapshot is written before anything is changed so an interrupted
+    # lockdown can still be undone.
+    save_lockdown(server_id, snapshot)
+    results = await gather_bounded(changes, LOCKDOWN_CONCURRENCY)
+    return len(changes) - sum(isinstance(result, Exception) for result in results)
+
+async def restore_lockdown(guild, mode, channels, reason):
+    server_id = str(guild.id)
+    snapshot = load_lockdown(server_id)
+    saved = snapshot.get(mode, {})
+    default_role = guild.default_role
+    changes = []
+    keys = []
+
+    for channel in channels:
+        previous = saved.get(str(channel.id))
+        if previous is None:
+            continue
+
+        overwrite = channel.overwrites_for(default_role)
+        overwrite.update(**previous)
+        if overwrite == channel.overwrites_for(default_role):
+            del saved[str(channel.id)]
+            continue
+
+        keys.append(str(channel.id))
+        changes.append(channel.set_permissions(default_role, overwrite=None if overwrite.is_empty() else overwrite, reason=reason))
+
+    # Channels that failed keep their saved overwrite so the command can be
+    # run again.
+    results = await gather_bounded(changes, LOCKDOWN_CONCURRENCY)
+    for key, result in zip(keys, results):
+        if not isinstance(result, Exception):
+            del saved[key]
+
+    save_lockdown(server_id, snapshot)
+    return len(changes) - sum(isinstance(result, Exception) for result in results)
+
+def lockdown_targets(ctx, target):
+    if target == 'all':
+        return [channel for channel in ctx.guild.channels if not isinstance(channel, discord.CategoryChannel)]
+    if ctx.message.channel_mentions:
+        return ctx.message.channel_mentions
+    return [ctx.channel]
+
+async def run_lockdown_command(ctx, mode, target, restore):
+    channels = lockdown_targets(ctx, target)
+    action = {('lock', False): 'lockdown', ('lock', True): 'unlock', ('hide', False): 'hide', ('hide', True): 'unhide'}[(mode, restore)]
+
+    try:
+        if restore:
+            changed = await restore_lockdown(ctx.guild, mode, channels, f'{action} by {ctx.author}')
+        else:
+            changed = await apply_lockdown(ctx.guild, mode, channels, f'{action} by {ctx.author}')
+    except discord.Forbidden:
+        await ctx.send("I don't have permission to manage channels. Move the bot role up or check permissions.")
+        return
+
+    await ctx.send(f'{action.capitalize()} applied to {changed} channel(s).')
+    if changed:
+        await log_action(ctx.guild, action, f"{changed} channels", ctx.author)
+
+class Channels(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if not message.guild:
+            return
+
+        policy = get_channel_policy(message.channel)
+        if policy is None or message.author.id == self.bot.user.id:
+            return
+
+        if not await is_server_whitelisted(message.guild):
+            return
+
+        if policy.get('media_only') and not message.author.bot and not is_media(message):
+            if not message.channel.permissions_for(message.author).manage_messages:
+                queue_delete(message)
+                return
+
+        if policy.get('sticky'):
+            touch_sticky(message.channel)
+
+    @commands.command(name="purge", aliases=["clear", "prune"])
+    @commands.has_permissions(manage_messages=True)
+    async def purge(self, ctx, amount: int, *filters):
+        if amount < 1:
+            await ctx.send('Please provide a positive number of messages to delete.')
+            return
+
+        try:
+            checks, before, after = parse_purge_filters(filters)
+        except (ValueError, re.error) as e:
+            await ctx.send(f'Invalid purge filter: {e}')
+            return
+
+        # Without filters every scanned message is deleted, so there is no reason
+        # to look further back than the requested amount.
+        scan_limit = min(amount, PURGE_SCAN_LIMIT) if not checks else PURGE_SCAN_LIMIT
+        if before is None:
+            before = ctx.message
+
+        try:
+            await ctx.message.delete()
+        except discord.HTTPException:
+            pass
+
+        status = await ctx.send(f'Purging up to {amount} messages...')
+        bulk_cutoff = discord.utils.utcnow() - BULK_DELETE_MAX_AGE
+        batch = []
+        scanned = 0
+        deleted = 0
+        last_progress = time.monotonic()
+
+        async def flush():
+            nonlocal deleted
+            if len(batch) == 1:
+                try:
+                    await batch[0].delete()
+                    deleted += 1
+                except discord.NotFound:
+                    pass
+            elif batch:
+                await ctx.channel.delete_messages(batch)
+                deleted += len(batch)
+            batch.clear()
+
+        try:
+            async for message in ctx.channel.history(limit=scan_limit, before=before, after=after):
+                scanned += 1
+
+                if message.id != status.id and all(check(message) for check in checks):
+                    if message.created_at > bulk_cutoff:
+                        batch.append(message)
+                        if len(batch) >= PURGE_BATCH_SIZE:
+                            await flush()
+                    else:
+                        await flush()
+                        try:
+                            await message.delete()
+                            deleted += 1
+                        except discord.NotFound:
+                            pass
+                        await asyncio.sleep(PURGE_SINGLE_DELETE_DELAY)
+
+                    if deleted + len(batch) >= amount:
+                        break
+
+                # Progress follows the scan, so a filtered purge that matches
+                # nothing for a while still reports.
+                if time.monotonic() - last_progress > PURGE_PROGRESS_INTERVAL:
+                    last_progress = time.monotonic()
+                    await status.edit(content=f'Purging... scanned {scanned}, deleted {deleted + len(batch)}/{amount}')
+
+            await flush()
+        except discord.Forbidden:
+            await status.edit(content="I don't have permission to delete messages. Check the bot's permissions.")
+            return
+
+        await status.edit(content=f'Deleted {deleted} messages (scanned {scanned}).', delete_after=5)
+        await log_action(ctx.guild, "purge", ctx.channel.mention, ctx.author, f"{deleted} messages deleted")
+
+    @commands.command(name="lockdown", aliases=["lock"])
+    @commands.has_permissions(manage_channels=True)
+    async def lockdown(self, ctx, target=None):
+        await run_lockdown_command(ctx, 'lock', target, restore=False)
+
+    @commands.command(name="unlockdown", aliases=["unlock"])
+    @commands.has_permissions(manage_channels=True)
+    async def unlockdown(self, ctx, target=None):
+        await run_lockdown_command(ctx, 'lock', target, restore=True)
+
+    @commands.command(name="hide")
+    @commands.has_permissions(manage_channels=True)
+    async def hide(self, ctx, target=None):
+        await run_lockdown_command(ctx, 'hide', target, restore=False)
+
+    @commands.command(name="unhide")
+    @commands.has_permissions(manage_channels=True)
+    async def unhide(self, ctx, target=None):
+        await run_lockdown_command(ctx, 'hide', target, restore=True)
+
+    @commands.command(name="imgonly", aliases=["mediaonly"])
+    @commands.has_permissions(manage_channels=True)
+    async def imgonly(self, ctx, channel: discord.TextChannel = None):
+        channel = channel or ctx.channel
+        policy = get_channel_policy(channel) or {}
+        enabled = not policy.get('media_only')
+
+        update_channel_policy(channel, media_only=enabled or None)
+        if enabled:
+            await ctx.send(f'{channel.mention} is now media only. Messages without attachments or links will be deleted.')
+        else:
+            await ctx.send(f'{channel.mention} is no longer media only.')
+
+    @commands.command(name="slowmode", aliases=["slow"])
+    @commands.has_permissions(manage_channels=True)
+    async def slowmode(self, ctx, duration='off', channel: discord.TextChannel = None):
+        channel = channel or ctx.channel
+
+        if duration in ('off', '0'):
+            seconds = 0
+        else:
+            delta = parse_duration(duration)
+            if delta is None or not 0 < delta.total_seconds() <= MAX_SLOWMODE:
+                await ctx.send('Usage: !slowmode <duration|off> [#channel] (e.g. 10s, 5m, up to 6h)')
+                return
+            seconds = int(delta.total_seconds())
+
+        try:
+            await channel.edit(slowmode_delay=seconds, reason=f'Slowmode set by {ctx.author}')
+        except discord.Forbidden:
+            await ctx.send("I don't have permission to manage this channel. Check the bot's permissions.")
+            return
+
+        if seconds:
+            await ctx.send(f'Slowmode in {channel.mention} set to {duration}.')
+        else:
+            await ctx.send(f'Slowmode in {channel.mention} has been turned off.')
+
+    @commands.command(name="sticky", aliases=["stickymessage"])
+    @commands.has_permissions(manage_messages=True)
+    async def sticky(self, ctx, *, text=None):
+        policy = get_channel_policy(ctx.channel) or {}
+
+        if not text:
+            await ctx.send('Usage:\n!sticky <message>\n!sticky off')
+            return
+
+        if policy.get('sticky_message_id'):
+            try:
+                await ctx.channel.get_partial_message(policy['sticky_message_id']).delete()
+            except discord.HTTPException:
+                pass
+
+        if text == 'off':
+            update_channel_policy(ctx.channel, sticky=None, sticky_message_id=None)
+            await ctx.send('The sticky message has been removed.')
+            return
+
+        if len(text) > 2000:
+            await ctx.send('Sticky messages can be at most 2000 characters.')
+            return
+
+        message = await ctx.send(text, allowed_mentions=discord.AllowedMentions.none())
+        update_channel_policy(ctx.channel, sticky=text, sticky_message_id=message.id)
+
+async def setup(bot):
+    await bot.add_cog(Channels(bot))
@@ -0,0 +1,306 @@
+import discord
+from discord.ext import commands
+
+from grind.config import DEFAULT_PREFIX, get_section, get_settings
+from grind.jobs import cancel_job, format_job, job_handler, job_progress, jobs, recent_jobs, submit_job
+
+@job_handler('apply_overwrites')
+async def apply_overwrites_job(job, guild):
+    role = guild.get_role(job['params']['role_id'])
+    if role is None:
+        raise RuntimeError('Role no longer exists')
+
+    overwrite = discord.PermissionOverwrite(**job['params']['overwrite'])
+    skip = set(job['params'].get('skip_channel_ids', []))
+    done = set(job['state'].setdefault('done_channel_ids', []))
+    channels = [channel for channel in guild.channels if channel.id not in skip]
+
+    for position, channel in enumerate(channels, 1):
+        if channel.id not in done:
+            if channel.overwrites_for(role) != overwrite:
+                await channel.set_permissions(role, overwrite=overwrite, reason=job['description'])
+            job['state']['done_channel_ids'].append(channel.id)
+        await job_progress(job, position, len(channels))
+
+class Configuration(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.command(name="setuplogs", aliases=["logsetup"])
+    @commands.has_permissions(administrator=True)
+    async def setup_logs(self, ctx):
+        settings = get_settings(ctx.guild.id)
+
+        try:
+            logs_channel = await ctx.guild.create_text_channel('logs',
+                                                            overwrites={
+                                                                ctx.guild.default_role: discord.PermissionOverwrite(view_channel=False)
+                                                            })
+
+            jail_logs_channel = None
+            if not settings.jail_logs_channel_id or not ctx.guild.get_channel(settings.jail_logs_channel_id):
+                jail_logs_channel = await ctx.guild.create_text_channel('jail-logs',
+                                                                    overwrites={
+                                                                        ctx.guild.default_role: discord.PermissionOverwrite(view_channel=False)
+                                                                    })
+
+            settings.logs_channel_id = logs_channel.id
+            if jail_logs_channel:
+                settings.jail_logs_channel_id = jail_logs_channel.id
+
+            settings.save()
+
+            await ctx.send(f"Logging channels have been set up at <#{logs_channel.id}>")
+
+        except discord.Forbidden:
+            await ctx.send("I don't have permission to create channels/Manage roles. Move the bot role up or check permissions.")
+        except Exception as e:
+            await ctx.send(f"An error occurred: {str(e)}")
+
+    @commands.command(name="setupjail", aliases=["jailsetup", "prison"])
+    @commands.has_permissions(administrator=True)
+    async def setupjail(self, ctx):
+        settings = get_settings(ctx.guild.id)
+
+        if settings.jailed_role_id and ctx.guild.get_role(settings.jailed_role_id):
+            await ctx.send('Jail system is already set up for this server.')
+            return
+
+        try:
+            jailed_role = await ctx.guild.create_role(name='Jailed', reason='Jail system setup')
+
+            jail_channel = await ctx.guild.create_text_channel('jail',
+                                                            overwrites={
+                                                                jailed_role: discord.PermissionOverwrite(view_channel=True, send_messages=True),
+                                                                ctx.guild.default_role: discord.PermissionOverwrite(view_channel=False)
+                                                            })
+
+            jail_logs_channel = None
+            if settings.jail_logs_channel_id and ctx.guild.get_channel(settings.jail_logs_channel_id):
+                jail_logs_channel = ctx.guild.get_channel(settings.jail_logs_channel_id)
+            else:
+                jail_logs_channel = await ctx.guild.create_text_channel('jail-logs',
+                                                                    overwrites={
+                                                                        ctx.guild.default_role: discord.PermissionOverwrite(view_channel=False)
+                                                                    })
+
+            settings.jailed_role_id = jailed_role.id
+            settings.jail_channel_id = jail_channel.id
+            settings.jail_logs_channel_id = jail_logs_channel.id
+
+            settings.save()
+
+            await ctx.send(f'Jail system has been set up at <#{jail_logs_channel.id}>')
+
+            await submit_job(ctx, 'apply_overwrites', 'Jail channel permissions', {
+                'role_id': jailed_role.id,
+                'overwrite': {'view_channel': False, 'send_messages': False, 'read_messages': False, 'add_reactions': False},
+                'skip_channel_ids': [jail_channel.id, jail_logs_channel.id]
+            })
+
+        except discord.Forbidden:
+            await ctx.send("I don't have permission to create channels/Manage roles. Move the bot role up or check permissions.")
+        except Exception as e:
+            await ctx.send(f'An error occurred: {str(e)}')
+
+    @commands.command(name="setupmute", aliases=["mutesetup"])
+    @commands.has_permissions(administrator=True)
+    async def setupmute(self, ctx):
+        settings = get_settings(ctx.guild.id)
+
+        if settings.muted_role_id and ctx.guild.get_role(settings.muted_role_id):
+            await ctx.send('Mute system is already set up for this server.')
+            return
+
+        try:
+            muted_role = await ctx.guild.create_role(name='Muted', reason='Mute system setup')
+
+            settings.muted_role_id = muted_role.id
+
+            settings.save()
+
+            await ctx.send('Mute system has been set up')
+
+            await submit_job(ctx, 'apply_overwrites', 'Mute channel permissions', {
+                'role_id': muted_role.id,
+                'overwrite': {'send_messages': False, 'add_reactions': False}
+            })
+
+        except discord.Forbidden:
+            await ctx.send("I don't have permission to create channels/Manage roles. Move the bot role up or check permissions.")
+        except Exception as e:
+            await ctx.send(f'An error occurred: {str(e)}')
+
+    @commands.command(name="prefix", aliases=["setprefix", "changeprefix"])
+    @commands.has_permissions(administrator=True)
+    async def change_prefix(self, ctx, action=None, new_prefix=None):
+        settings = get_settings(ctx.guild.id)
+
+        current_prefix = settings.prefix
+
+        if action == 'set':
+            if not new_prefix:
+                await ctx.send('Please provide a new prefix. !prefix set <new_prefix>')
+                return
+
+            settings.prefix = new_prefix
+            settings.save()
+
+            await ctx.send(f'Prefix changed to: {new_prefix}')
+
+        elif action == 'remove':
+            settings.prefix = DEFAULT_PREFIX
+            settings.save()
+            await ctx.send(f'Prefix reset to default: {DEFAULT_PREFIX}')
+
+        elif action == 'list':
+            await ctx.send(f'Current prefix: {current_prefix}')
+
+        else:
+            await ctx.send(f'Usage:\n{current_prefix}prefix set <new_prefix>\n{current_prefix}prefix remove\n{current_prefix}prefix list')
+
+    @commands.command(name="fp", aliases=["fakepermissions", "fakeperm"])
+    @commands.has_permissions(administrator=True)
+    async def fake_permissions(self, ctx, action=None, role: discord.Role = None, permission=None):
+        section = get_section(ctx.guild.id, 'fake_permissions')
+        fake_perms = section.roles
+
+        if action not in ['grant', 'remove', 'list']:
+            await ctx.send('Usage:\n!fp grant <role> <permission>\n!fp remove <role> <permission>\n!fp list')
+            return
+
+        if action == 'list':
+            if not fake_perms:
+                await ctx.send('No fake permissions set.')
+                return
+
+            response = "Current Fake Permissions:\n"
+            for role_id, perms in fake_perms.items():
+                role = ctx.guild.get_role(role_id)
+                role_name = role.name if role else f"Role ID: {role_id}"
+                response += f"{role_name}: {', '.join(perms)}\n"
+
+            await ctx.send(response)
+            return
+
+        if not role:
+            await ctx.send('Please mention a valid role.')
+            return
+
+        role_id = role.id
+
+        valid_permissions = [
+            'administrator', 'manage_guild', 'manage_roles', 'manage_channels',
+            'kick_members', 'ban_members', 'manage_messages', 'manage_nicknames'
+        ]
+
+        if action == 'grant':
+            if not permission or permission not in valid_permissions:
+                await ctx.send(f'Invalid permission. Valid permissions are:\n{", ".join(valid_permissions)}')
+                return
+
+            if role_id not in fake_perms:
+                fake_perms[role_id] = []
+
+            if permission not in fake_perms[role_id]:
+                fake_perms[role_id].append(permission)
+
+            section.save()
+            await ctx.send(f'Granted {permission} to {role.name}')
+
+        elif action == 'remove':
+            if role_id in fake_perms:
+                if permission:
+                    if permission in fake_perms[role_id]:
+                        fake_perms[role_id].remove(permission)
+                        await ctx.send(f'Removed {permission} from {role.name}')
+                    else:
+                        await ctx.send(f'Permission {permission} not found for this role.')
+                else:
+                    del fake_perms[role_id]
+                    await ctx.send(f'Removed all fake permissions for {role.name}')
+
+                section.save()
+            else:
+                await ctx.send('No fake permissions found for this role.')
+
+    @commands.command(name="alias")
+    @commands.has_permissions(administrator=True)
+    async def alias_command(self, ctx, action=None, alias_name=None, command_name=None):
+        section = get_section(ctx.guild.id, 'aliases')
+        aliases = section.aliases
+
+        if action == 'add':
+            if not alias_name or not command_name:
+                await ctx.send('Please provide both alias name and command. !alias add <alias_name> <command_name>')
+                return
+
+            real_command = self.bot.get_command(command_name)
+            if not real_command:
+                await ctx.send(f'Command {command_name} does not exist.')
+                return
+
+            aliases[alias_name] = command_name
+            section.save()
+            await ctx.send(f'Added alias: {alias_name} → {command_name}')
+
+        elif action == 'remove':
+            if not alias_name:
+                await ctx.send('Please provide an alias name to remove. !alias remove <alias_name>')
+                return
+
+            if alias_name in aliases:
+                del aliases[alias_name]
+                section.save()
+                await ctx.send(f'Removed alias: {alias_name}')
+            else:
+                await ctx.send(f'Alias {alias_name} not found.')
+
+        elif action == 'list':
+            if not aliases:
+                await ctx.send('No aliases configured for this server.')
+                return
+
+            prefix = get_settings(ctx.guild.id).prefix
+            alias_list = [f'`{prefix}{alias}` → `{prefix}{command}`' for alias, command in aliases.items()]
+            await ctx.send("Server Aliases:\n" + "\n".join(alias_list))
+
+        elif action == 'removeall':
+            if not aliases:
+                await ctx.send('No aliases to remove.')
+                return
+
+            aliases.clear()
+            section.save()
+            await ctx.send('All aliases have been removed.')
+
+        else:
+            await ctx.send('Usage:\n!alias add <alias_name> <command_name>\n!alias remove <alias_name>\n!alias list\n!alias removeall')
+
+    @commands.command(name="jobs", aliases=["job"])
+    @commands.has_permissions(administrator=True)
+    async def jobs_command(self, ctx, action='list', job_id: int = None):
+        if action == 'list':
+            active = [job for job in jobs.values() if job['guild_id'] == ctx.guild.id]
+            finished = list(recent_jobs.get(ctx.guild.id, []))[-5:]
+
+            if not active and not finished:
+                await ctx.send('No jobs for this server.')
+                return
+
+            await ctx.send("\n".join(format_job(job) for job in active + finished))
+
+        elif action == 'cancel':
+            job = jobs.get(job_id)
+            if not job or job['guild_id'] != ctx.guild.id:
+                await ctx.send(f'Job #{job_id} not found.')
+                return
+
+            cancel_job(job_id)
+            await ctx.send(f'Job #{job_id} cancelled.')
+
+        else:
+            await ctx.send('Usage:\n!jobs list\n!jobs cancel <job_id>')
+
+async def setup(bot):
+    await bot.add_cog(Configuration(bot))
@@ -0,0 +1,132 @@
+import discord
+from discord.ext import commands
+
+from grind.config import OWNER_ID, get_section, get_settings
+
+class General(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.command(name="help", aliases=["commands", "h"])
+    async def help_command(self, ctx):
+        prefix = get_settings(ctx.guild.id).prefix
+
+        embed = discord.Embed(
+            title="Bot Commands",
+            description=f"Prefix: `{prefix}`",
+            color=discord.Color.blue()
+        )
+
+        mod_commands = [
+            f"`{prefix}ban <user> [duration] [reason]` - Ban a user",
+            f"`{prefix}unban <user_id>` - Unban a user",
+            f"`{prefix}unbanall [temp|reason:<text>]` - Unban every banned user",
+            f"`{prefix}kick <user> [reason]` - Kick a user",
+            f"`{prefix}mute <user> [duration] [reason]` - Mute a user",
+            f"`{prefix}unmute <user>` - Unmute a user",
+            f"`{prefix}jail <user> [duration] [reason]` - Jail a user",
+            f"`{prefix}unjail <user>` - Unjail a user",
+            f"`{prefix}history <user> [page]` - Show a user's moderation cases",
+            f"`{prefix}modstats <moderator> [page]` - Show a moderator's actions",
+            f"`{prefix}case <number>` - Show a single case",
+            f"`{prefix}snipe [n]` - Show a recently deleted message",
+            f"`{prefix}editsnipe [n]` - Show a recently edited message"
+        ]
+        embed.add_field(name="Moderation", value="\n".join(mod_commands), inline=False)
+
+        channel_commands = [
+            f"`{prefix}purge <amount> [filters]` - Bulk delete messages",
+            f"`{prefix}lockdown [#channel|all]` - Stop @everyone from talking",
+            f"`{prefix}unlock [#channel|all]` - Undo a lockdown",
+            f"`{prefix}hide [#channel|all]` - Hide channels from @everyone",
+            f"`{prefix}unhide [#channel|all]` - Undo a hide",
+            f"`{prefix}imgonly [#channel]` - Toggle media-only mode",
+            f"`{prefix}slowmode <duration|off> [#channel]` - Set channel slowmode",
+            f"`{prefix}sticky <message|off>` - Keep a message at the bottom of the channel"
+        ]
+        embed.add_field(name="Channels", value="\n".join(channel_commands), inline=False)
+
+        setup_commands = [
+            f"`{prefix}setupjail` - Set up jail system",
+            f"`{prefix}setupmute` - Set up mute system",
+            f"`{prefix}setuplogs` - Set up logging channels",
+            f"`{prefix}prefix <set|remove|list> [new_prefix]` - Manage bot prefix",
+            f"`{prefix}jobs <list|cancel> [job_id]` - Manage running setup jobs"
+        ]
+        embed.add_field(name="Setup", value="\n".join(setup_commands), inline=False)
+
+        alias_commands = [
+            f"`{prefix}alias add <name> <command>` - Add a command alias",
+            f"`{prefix}alias remove <name>` - Remove an alias",
+            f"`{prefix}alias list` - List all aliases",
+            f"`{prefix}alias removeall` - Remove all aliases"
+        ]
+        embed.add_field(name="Aliases", value="\n".join(alias_commands), inline=False)
+
+        vm_commands = [
+            f"`{prefix}vm` - Create a temporary voice channel",
+            f"`{prefix}vm name <name>` - Rename your voice channel",
+            f"`{prefix}vm limit <number>` - Set user limit for your channel",
+            f"`{prefix}vm lock` - Lock your voice channel",
+            f"`{prefix}vm unlock` - Unlock your voice channel"
+        ]
+        embed.add_field(name="VoiceMaster", value="\n".join(vm_commands), inline=False)
+
+        level_commands = [
+            f"`{prefix}rank [user]` - Show a member's level and rank",
+            f"`{prefix}leaderboard [page]` - Show the server leaderboard"
+        ]
+        embed.add_field(name="Levels", value="\n".join(level_commands), inline=False)
+
+        antinuke_commands = [
+            f"`{prefix}antinuke [status|on|off]` - Show or toggle antinuke (server owner)",
+            f"`{prefix}antinuke limit <actions> <seconds>` - Set the destructive action limit",
+            f"`{prefix}antinuke <trust|untrust> <user>` - Exempt a user from antinuke",
+            f"`{prefix}stripstaff <user> [reason]` - Remove a member's staff roles",
+            f"`{prefix}unstrip <user>` - Give back stripped roles (server owner)"
+        ]
+        embed.add_field(name="Antinuke", value="\n".join(antinuke_commands), inline=False)
+
+        server_commands = [
+            f"`{prefix}autoresponder add <type> <trigger> <response>` - Add an autoresponder",
+            f"`{prefix}autoresponder <remove|cooldown> <id> [seconds]` - Remove an autoresponder or set its cooldown",
+            f"`{prefix}autoresponder <list|status>` - List autoresponders",
+            f"`{prefix}autorole <add|remove|list> [role]` - Manage roles given to new members",
+            f"`{prefix}welcome <channel|message|off|test> [value]` - Set up welcome messages",
+            f"`{prefix}forcenick <user> <nickname|off>` - Force or stop forcing a nickname",
+            f"`{prefix}forcenick` - List forced nicknames"
+        ]
+        embed.add_field(name="Server", value="\n".join(server_commands), inline=False)
+
+        utility_commands = [
+            f"`{prefix}serverinfo` - Show server statistics",
+            f"`{prefix}userinfo [user]` - Show a member's account and join info",
+            f"`{prefix}afk [reason]` - Mark yourself as AFK",
+            f"`{prefix}giveaway start <duration> <winners> <prize>` - Start a giveaway",
+            f"`{prefix}giveaway <end|list> [message_id]` - End or list giveaways",
+            f"`{prefix}poll [duration] <question> | <option> ...` - Start a poll",
+            f"`{prefix}poll end <message_id>` - End a poll"
+        ]
+        embed.add_field(name="Utility", value="\n".join(utility_commands), inline=False)
+
+        if ctx.author.id == OWNER_ID:
+            owner_commands = [
+                f"`{prefix}whitelist <add|remove|list|clear> [server_id]` - Manage whitelisted servers",
+                f"`{prefix}diagnostics <stats|dump|reset>` - Show event loop lag and blocking reports",
+                f"`{prefix}reload [extension]` - Hot reload one extension or all of them",
+                f"`{prefix}membercache <report|set> [policy]` - Compare or change the member cache policy",
+                f"`{prefix}requeststats [reset]` - Show outbound request stats per priority class",
+                f"`{prefix}backup [create|full|list]` - Snapshot guild configs",
+                f"`{prefix}backup restore <guild_id|all>` - Restore configs from the latest snapshot"
+            ]
+            embed.add_field(name="Owner", value="\n".join(owner_commands), inline=False)
+
+        server_aliases = get_section(ctx.guild.id, 'aliases').aliases
+        if server_aliases:
+            alias_list = [f"`{prefix}{alias}` → `{prefix}{command}`" for alias, command in server_aliases.items()]
+            embed.add_field(name="Server Aliases", value="\n".join(alias_list), inline=False)
+
+        await ctx.send(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(General(bot))
@@ -0,0 +1,235 @@
+import time
+
+import discord
+from discord.ext import commands, tasks
+
+from grind import scheduler
+from grind.config import EntrantSet, get_section
+from grind.giveaways import GIVEAWAY_EMOJI, GIVEAWAY_FLUSH_INTERVAL, MAX_WINNERS, POLL_EMOJIS, YES_NO_EMOJIS, draw_winners, flush_giveaways, record_reaction
+from grind.utils import parse_duration
+
+# Prizes and questions become the embed title (at most 256 characters) after
+# an emoji and a space.
+MAX_TITLE_TEXT = 250
+
+def giveaway_embed(giveaway, winners=None):
+    if winners is None:
+        description = f"React with {GIVEAWAY_EMOJI} to enter!\nEnds <t:{int(giveaway['ends_at'])}:R>"
+        color = discord.Color.magenta()
+    else:
+        description = f"Winners: {', '.join(f'<@{user_id}>' for user_id in winners) or 'nobody entered'}\n{len(giveaway['entrants'])} entrants"
+        color = discord.Color.dark_grey()
+
+    embed = discord.Embed(title=f"{GIVEAWAY_EMOJI} {giveaway['prize']}", description=description, color=color)
+    embed.add_field(name="Hosted By", value=f"<@{giveaway['host_id']}>", inline=True)
+    embed.add_field(name="Winners", value=str(giveaway['winners']), inline=True)
+    return embed
+
+def poll_embed(poll, ended=False):
+    counts = [len(voters) for voters in poll['voters']]
+    total = sum(counts)
+    lines = []
+    for emoji, option, count in zip(poll['emojis'], poll['options'], counts):
+        if ended:
+            percent = count * 100 // total if total else 0
+            lines.append(f"{emoji} {option}: **{count}** ({percent}%)")
+        else:
+            lines.append(f"{emoji} {option}")
+
+    embed = discord.Embed(title=f"📊 {poll['question']}", description="\n".join(lines), color=discord.Color.dark_grey() if ended else discord.Color.blue())
+    if ended:
+        embed.set_footer(text=f"Poll ended • {total} votes")
+    elif poll.get('ends_at'):
+        embed.add_field(name="Ends", value=f"<t:{int(poll['ends_at'])}:R>", inline=False)
+    return embed
+
+async def end_giveaway(guild, message_id):
+    section = get_section(guild.id, 'giveaways')
+    giveaway = section.giveaways.pop(message_id, None)
+    if giveaway is None:
+        return None
+
+    scheduler.cancel(f"giveaway:{message_id}")
+    winners = draw_winners(giveaway, giveaway['winners'])
+    section.save()
+
+    channel = guild.get_channel(giveaway['channel_id'])
+    if channel is None:
+        return winners
+
+    try:
+        await channel.get_partial_message(message_id).edit(embed=giveaway_embed(giveaway, winners))
+    except discord.HTTPException:
+        pass
+
+    if winners:
+        await channel.send(f"{GIVEAWAY_EMOJI} Congratulations {', '.join(f'<@{user_id}>' for user_id in winners)}! You won **{giveaway['prize']}**.")
+    else:
+        await channel.send(f"Nobody entered the giveaway for **{giveaway['prize']}**.")
+    return winners
+
+async def end_poll(guild, message_id):
+    section = get_section(guild.id, 'giveaways')
+    poll = section.polls.pop(message_id, None)
+    if poll is None:
+        return None
+
+    scheduler.cancel(f"poll:{message_id}")
+    section.save()
+
+    channel = guild.get_channel(poll['channel_id'])
+    if channel is not None:
+        try:
+            await channel.get_partial_message(message_id).edit(embed=poll_embed(poll, ended=True))
+        except discord.HTTPException:
+            pass
+    return poll
+
+@scheduler.timer_handler('giveaway_end')
+async def giveaway_timer(bot, data):
+    guild = bot.get_guild(data['guild_id'])
+    if guild is not None:
+        await end_giveaway(guild, data['message_id'])
+
+@scheduler.timer_handler('poll_end')
+async def poll_timer(bot, data):
+    guild = bot.get_guild(data['guild_id'])
+    if guild is not None:
+        await end_poll(guild, data['message_id'])
+
+class Giveaways(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.giveaway_flush_loop.start()
+
+    def cog_unload(self):
+        self.giveaway_flush_loop.cancel()
+        flush_giveaways()
+
+    @tasks.loop(seconds=GIVEAWAY_FLUSH_INTERVAL)
+    async def giveaway_flush_loop(self):
+        flush_giveaways()
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload):
+        if payload.guild_id is None or payload.user_id == self.bot.user.id:
+            return
+        if payload.member is not None and payload.member.bot:
+            return
+        record_reaction(payload.guild_id, payload.message_id, payload.user_id, str(payload.emoji), True)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload):
+        if payload.guild_id is None or payload.user_id == self.bot.user.id:
+            return
+        # Remove events carry no member, so bots are looked up in the cache.
+        user = self.bot.get_user(payload.user_id)
+        if user is not None and user.bot:
+            return
+        record_reaction(payload.guild_id, payload.message_id, payload.user_id, str(payload.emoji), False)
+
+    @commands.command(name="giveaway", aliases=["gw"])
+    @commands.has_permissions(manage_guild=True)
+    async def giveaway(self, ctx, action=None, first=None, second=None, *, prize=None):
+        section = get_section(ctx.guild.id, 'giveaways')
+
+        if action == 'start':
+            duration = parse_duration(first) if first else None
+            if duration is None or not second or not second.isdigit() or not prize:
+                await ctx.send('Usage: !giveaway start <duration> <winners> <prize>')
+                return
+
+            winners = int(second)
+            if not 1 <= winners <= MAX_WINNERS:
+                await ctx.send(f'A giveaway can have between 1 and {MAX_WINNERS} winners.')
+                return
+
+            if len(prize) > MAX_TITLE_TEXT:
+                await ctx.send(f'The prize can be at most {MAX_TITLE_TEXT} characters.')
+                return
+
+            giveaway = {
+                'channel_id': ctx.channel.id,
+                'prize': prize,
+                'winners': winners,
+                'host_id': ctx.author.id,
+                'ends_at': time.time() + duration.total_seconds()
+            }
+            message = await ctx.send(embed=giveaway_embed(giveaway))
+            giveaway['entrants'] = EntrantSet()
+            section.giveaways[message.id] = giveaway
+            section.save()
+            scheduler.schedule('giveaway_end', duration.total_seconds(), {'guild_id': ctx.guild.id, 'message_id': message.id}, key=f"giveaway:{message.id}")
+
+            await message.add_reaction(GIVEAWAY_EMOJI)
+
+        elif action == 'end':
+            if not first or not first.isdigit():
+                await ctx.send('Usage: !giveaway end <message_id>')
+                return
+
+            if await end_giveaway(ctx.guild, int(first)) is None:
+                await ctx.send('No running giveaway with that message ID.')
+
+        elif action == 'list':
+            if not section.giveaways:
+                await ctx.send('There are no running giveaways.')
+                return
+
+            lines = [f"`{message_id}` **{giveaway['prize']}** in <#{giveaway['channel_id']}>, {len(giveaway['entrants'])} entrants, ends <t:{int(giveaway['ends_at'])}:R>"
+                     for message_id, giveaway in section.giveaways.items()]
+            await ctx.send(embed=discord.Embed(title="Running Giveaways", description="\n".join(lines)[:4096], color=discord.Color.magenta()))
+
+        else:
+            await ctx.send('Usage:\n!giveaway start <duration> <winners> <prize>\n!giveaway end <message_id>\n!giveaway list')
+
+    @commands.command(name="poll", aliases=["vote"])
+    @commands.has_permissions(manage_messages=True)
+    async def poll(self, ctx, *, text=None):
+        if not text:
+            await ctx.send('Usage:\n!poll [duration] <question> | <option> | <option> ...\n!poll end <message_id>')
+            return
+
+        first, _, rest = text.partition(' ')
+        if first == 'end':
+            if not rest.strip().isdigit() or await end_poll(ctx.guild, int(rest.strip())) is None:
+                await ctx.send('No running poll with that message ID.')
+            return
+
+        duration = parse_duration(first) if first[:-1].isdigit() else None
+        if duration is not None:
+            text = rest
+
+        parts = [part.strip() for part in text.split('|')]
+        question, options = parts[0], [option for option in parts[1:] if option]
+        if not question or len(options) == 1 or len(options) > len(POLL_EMOJIS):
+            await ctx.send(f'A poll needs a question and either no options (yes/no) or 2 to {len(POLL_EMOJIS)} options.')
+            return
+
+        if len(question) > MAX_TITLE_TEXT:
+            await ctx.send(f'The question can be at most {MAX_TITLE_TEXT} characters.')
+            return
+
+        poll = {
+            'channel_id': ctx.channel.id,
+            'question': question,
+            'options': options or ['Yes', 'No'],
+            'emojis': list(POLL_EMOJIS[:len(options)] if options else YES_NO_EMOJIS),
+            'voters': [set() for _ in range(len(options) or 2)],
+            'author_id': ctx.author.id,
+            'ends_at': time.time() + duration.total_seconds() if duration else None
+        }
+        message = await ctx.send(embed=poll_embed(poll))
+
+        section = get_section(ctx.guild.id, 'giveaways')
+        section.polls[message.id] = poll
+        section.save()
+
+        for emoji in poll['emojis']:
+            await message.add_reaction(emoji)
+
+        if duration:
+            scheduler.schedule('poll_end', duration.total_seconds(), {'guild_id': ctx.guild.id, 'message_id': message.id}, key=f"poll:{message.id}")
+
+async def setup(bot):
+    await bot.add_cog(Giveaways(bot))
@@ -0,0 +1,120 @@
+import heapq
+
+import discord
+from discord.ext import commands
+
+from grind.members import ensure_chunked, member_cache_policy
+from grind.stats import drop_guild_stats, get_guild_stats, guild_stats, tracked_stats
+
+TOP_ROLES = 5
+MAX_LISTED_ROLES = 20
+
+class Info(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    def cog_unload(self):
+        # Events are missed while the extension is unloaded.
+        guild_stats.clear()
+
+    async def cog_check(self, ctx):
+        if ctx.guild:
+            await ensure_chunked(ctx.guild)
+        return True
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        stats = tracked_stats(member.guild)
+        if stats:
+            stats.add(member)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        stats = tracked_stats(member.guild)
+        if stats:
+            stats.remove(member)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        stats = tracked_stats(after.guild)
+        if stats:
+            stats.update_roles(before, after)
+
+    @commands.Cog.listener()
+    async def on_presence_update(self, before, after):
+        stats = tracked_stats(after.guild)
+        if stats:
+            stats.update_status(before, after)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        stats = tracked_stats(role.guild)
+        if stats:
+            stats.roles.pop(role.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_unavailable(self, guild):
+        drop_guild_stats(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        drop_guild_stats(guild)
+
+    @commands.command(name="serverinfo", aliases=["si", "guildinfo"])
+    async def serverinfo(self, ctx):
+        guild = ctx.guild
+        stats = get_guild_stats(guild)
+        total = guild.member_count or len(guild.members)
+
+        embed = discord.Embed(title=guild.name, color=discord.Color.blue())
+        if guild.icon:
+            embed.set_thumbnail(url=guild.icon.url)
+
+        embed.add_field(name="Owner", value=f"<@{guild.owner_id}>", inline=True)
+        embed.add_field(name="Created", value=discord.utils.format_dt(guild.created_at, 'R'), inline=True)
+        embed.add_field(name="Boosts", value=f"{guild.premium_subscription_count} (level {guild.premium_tier})", inline=True)
+
+        members = f"{total} total\n{total - stats.bots} humans\n{stats.bots} bots"
+        if member_cache_policy() == 'active':
+            members += "\n(bot counts only cover recently active members)"
+        embed.add_field(name="Members", value=members, inline=True)
+
+        if self.bot.intents.presences:
+            statuses = "\n".join(f"{status}: {stats.statuses[status]}" for status in ('online', 'idle', 'dnd', 'offline'))
+            embed.add_field(name="Status", value=statuses, inline=True)
+
+        embed.add_field(name="Channels", value=f"{len(guild.text_channels)} text\n{len(guild.voice_channels)} voice\n{len(guild.categories)} categories", inline=True)
+
+        top_roles = heapq.nlargest(TOP_ROLES + 1, stats.roles.items(), key=lambda item: item[1])
+        top_roles = [(guild.get_role(role_id), count) for role_id, count in top_roles if role_id != guild.id]
+        top_roles = "\n".join(f"{role.mention}: {count}" for role, count in top_roles[:TOP_ROLES] if role is not None)
+        embed.add_field(name=f"Roles ({len(guild.roles)})", value=top_roles or "None", inline=False)
+
+        embed.set_footer(text=f"ID: {guild.id}")
+        await ctx.send(embed=embed)
+
+    @commands.command(name="userinfo", aliases=["ui", "whois"])
+    async def userinfo(self, ctx, member: discord.Member = None):
+        member = member or ctx.author
+        stats = get_guild_stats(ctx.guild)
+        rank = stats.join_rank(member)
+
+        embed = discord.Embed(title=str(member), color=member.color if member.color.value else discord.Color.blue())
+        embed.set_thumbnail(url=member.display_avatar.url)
+        embed.add_field(name="Created", value=discord.utils.format_dt(member.created_at, 'R'), inline=True)
+        if member.joined_at:
+            embed.add_field(name="Joined", value=discord.utils.format_dt(member.joined_at, 'R'), inline=True)
+        if rank:
+            embed.add_field(name="Join Position", value=f"#{rank} of {len(stats.joins)}", inline=True)
+
+        roles = [role.mention for role in reversed(member.roles) if not role.is_default()]
+        value = " ".join(roles[:MAX_LISTED_ROLES])
+        if len(roles) > MAX_LISTED_ROLES:
+            value += f" and {len(roles) - MAX_LISTED_ROLES} more"
+        embed.add_field(name=f"Roles ({len(roles)})", value=value or "None", inline=False)
+
+        embed.set_footer(text=f"ID: {member.id}")
+        await ctx.send(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(Info(bot))
@@ -0,0 +1,66 @@
+import discord
+from discord.ext import commands, tasks
+
+from grind.config import is_server_whitelisted
+from grind.levels import LEADERBOARD_PAGE_SIZE, XP_FLUSH_INTERVAL, add_message_xp, flush_xp, flush_xp_sync, get_leaderboard, level_for_xp, xp_for_next_level
+from grind.outbound import send_cosmetic
+
+class Levels(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.xp_flush_loop.start()
+
+    def cog_unload(self):
+        self.xp_flush_loop.cancel()
+        flush_xp_sync()
+
+    @tasks.loop(seconds=XP_FLUSH_INTERVAL)
+    async def xp_flush_loop(self):
+        await flush_xp()
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if message.author.bot or not message.guild:
+            return
+
+        if not await is_server_whitelisted(message.guild):
+            return
+
+        new_level = add_message_xp(message)
+        if new_level:
+            await send_cosmetic(message.channel, f'{message.author.mention} reached level {new_level}!')
+
+    @commands.command(name="rank", aliases=["level", "xp"])
+    async def rank(self, ctx, member: discord.Member = None):
+        member = member or ctx.author
+        leaderboard = get_leaderboard(ctx.guild.id)
+        position = leaderboard.rank(member.id)
+
+        if position is None:
+            await ctx.send(f'{member} has no XP yet.')
+            return
+
+        level, progress = level_for_xp(leaderboard.xp[member.id])
+        embed = discord.Embed(title=f"{member.display_name}'s Rank", color=discord.Color.blue())
+        embed.add_field(name="Rank", value=f"#{position}", inline=True)
+        embed.add_field(name="Level", value=str(level), inline=True)
+        embed.add_field(name="XP", value=f"{progress}/{xp_for_next_level(level)} (total {leaderboard.xp[member.id]})", inline=True)
+        await ctx.send(embed=embed)
+
+    @commands.command(name="leaderboard", aliases=["lb", "levels", "top"])
+    async def leaderboard(self, ctx, page: int = 1):
+        board = get_leaderboard(ctx.guild.id)
+        entries = board.page(max(page, 1))
+
+        if not entries:
+            await ctx.send('No one has XP on this page yet.')
+            return
+
+        pages = (len(board.ranking) + LEADERBOARD_PAGE_SIZE - 1) // LEADERBOARD_PAGE_SIZE
+        lines = [f"**#{position}** <@{user_id}> - level {level_for_xp(xp)[0]} ({xp} XP)" for position, user_id, xp in entries]
+        embed = discord.Embed(title=f"{ctx.guild.name} Leaderboard", description="\n".join(lines), color=discord.Color.blue())
+        embed.set_footer(text=f"Page {page}/{pages}")
+        await ctx.send(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(Levels(bot))
@@ -0,0 +1,425 @@
+import asyncio
+
+import discord
+from discord.ext import commands, tasks
+
+from grind import scheduler
+from grind.cases import CASE_COMPACT_INTERVAL, CASES_PER_PAGE, compact_case_indexes, format_case, get_case_index, log_action
+from grind.config import get_section, get_settings
+from grind.jobs import job_handler, job_progress, submit_job
+from grind.members import ensure_chunked, get_member, resolve_member
+from grind.outbound import send_cosmetic
+from grind.utils import check_role_hierarchy, parse_duration, requires_permission, restore_user_roles, save_user_roles
+
+UNBAN_WORKERS = 4
+
+def is_temporary_ban(index, user_id):
+    # The newest ban case for a user is almost always one of the last few, so
+    # this walks the user's case list backwards instead of scanning the log.
+    for case_number in reversed(index.by_user.get(user_id, [])):
+        record = index.get(case_number)
+        if record and record['action'] == 'ban':
+            return bool(record.get('duration')) and record['duration'] != 'infinite'
+    return False
+
+def schedule_expiry(name, guild, member, duration):
+    # Temporary punishments are timers in the shared scheduler, so they still
+    # expire after a restart or a reload of this extension.
+    duration_delta = parse_duration(duration)
+    if duration_delta:
+        scheduler.schedule(name, duration_delta.total_seconds(), {
+            'guild_id': guild.id,
+            'user_id': member.id,
+            'duration': duration
+        }, key=f"{name}:{guild.id}:{member.id}")
+
+def set_jailed(guild, user_id, jailed):
+    # Remembered separately from the role so a member who leaves while jailed
+    # is jailed again when they rejoin.
+    section = get_section(guild.id, 'jailed')
+    if jailed != (user_id in section.users):
+        if jailed:
+            section.users.add(user_id)
+        else:
+            section.users.discard(user_id)
+        section.save()
+
+async def unjail_member(guild, member):
+    set_jailed(guild, member.id, False)
+    settings = get_settings(guild.id)
+    jailed_role = guild.get_role(settings.jailed_role_id or 0)
+
+    if not jailed_role or jailed_role not in member.roles:
+        return False
+
+    await member.remove_roles(jailed_role)
+
+    previous_roles = restore_user_roles(member)
+    if previous_roles:
+        await member.add_roles(*previous_roles)
+    return True
+
+async def get_timer_member(bot, data):
+    guild = bot.get_guild(data['guild_id'])
+    if guild is None:
+        return None, None
+
+    return guild, await resolve_member(guild, data['user_id'])
+
+@scheduler.timer_handler('unban')
+async def unban_timer(bot, data):
+    guild = bot.get_guild(data['guild_id'])
+    if guild is None:
+        return
+
+    try:
+        user = await bot.fetch_user(data['user_id'])
+        await guild.unban(user)
+    except discord.NotFound:
+        return
+
+    await log_action(guild, "unban", user, bot.user, f"Temporary ban expired ({data['duration']})")
+
+@scheduler.timer_handler('unmute')
+async def unmute_timer(bot, data):
+    guild, member = await get_timer_member(bot, data)
+    if member is None:
+        return
+
+    muted_role = guild.get_role(get_settings(guild.id).muted_role_id or 0)
+    if muted_role in member.roles:
+        await member.remove_roles(muted_role)
+
+        await log_action(guild, "unmute", member, bot.user, f"Temporary mute expired ({data['duration']})")
+
+@scheduler.timer_handler('unjail')
+async def unjail_timer(bot, data):
+    guild, member = await get_timer_member(bot, data)
+    if member is None:
+        if guild is not None:
+            set_jailed(guild, data['user_id'], False)
+        return
+
+    if await unjail_member(guild, member):
+        await log_action(guild, "unjail", member, bot.user, f"Temporary jail expired ({data['duration']})", log_type="jail")
+
+@job_handler('unbanall')
+async def unbanall_job(job, guild):
+    params = job['params']
+    state = job['state']
+    state.setdefault('unbanned', 0)
+    index = await get_case_index(guild.id) if params.get('temp_only') else None
+    reason_filter = params.get('reason', '').lower()
+    queue = asyncio.Queue(maxsize=UNBAN_WORKERS * 2)
+    scanned = 0
+
+    async def worker():
+        while True:
+            user = await queue.get()
+            try:
+                for attempt in range(3):
+                    try:
+                        await guild.unban(user, reason=f"Mass unban (job #{job['id']})")
+                        state['unbanned'] += 1
+                        break
+                    except discord.NotFound:
+                        break
+                    except discord.HTTPException as e:
+                        if e.status != 429 or attempt == 2:
+                            state['failed'] = state.get('failed', 0) + 1
+                            break
+                        await asyncio.sleep(5 * (attempt + 1))
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(UNBAN_WORKERS)]
+    try:
+        async for entry in guild.bans(limit=None):
+            scanned += 1
+
+            if reason_filter and reason_filter not in (entry.reason or '').lower():
+                continue
+            if index and not is_temporary_ban(index, entry.user.id):
+                continue
+
+            await queue.put(entry.user)
+            await job_progress(job, state['unbanned'], scanned)
+
+        await queue.join()
+    finally:
+        for task in workers:
+            task.cancel()
+
+    await job_progress(job, state['unbanned'], scanned)
+    moderator = get_member(guild, job['author_id']) or guild.me
+    reason = job['description']
+    if state.get('failed'):
+        reason += f" ({state['failed']} failed)"
+    await log_action(guild, "unbanall", f"{state['unbanned']} users", moderator, reason)
+
+class Moderation(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.case_compact_loop.start()
+
+    def cog_unload(self):
+        self.case_compact_loop.cancel()
+
+    @tasks.loop(seconds=CASE_COMPACT_INTERVAL)
+    async def case_compact_loop(self):
+        await compact_case_indexes()
+
+    async def cog_check(self, ctx):
+        # Checks run before argument conversion, so with the lazy member cache
+        # the guild is chunked before a Member argument is looked up.
+        if ctx.guild:
+            await ensure_chunked(ctx.guild)
+        return True
+
+    @commands.command(name="ban", aliases=["banish", "begone"])
+    @requires_permission('ban_members')
+    async def ban(self, ctx, member: discord.Member, duration='infinite', *, reason='No reason provided'):
+        can_moderate, error_message = check_role_hierarchy(ctx, member)
+        if not can_moderate:
+            await ctx.send(error_message)
+            return
+
+        try:
+            await member.ban(reason=reason)
+            await send_cosmetic(ctx, f'{member} has been banned.')
+
+            await log_action(ctx.guild, "ban", member, ctx.author, reason, duration)
+
+            schedule_expiry('unban', ctx.guild, member, duration)
+        except discord.Forbidden:
+            await ctx.send("I don't have permission to ban members. Move the bot role up or check permissions.")
+
+    @commands.command(name="unban", aliases=["pardon"])
+    @requires_permission('ban_members')
+    async def unban(self, ctx, member_id: int):
+        try:
+            user = await self.bot.fetch_user(member_id)
+            await ctx.guild.unban(user)
+            await send_cosmetic(ctx, f'{user} has been unbanned')
+
+            scheduler.cancel(f"unban:{ctx.guild.id}:{user.id}")
+            await log_action(ctx.guild, "unban", user, ctx.author)
+        except discord.NotFound:
+            await ctx.send('User not found')
+        except discord.Forbidden:
+            await ctx.send('I do not have permission to unban this user. Move the bot role up or check permissions.')
+
+    @commands.command(name="unbanall", aliases=["massunban"])
+    @commands.has_permissions(administrator=True)
+    async def unbanall(self, ctx, *, ban_filter=None):
+        params = {}
+        description = 'Unban all users'
+
+        if ban_filter == 'temp':
+            params['temp_only'] = True
+            description = 'Unban all temporary bans'
+        elif ban_filter and ban_filter.startswith('reason:'):
+            params['reason'] = ban_filter[len('reason:'):].strip()
+            description = f"Unban all users banned for '{params['reason']}'"
+        elif ban_filter:
+            await ctx.send('Usage:\n!unbanall\n!unbanall temp\n!unbanall reason:<text>')
+            return
+
+        await submit_job(ctx, 'unbanall', description, params)
+
+    @commands.command(name="kick", aliases=["boot"])
+    @requires_permission('kick_members')
+    async def kick(self, ctx, member: discord.Member, *, reason='No reason provided'):
+        can_moderate, error_message = check_role_hierarchy(ctx, member)
+        if not can_moderate:
+            await ctx.send(error_message)
+            return
+
+        try:
+            await member.kick(reason=reason)
+            await send_cosmetic(ctx, f'{member} has been kicked.')
+
+            await log_action(ctx.guild, "kick", member, ctx.author, reason)
+        except discord.Forbidden:
+            await ctx.send("I don't have permission to kick members. Move the bot role up or check permissions.")
+
+    @commands.command(name="mute", aliases=["silence", "quiet"])
+    @requires_permission('manage_messages')
+    async def mute(self, ctx, member: discord.Member, duration='infinite', *, reason='No reason provided'):
+        can_moderate, error_message = check_role_hierarchy(ctx, member)
+        if not can_moderate:
+            await ctx.send(error_message)
+            return
+
+        settings = get_settings(ctx.guild.id)
+
+        if not settings.muted_role_id:
+            await ctx.send('Mute system not set up. Please run !setupmute first.')
+            return
+
+        muted_role = ctx.guild.get_role(settings.muted_role_id)
+
+        if not muted_role:
+            await ctx.send('Mute configuration is invalid. Please run !setupmute again.')
+            return
+
+        await member.add_roles(muted_role)
+
+        await send_cosmetic(ctx, f'{member} has been muted for {duration}. Reason: {reason}')
+
+        await log_action(ctx.guild, "mute", member, ctx.author, reason, duration)
+
+        schedule_expiry('unmute', ctx.guild, member, duration)
+
+    @commands.command(name="unmute", aliases=["unsilence"])
+    @requires_permission('manage_messages')
+    async def unmute(self, ctx, member: discord.Member):
+        settings = get_settings(ctx.guild.id)
+
+        if not settings.muted_role_id:
+            await ctx.send('Mute system not set up. Please run !setupmute first.')
+            return
+
+        muted_role = ctx.guild.get_role(settings.muted_role_id)
+
+        if not muted_role:
+            await ctx.send('Mute configuration is invalid. Please run !setupmute again.')
+            return
+
+        if muted_role in member.roles:
+            await member.remove_roles(muted_role)
+            await send_cosmetic(ctx, f'{member} has been unmuted.')
+
+            scheduler.cancel(f"unmute:{ctx.guild.id}:{member.id}")
+            await log_action(ctx.guild, "unmute", member, ctx.author)
+        else:
+            await ctx.send(f'{member} is not muted.')
+
+    @commands.command(name="jail", aliases=["imprison", "detain"])
+    @requires_permission('manage_messages')
+    async def jail(self, ctx, member: discord.Member, duration='infinite', *, reason='No reason provided'):
+        can_moderate, error_message = check_role_hierarchy(ctx, member)
+        if not can_moderate:
+            await ctx.send(error_message)
+            return
+
+        settings = get_settings(ctx.guild.id)
+
+        if not settings.jailed_role_id:
+            await ctx.send('Jail system not set up. Please run !setupjail first.')
+            return
+
+        jailed_role = ctx.guild.get_role(settings.jailed_role_id)
+        jail_channel = ctx.guild.get_channel(settings.jail_channel_id)
+
+        if not jailed_role or not jail_channel:
+            await ctx.send('Jail configuration is invalid. Please run !setupjail again.')
+            return
+
+        save_user_roles(member)
+        set_jailed(ctx.guild, member.id, True)
+
+        await member.edit(roles=[ctx.guild.default_role])
+        await member.add_roles(jailed_role)
+
+        embed = discord.Embed(
+            title="🔒 Jailed",
+            description=f"**Reason:** {reason}",
+            color=discord.Color.red()
+        )
+        embed.add_field(name="Jailed By", value=ctx.author.mention, inline=True)
+
+        if duration != 'infinite':
+            embed.add_field(name="Duration", value=duration, inline=True)
+
+        await send_cosmetic(jail_channel, f"{member.mention} has been jailed.", embed=embed)
+
+        await log_action(ctx.guild, "jail", member, ctx.author, reason, duration, "jail")
+
+        await send_cosmetic(ctx, f'{member} has been jailed for {duration}.')
+
+        schedule_expiry('unjail', ctx.guild, member, duration)
+
+    @commands.command(name="unjail", aliases=["free", "release"])
+    @requires_permission('manage_messages')
+    async def unjail(self, ctx, member: discord.Member):
+        settings = get_settings(ctx.guild.id)
+
+        if not settings.jailed_role_id:
+            await ctx.send('Jail system not set up. Please run !setupjail first.')
+            return
+
+        jailed_role = ctx.guild.get_role(settings.jailed_role_id)
+        jail_channel = ctx.guild.get_channel(settings.jail_channel_id)
+
+        if not jailed_role or not jail_channel:
+            await ctx.send('Jail configuration is invalid. Please run !setupjail again.')
+            return
+
+        if await unjail_member(ctx.guild, member):
+            scheduler.cancel(f"unjail:{ctx.guild.id}:{member.id}")
+            await log_action(ctx.guild, "unjail", member, ctx.author, log_type="jail")
+            await send_cosmetic(ctx, f'{member} has been unjailed.')
+        else:
+            await ctx.send(f'{member} is not jailed.')
+
+    @commands.command(name="history", aliases=["cases", "modlogs"])
+    @requires_permission('manage_messages')
+    async def history(self, ctx, user: discord.User, page: int = 1):
+        index = await get_case_index(ctx.guild.id)
+        case_numbers = index.by_user.get(user.id, [])
+        records = index.page(case_numbers, max(page, 1))
+
+        if not records:
+            await ctx.send(f'No cases found for {user} on this page.')
+            return
+
+        pages = (len(case_numbers) + CASES_PER_PAGE - 1) // CASES_PER_PAGE
+        embed = discord.Embed(
+            title=f"Case history for {user}",
+            description="\n".join(format_case(record) for record in records)[:4096],
+            color=discord.Color.blue()
+        )
+        embed.set_footer(text=f"Page {page}/{pages} • {len(case_numbers)} cases")
+        await ctx.send(embed=embed)
+
+    @commands.command(name="modstats", aliases=["moderatorstats"])
+    @requires_permission('manage_messages')
+    async def modstats(self, ctx, moderator: discord.User, page: int = 1):
+        index = await get_case_index(ctx.guild.id)
+        case_numbers = index.by_moderator.get(moderator.id, [])
+        counts = index.moderator_counts.get(moderator.id, {})
+
+        if not case_numbers:
+            await ctx.send(f'{moderator} has no moderation cases.')
+            return
+
+        pages = (len(case_numbers) + CASES_PER_PAGE - 1) // CASES_PER_PAGE
+        embed = discord.Embed(
+            title=f"Moderation stats for {moderator}",
+            color=discord.Color.blue()
+        )
+        embed.add_field(name="Totals", value="\n".join(f"`{action}`: {count}" for action, count in sorted(counts.items())), inline=False)
+
+        records = index.page(case_numbers, max(page, 1))
+        if records:
+            embed.add_field(name="Recent Cases", value="\n".join(format_case(record) for record in records)[:1024], inline=False)
+
+        embed.set_footer(text=f"Page {page}/{pages} • {len(case_numbers)} cases")
+        await ctx.send(embed=embed)
+
+    @commands.command(name="case")
+    @requires_permission('manage_messages')
+    async def case(self, ctx, case_number: int):
+        index = await get_case_index(ctx.guild.id)
+        record = index.get(case_number)
+
+        if record:
+            await ctx.send(embed=discord.Embed(description=format_case(record), color=discord.Color.blue()))
+        elif 0 < case_number <= index.archived_through:
+            await ctx.send(f'Case #{case_number} has been archived.')
+        else:
+            await ctx.send(f'Case #{case_number} not found.')
+
+async def setup(bot):
+    await bot.add_cog(Moderation(bot))
@@ -0,0 +1,85 @@
+import asyncio
+
+import discord
+from discord.ext import commands
+
+from grind.config import get_section, is_server_whitelisted
+from grind.members import ensure_chunked
+from grind.nicknames import clear_nickname_watch, enforce_nickname, reconcile_all_nicknames
+from grind.outbound import request_priority
+from grind.utils import check_role_hierarchy
+
+MAX_NICKNAME_LENGTH = 32
+
+class Nicknames(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def cog_check(self, ctx):
+        if ctx.guild:
+            await ensure_chunked(ctx.guild)
+        return True
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Renames that happened while the bot was offline never reach
+        # on_member_update, so every reconnect checks the forced members once.
+        asyncio.ensure_future(reconcile_all_nicknames(self.bot))
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        if before.nick != after.nick and await is_server_whitelisted(after.guild):
+            enforce_nickname(after)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        if await is_server_whitelisted(member.guild):
+            enforce_nickname(member)
+
+    @commands.command(name="forcenickname", aliases=["forcenick", "fn"])
+    @commands.has_permissions(manage_nicknames=True)
+    async def forcenickname(self, ctx, member: discord.Member = None, *, nickname=None):
+        section = get_section(ctx.guild.id, 'forced_nicknames')
+
+        if member is None:
+            if not section.users:
+                await ctx.send('No nicknames are forced in this server.')
+                return
+
+            lines = [f"<@{user_id}> → **{discord.utils.escape_markdown(nickname)}**" for user_id, nickname in section.users.items()]
+            await ctx.send(embed=discord.Embed(title="Forced Nicknames", description="\n".join(lines)[:4096], color=discord.Color.blue()))
+            return
+
+        can_moderate, error_message = check_role_hierarchy(ctx, member)
+        if not can_moderate:
+            await ctx.send(error_message)
+            return
+
+        if nickname is None or nickname.lower() == 'off':
+            if section.users.pop(member.id, None) is None:
+                await ctx.send(f'{member} does not have a forced nickname.')
+                return
+
+            section.save()
+            clear_nickname_watch(ctx.guild.id, member.id)
+            await ctx.send(f'Removed the forced nickname from {member}.')
+            return
+
+        if len(nickname) > MAX_NICKNAME_LENGTH:
+            await ctx.send(f'Nicknames can be at most {MAX_NICKNAME_LENGTH} characters.')
+            return
+
+        try:
+            with request_priority('normal'):
+                await member.edit(nick=nickname, reason=f"Forced nickname set by {ctx.author}")
+        except discord.HTTPException as e:
+            await ctx.send(f'Could not change the nickname: {e}')
+            return
+
+        section.users[member.id] = nickname
+        section.save()
+        clear_nickname_watch(ctx.guild.id, member.id)
+        await ctx.send(f'{member} is now forced to **{discord.utils.escape_markdown(nickname)}**.', allowed_mentions=discord.AllowedMentions.none())
+
+async def setup(bot):
+    await bot.add_cog(Nicknames(bot))
@@ -0,0 +1,218 @@
+import asyncio
+
+import discord
+from discord.ext import commands
+
+from grind import diagnostics
+from grind.backup import create_backup, load_manifest, restore_backup
+from grind.config import load_bot_config, save_bot_config
+from grind.members import MEMBER_CACHE_POLICIES, member_cache_policy, record_member_cache_report
+from grind.outbound import REQUEST_CLASSES, scheduler
+from grind.utils import format_size, is_owner
+
+class Owner(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.command(name="whitelist")
+    @is_owner()
+    async def whitelist(self, ctx, action=None, server_id=None):
+        bot_config = load_bot_config()
+
+        if 'whitelisted_servers' not in bot_config:
+            bot_config['whitelisted_servers'] = []
+
+        if action == 'add':
+            if not server_id:
+                await ctx.send('Please provide a server ID to whitelist.')
+                return
+
+            if server_id not in bot_config['whitelisted_servers']:
+                bot_config['whitelisted_servers'].append(server_id)
+                save_bot_config(bot_config)
+                await ctx.send(f'Server {server_id} has been whitelisted.')
+            else:
+                await ctx.send(f'Server {server_id} is already whitelisted.')
+
+        elif action == 'remove':
+            if not server_id:
+                await ctx.send('Please provide a server ID to remove from whitelist.')
+                return
+
+            if server_id in bot_config['whitelisted_servers']:
+                bot_config['whitelisted_servers'].remove(server_id)
+                save_bot_config(bot_config)
+                await ctx.send(f'Server {server_id} has been removed from the whitelist.')
+            else:
+                await ctx.send(f'Server {server_id} is not whitelisted.')
+
+        elif action == 'list':
+            if not bot_config['whitelisted_servers']:
+                await ctx.send('No servers are whitelisted.')
+                return
+
+            await ctx.send("Whitelisted Servers:\n" + "\n".join(bot_config['whitelisted_servers']))
+
+        elif action == 'clear':
+            bot_config['whitelisted_servers'] = []
+            save_bot_config(bot_config)
+            await ctx.send('Server whitelist has been cleared.')
+
+        else:
+            await ctx.send('Usage:\n!whitelist add <server_id>\n!whitelist remove <server_id>\n!whitelist list\n!whitelist clear')
+
+    @commands.command(name="diagnostics", aliases=["diag"])
+    @is_owner()
+    async def diagnostics_command(self, ctx, action='stats'):
+        loop_monitor = diagnostics.loop_monitor
+        if loop_monitor is None:
+            await ctx.send('Diagnostics are disabled. Start the bot with GRIND_DIAGNOSTICS=1 to enable them.')
+            return
+
+        if action == 'stats':
+            lag = sorted(loop_monitor.lag)
+            embed = discord.Embed(title="Diagnostics", color=discord.Color.blue())
+
+            if lag:
+                embed.add_field(
+                    name="Event Loop Lag",
+                    value=f"p50 {lag[len(lag) // 2] * 1000:.1f}ms • p99 {lag[int(len(lag) * 0.99)] * 1000:.1f}ms • max {lag[-1] * 1000:.1f}ms",
+                    inline=False
+                )
+
+            slowest = sorted(loop_monitor.timings.items(), key=lambda item: item[1][1], reverse=True)[:10]
+            if slowest:
+                lines = [f"`{name}` {count}x avg {total / count * 1000:.1f}ms max {peak * 1000:.1f}ms" for name, (count, total, peak) in slowest]
+                embed.add_field(name="Handlers by Total Time", value="\n".join(lines)[:1024], inline=False)
+
+            for entry in list(loop_monitor.blocked)[-2:]:
+                duration = f"{entry['duration'] * 1000:.0f}ms" if entry['duration'] else "ongoing"
+                embed.add_field(name=f"Blocked <t:{int(entry['at'])}:R> ({duration})", value=f"```{entry['stack'][-1000:]}```", inline=False)
+
+            await ctx.send(embed=embed)
+
+        elif action == 'dump':
+            samples = await asyncio.get_running_loop().run_in_executor(None, loop_monitor.dump_profile)
+            await ctx.send(f'Wrote {samples} samples to `{diagnostics.PROFILE_PATH}`.')
+
+        elif action == 'reset':
+            loop_monitor.lag.clear()
+            loop_monitor.blocked.clear()
+            loop_monitor.stacks.clear()
+            loop_monitor.timings.clear()
+            await ctx.send('Diagnostics have been reset.')
+
+        else:
+            await ctx.send('Usage:\n!diagnostics stats\n!diagnostics dump\n!diagnostics reset')
+
+    @commands.command(name="membercache", aliases=["mc"])
+    @is_owner()
+    async def member_cache_command(self, ctx, action='report', policy=None):
+        if action == 'report':
+            report = record_member_cache_report(self.bot)
+            embed = discord.Embed(
+                title="Member Cache",
+                description=f"Running with `{member_cache_policy()}`",
+                color=discord.Color.blue()
+            )
+
+            for name in MEMBER_CACHE_POLICIES:
+                entry = report.get(name)
+                if not entry:
+                    continue
+                startup = f"{entry['startup_seconds']}s" if 'startup_seconds' in entry else "unknown"
+                rss = format_size(entry['rss']) if entry.get('rss') else "unknown"
+                peak = format_size(entry['peak_rss']) if entry.get('peak_rss') else "unknown"
+                embed.add_field(
+                    name=name,
+                    value=f"Startup: {startup}\nRSS: {rss} (peak {peak})\nCached: {entry['cached_members']}/{entry['total_members']} members\nGuilds: {entry['guilds']} • <t:{entry['recorded_at']}:R>",
+                    inline=True
+                )
+
+            await ctx.send(embed=embed)
+
+        elif action == 'set':
+            if policy not in MEMBER_CACHE_POLICIES:
+                await ctx.send(f'Invalid policy. Valid policies are: {", ".join(MEMBER_CACHE_POLICIES)}')
+                return
+
+            bot_config = load_bot_config()
+            bot_config['member_cache'] = policy
+            save_bot_config(bot_config)
+            await ctx.send(f'Member cache policy set to `{policy}`. Restart the bot to apply it.')
+
+        else:
+            await ctx.send('Usage:\n!membercache report\n!membercache set <full|lazy|active>')
+
+    @commands.command(name="requeststats", aliases=["rs"])
+    @is_owner()
+    async def request_stats(self, ctx, action='stats'):
+        if action == 'reset':
+            for name in REQUEST_CLASSES:
+                stats = scheduler.stats[name]
+                stats.requests = stats.dropped = stats.stalled = stats.max_depth = 0
+                stats.total_wait = stats.max_wait = 0.0
+            await ctx.send('Request stats have been reset.')
+            return
+
+        embed = discord.Embed(title="Outbound Requests", color=discord.Color.blue())
+        for name in REQUEST_CLASSES:
+            stats = scheduler.stats[name]
+            average = stats.total_wait / stats.requests * 1000 if stats.requests else 0
+            embed.add_field(
+                name=name.capitalize(),
+                value=f"Requests: {stats.requests}\nIn flight: {scheduler.in_flight[name]}\nQueued: {scheduler.depth(name)} (max {stats.max_depth})\nWait: avg {average:.1f}ms, max {stats.max_wait * 1000:.1f}ms\nDropped: {stats.dropped}\nStalled: {stats.stalled}",
+                inline=True
+            )
+        await ctx.send(embed=embed)
+
+    @commands.command(name="backup")
+    @is_owner()
+    async def backup_command(self, ctx, action='create', target=None):
+        if action in ('create', 'full'):
+            name, changed = await create_backup(full=action == 'full')
+            if name:
+                await ctx.send(f'Backup `{name}` written ({changed} changed files).')
+            else:
+                await ctx.send('Nothing changed since the last backup.')
+
+        elif action == 'list':
+            manifest = load_manifest()
+            if not manifest['snapshots']:
+                await ctx.send('No backups yet.')
+                return
+            await ctx.send(f"{len(manifest['files'])} files in {len(manifest['snapshots'])} archives:\n" + "\n".join(f'`{name}`' for name in manifest['snapshots'][-10:]))
+
+        elif action == 'restore':
+            if target != 'all' and not (target and target.isdigit()):
+                await ctx.send('Usage: !backup restore <guild_id|all>')
+                return
+            restored = await restore_backup(None if target == 'all' else int(target))
+            await ctx.send(f'Restored {restored} files.')
+
+        else:
+            await ctx.send('Usage:\n!backup create\n!backup full\n!backup list\n!backup restore <guild_id|all>')
+
+    @commands.command(name="reload", aliases=["rl"])
+    @is_owner()
+    async def reload_command(self, ctx, extension=None):
+        # State lives in the grind package, which is not reloaded, so cases,
+        # jobs, timers, snipes and XP survive while the command code is swapped.
+        if extension:
+            names = [extension if extension.startswith('cogs.') else f'cogs.{extension}']
+        else:
+            names = list(self.bot.extensions)
+
+        reloaded = []
+        for name in names:
+            try:
+                await self.bot.reload_extension(name)
+                reloaded.append(name)
+            except commands.ExtensionError as e:
+                await ctx.send(f'Failed to reload `{name}`: {e}')
+
+        if reloaded:
+            await ctx.send(f"Reloaded {', '.join(f'`{name}`' for name in reloaded)}")
+
+async def setup(bot):
+    await bot.add_cog(Owner(bot))
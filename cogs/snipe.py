@@ -0,0 +1,60 @@
+import datetime
+
+import discord
+from discord.ext import commands
+
+from grind.snipe import SnipedMessage, deleted_snipes, edited_snipes
+from grind.utils import format_size
+
+async def send_snipe(ctx, buffer, index, title):
+    entry, total = buffer.get(ctx.channel.id, index)
+
+    if not entry:
+        await ctx.send('There is nothing to snipe.' if not total else f'Only {total} messages can be sniped in this channel.')
+        return
+
+    embed = discord.Embed(
+        title=title,
+        description=entry.content or None,
+        color=discord.Color.blue(),
+        timestamp=datetime.datetime.fromtimestamp(entry.timestamp, datetime.timezone.utc)
+    )
+    embed.set_author(name=entry.author_name, icon_url=entry.author_avatar)
+
+    if entry.attachments:
+        files = [f"{filename} ({format_size(size)})" for filename, size, content_type in entry.attachments]
+        embed.add_field(name="Attachments", value="\n".join(files)[:1024], inline=False)
+
+    embed.set_footer(text=f"{index}/{total}")
+    await ctx.send(embed=embed)
+
+class Snipe(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.Cog.listener()
+    async def on_message_delete(self, message):
+        if not message.guild or message.author.bot:
+            return
+        if not message.content and not message.attachments:
+            return
+
+        deleted_snipes.push(message.channel.id, SnipedMessage(message))
+
+    @commands.Cog.listener()
+    async def on_message_edit(self, before, after):
+        if not before.guild or before.author.bot or before.content == after.content:
+            return
+
+        edited_snipes.push(before.channel.id, SnipedMessage(before))
+
+    @commands.command(name="snipe", aliases=["s"])
+    async def snipe(self, ctx, index: int = 1):
+        await send_snipe(ctx, deleted_snipes, index, "Deleted Message")
+
+    @commands.command(name="editsnipe", aliases=["es"])
+    async def editsnipe(self, ctx, index: int = 1):
+        await send_snipe(ctx, edited_snipes, index, "Edited Message")
+
+async def setup(bot):
+    await bot.add_cog(Snipe(bot))
@@ -0,0 +1,281 @@
+import discord
+from discord.ext import commands
+
+from grind.config import get_section, get_settings
+from grind.jobs import job_handler, job_progress, submit_job
+
+async def setup_voicemaster(ctx):
+    if get_section(ctx.guild.id, 'voice_master').enabled:
+        await ctx.send('VoiceMaster is already set up for this server.')
+        return
+
+    await submit_job(ctx, 'setup_voicemaster', 'VoiceMaster setup')
+
+@job_handler('setup_voicemaster')
+async def setup_voicemaster_job(job, guild):
+    # Channels created by an interrupted run are reused instead of duplicated.
+    state = job['state']
+    category = guild.get_channel(state.get('category_id', 0))
+    if not category:
+        category = await guild.create_category('Temporary Voice Channels')
+        state['category_id'] = category.id
+    await job_progress(job, 1, 2)
+
+    join_channel = guild.get_channel(state.get('join_channel_id', 0))
+    if not join_channel:
+        join_channel = await guild.create_voice_channel('➕ Create Voice Channel', category=category)
+        state['join_channel_id'] = join_channel.id
+    await job_progress(job, 2, 2)
+
+    voice_master = get_section(guild.id, 'voice_master')
+    voice_master.enabled = True
+    voice_master.join_channel_id = join_channel.id
+    voice_master.category_id = category.id
+    voice_master.user_channels = {}
+    voice_master.save()
+
+def is_user_channel(ctx, channel):
+    voice_master = get_section(ctx.guild.id, 'voice_master')
+
+    if not voice_master.enabled:
+        return False
+
+    return voice_master.user_channels.get(channel.id) == ctx.author.id
+
+async def create_voice_channel(ctx):
+    voice_master = get_section(ctx.guild.id, 'voice_master')
+
+    if not voice_master.enabled:
+        await ctx.send('VoiceMaster not set up. Please ask an administrator to run `!vm setup`.')
+        return
+
+    category = ctx.guild.get_channel(voice_master.category_id)
+
+    if not category:
+        await ctx.send('VoiceMaster category not found. Please ask an administrator to run `!vm setup` again.')
+        return
+
+    try:
+        channel_name = f"{ctx.author.display_name}'s Channel"
+        new_channel = await ctx.guild.create_voice_channel(name=channel_name, category=category)
+
+        await ctx.author.move_to(new_channel)
+
+        voice_master.user_channels[new_channel.id] = ctx.author.id
+        voice_master.save()
+
+    except discord.Forbidden:
+        await ctx.send('I do not have permission to create channels or move members.')
+    except Exception as e:
+        await ctx.send(f'An error occurred: {str(e)}')
+
+async def get_dummy_message(member):
+
+    channel = None
+    for c in member.guild.channels:
+        if isinstance(c, discord.TextChannel):
+            channel = c
+            break
+
+    if not channel:
+        return None
+
+    class DummyMessage:
+        def __init__(self):
+            self.content = "!vm"
+            self.author = member
+            self.guild = member.guild
+            self.channel = channel
+            self._state = member._state
+            self.id = 0
+            self.attachments = []
+            self.embeds = []
+            self.mentions = []
+            self.role_mentions = []
+            self.channel_mentions = []
+
+    return DummyMessage()
+
+class VoiceMaster(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.command(name="vm", aliases=["voicemaster", "voice"])
+    async def voicemaster(self, ctx, action=None, *, value=None):
+        if action == "setup" and ctx.author.guild_permissions.administrator:
+            await setup_voicemaster(ctx)
+            return
+
+        voice_master = get_section(ctx.guild.id, 'voice_master')
+
+        if not voice_master.enabled:
+            await ctx.send('VoiceMaster not set up. Please ask an administrator to run `!vm setup`.')
+            return
+
+        if not ctx.author.voice or not ctx.author.voice.channel:
+            await ctx.send('You need to be in a voice channel to use VoiceMaster commands.')
+            return
+
+        user_channel = ctx.author.voice.channel
+
+        if not is_user_channel(ctx, user_channel):
+            if not action:
+                await create_voice_channel(ctx)
+                return
+            await ctx.send('You need to be in your temporary voice channel to modify it.')
+            return
+
+        if not action:
+            await ctx.send('You already have a temporary voice channel. Use `!vm help` to see available commands.')
+            return
+
+        if action == "name":
+            if not value:
+                await ctx.send('Please provide a new name for your channel. Usage: !vm name <new_name>')
+                return
+
+            await user_channel.edit(name=value)
+            await ctx.send(f'Channel renamed to: {value}')
+
+        elif action == "limit":
+            try:
+                limit = int(value) if value else 0
+                if limit < 0:
+                    limit = 0
+
+                await user_channel.edit(user_limit=limit)
+                limit_msg = "removed" if limit == 0 else f"set to {limit} users"
+                await ctx.send(f'User limit {limit_msg}.')
+            except ValueError:
+                await ctx.send('Please provide a valid number for the user limit.')
+
+        elif action == "lock":
+            overwrites = user_channel.overwrites.copy()
+            overwrites[ctx.guild.default_role] = discord.PermissionOverwrite(connect=False)
+            await user_channel.edit(overwrites=overwrites)
+            await ctx.send('Your channel has been locked.')
+
+        elif action == "unlock":
+            overwrites = user_channel.overwrites.copy()
+            overwrites[ctx.guild.default_role] = discord.PermissionOverwrite(connect=True)
+            await user_channel.edit(overwrites=overwrites)
+            await ctx.send('Your channel has been unlocked. Anyone can join now.')
+
+        elif action == "allow":
+            if not value:
+                await ctx.send('Please mention a user or provide a user ID. Usage: !vm allow @user')
+                return
+
+            try:
+                if ctx.message.mentions:
+                    target_user = ctx.message.mentions[0]
+                else:
+                    target_id = int(value.strip())
+                    target_user = await self.bot.fetch_user(target_id)
+                    if not target_user:
+                        await ctx.send(f'Could not find user with ID: {value}')
+                        return
+
+                overwrites = user_channel.overwrites.copy()
+                overwrites[target_user] = discord.PermissionOverwrite(connect=True, view_channel=True)
+                await user_channel.edit(overwrites=overwrites)
+
+                await ctx.send(f'{target_user.mention} can now join your channel.')
+            except ValueError:
+                await ctx.send('Please provide a valid user ID or mention.')
+            except Exception as e:
+                await ctx.send(f'Error: {str(e)}')
+
+        elif action == "deny":
+            if not value:
+                await ctx.send('Please mention a user or provide a user ID. Usage: !vm deny @user')
+                return
+
+            try:
+                if ctx.message.mentions:
+                    target_user = ctx.message.mentions[0]
+                else:
+                    target_id = int(value.strip())
+                    target_user = await self.bot.fetch_user(target_id)
+                    if not target_user:
+                        await ctx.send(f'Could not find user with ID: {value}')
+                        return
+
+                member = ctx.guild.get_member(target_user.id)
+                if member and member.voice and member.voice.channel and member.voice.channel.id == user_channel.id:
+                    try:
+                        if ctx.guild.afk_channel:
+                            await member.move_to(ctx.guild.afk_channel)
+                        else:
+                            await member.move_to(None)
+                    except:
+                        pass
+
+                overwrites = user_channel.overwrites.copy()
+                overwrites[target_user] = discord.PermissionOverwrite(connect=False, view_channel=True)
+                await user_channel.edit(overwrites=overwrites)
+
+                await ctx.send(f'{target_user.mention} has been denied access to your channel.')
+            except ValueError:
+                await ctx.send('Please provide a valid user ID or mention.')
+            except Exception as e:
+                await ctx.send(f'Error: {str(e)}')
+
+                overwrites = user_channel.overwrites.copy()
+                overwrites[target_user] = discord.PermissionOverwrite(connect=False, view_channel=True)
+                await user_channel.edit(overwrites=overwrites)
+
+                await ctx.send(f'{target_user.mention} has been denied access to your channel.')
+            except ValueError:
+                await ctx.send('Please provide a valid user ID or mention.')
+            except Exception as e:
+                await ctx.send(f'Error: {str(e)}')
+
+        elif action == "help":
+            prefix = get_settings(ctx.guild.id).prefix
+            embed = discord.Embed(
+                title="VoiceMaster Commands",
+                description=f"Use these commands to manage your temporary voice channel.",
+                color=discord.Color.blue()
+            )
+            commands = [
+                    f"`{prefix}vm` - Create a new voice channel",
+                    f"`{prefix}vm name <name>` - Rename your channel",
+                    f"`{prefix}vm limit <number>` - Set user limit (0 for no limit)",
+                    f"`{prefix}vm lock` - Lock your channel to prevent new users from joining",
+                    f"`{prefix}vm unlock` - Unlock your channel to allow anyone to join",
+                    f"`{prefix}vm allow <@user/ID>` - Allow a specific user to join your channel",
+                    f"`{prefix}vm deny <@user/ID>` - Prevent a specific user from joining your channel"
+            ]
+            embed.add_field(name="Available Commands", value="\n".join(commands), inline=False)
+            await ctx.send(embed=embed)
+
+        else:
+            await ctx.send(f'Unknown action. Use `!vm help` to see available commands.')
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        if member.bot:
+            return
+
+        voice_master = get_section(member.guild.id, 'voice_master')
+        if not voice_master.enabled:
+            return
+
+        if after.channel:
+            if voice_master.join_channel_id and after.channel.id == voice_master.join_channel_id:
+                ctx = await self.bot.get_context(await get_dummy_message(member))
+                await create_voice_channel(ctx)
+
+        if before.channel:
+            if before.channel.id in voice_master.user_channels:
+                if len(before.channel.members) == 0:
+                    try:
+                        await before.channel.delete()
+                        del voice_master.user_channels[before.channel.id]
+                        voice_master.save()
+                    except:
+                        pass
+
+async def setup(bot):
+    await bot.add_cog(VoiceMaster(bot))
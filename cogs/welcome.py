@@ -0,0 +1,88 @@
+import discord
+from discord.ext import commands
+
+from grind.config import get_section, is_server_whitelisted
+from grind.joins import enqueue_join, format_welcome
+
+class Welcome(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        if member.bot or not await is_server_whitelisted(member.guild):
+            return
+
+        enqueue_join(member)
+
+    @commands.command(name="autorole", aliases=["joinrole"])
+    @commands.has_permissions(manage_roles=True)
+    async def autorole(self, ctx, action=None, *, role: discord.Role = None):
+        welcome = get_section(ctx.guild.id, 'welcome')
+
+        if action in ('add', 'remove'):
+            if role is None:
+                await ctx.send(f'Usage: !autorole {action} <role>')
+                return
+
+            if action == 'add':
+                if role >= ctx.guild.me.top_role or role.managed:
+                    await ctx.send("I can't give out that role. Move the bot role above it.")
+                    return
+                if role.id in welcome.autorole_ids:
+                    await ctx.send(f'{role.name} is already an autorole.')
+                    return
+                welcome.autorole_ids.append(role.id)
+            else:
+                if role.id not in welcome.autorole_ids:
+                    await ctx.send(f'{role.name} is not an autorole.')
+                    return
+                welcome.autorole_ids.remove(role.id)
+
+            welcome.save()
+            await ctx.send(f"{role.name} has been {'added to' if action == 'add' else 'removed from'} the autoroles.")
+
+        elif action == 'list':
+            roles = [ctx.guild.get_role(role_id) for role_id in welcome.autorole_ids]
+            roles = [role.mention for role in roles if role is not None]
+            await ctx.send("Autoroles: " + ", ".join(roles) if roles else 'No autoroles are set.')
+
+        else:
+            await ctx.send('Usage:\n!autorole add <role>\n!autorole remove <role>\n!autorole list')
+
+    @commands.command(name="welcome", aliases=["greet"])
+    @commands.has_permissions(manage_guild=True)
+    async def welcome(self, ctx, action=None, *, value=None):
+        welcome = get_section(ctx.guild.id, 'welcome')
+
+        if action == 'channel':
+            channel = ctx.message.channel_mentions[0] if ctx.message.channel_mentions else ctx.channel
+            welcome.channel_id = channel.id
+            welcome.save()
+            await ctx.send(f'Welcome messages will be sent in {channel.mention}.')
+
+        elif action == 'message':
+            if not value:
+                await ctx.send('Usage: !welcome message <text> ({user}, {server} and {count} are replaced)')
+                return
+
+            welcome.message = value
+            welcome.save()
+            await ctx.send('Welcome message updated.')
+
+        elif action == 'off':
+            welcome.channel_id = None
+            welcome.save()
+            await ctx.send('Welcome messages have been turned off.')
+
+        elif action == 'test':
+            await ctx.send(format_welcome(welcome.message, ctx.guild, [ctx.author]),
+                           allowed_mentions=discord.AllowedMentions(everyone=False, roles=False, users=True))
+
+        else:
+            channel = f'<#{welcome.channel_id}>' if welcome.channel_id else 'off'
+            await ctx.send(f'Welcome channel: {channel}\nMessage: {welcome.message}\n\n'
+                           'Usage:\n!welcome channel [#channel]\n!welcome message <text>\n!welcome off\n!welcome test')
+
+async def setup(bot):
+    await bot.add_cog(Welcome(bot))
@@ -0,0 +1,54 @@
+import collections
+import time
+
+from grind.config import get_section
+
+# AFK
+# The afk section is loaded once per guild and stays cached, so its users dict
+# is the in-memory set and the JSON file is only written when someone goes AFK
+# or comes back. on_message looks up the author and message.mentions in it and
+# never walks the AFK users. Notices for everyone mentioned in one message go
+# out as a single reply, and each AFK user is announced at most once per
+# AFK_NOTICE_COOLDOWN seconds in a channel. Cooldowns all have the same length,
+# so notice_order (the order they were started in) is also the order they
+# expire in and expired ones are popped off its front.
+AFK_NOTICE_COOLDOWN = 30
+MAX_AFK_REASON = 200
+
+notice_cooldowns = {}
+notice_order = collections.deque()
+
+def set_afk(member, reason):
+    section = get_section(member.guild.id, 'afk')
+    section.users[member.id] = {'reason': reason[:MAX_AFK_REASON], 'since': int(time.time())}
+    section.save()
+
+def clear_afk(member):
+    section = get_section(member.guild.id, 'afk')
+    entry = section.users.pop(member.id, None)
+    if entry is not None:
+        section.save()
+    return entry
+
+def afk_notices(message):
+    users = get_section(message.guild.id, 'afk').users
+    if not users:
+        return []
+
+    now = time.monotonic()
+    while notice_order and notice_cooldowns[notice_order[0]] <= now:
+        del notice_cooldowns[notice_order.popleft()]
+
+    notices = []
+    for member in message.mentions:
+        entry = users.get(member.id)
+        if entry is None or member.id == message.author.id:
+            continue
+
+        key = (message.channel.id, member.id)
+        if key in notice_cooldowns:
+            continue
+        notice_cooldowns[key] = now + AFK_NOTICE_COOLDOWN
+        notice_order.append(key)
+        notices.append((member, entry))
+    return notices
@@ -0,0 +1,104 @@
+import collections
+import time
+
+import discord
+
+from grind.config import get_section
+from grind.utils import restore_user_roles, save_user_roles
+
+# ANTINUKE
+# Destructive audit log entries are counted per (guild, actor) with a two
+# bucket sliding window: the count for the current window plus the previous
+# window's count, weighted by how much of it still overlaps. That is three
+# numbers per actor no matter how many actions they take, and it only needs
+# the gateway event, so detecting a nuke never waits on a REST call.
+WATCHED_ACTIONS = {
+    discord.AuditLogAction.channel_delete: 'channel delete',
+    discord.AuditLogAction.role_delete: 'role delete',
+    discord.AuditLogAction.ban: 'ban',
+    discord.AuditLogAction.kick: 'kick',
+    discord.AuditLogAction.webhook_create: 'webhook create',
+}
+ACTION_WINDOW_LIMIT = 10000
+
+class ActionWindow:
+    __slots__ = ('start', 'current', 'previous')
+
+    def __init__(self, start):
+        self.start = start
+        self.current = 0
+        self.previous = 0
+
+    def add(self, now, window):
+        periods = int((now - self.start) // window)
+        if periods:
+            self.previous = self.current if periods == 1 else 0
+            self.current = 0
+            self.start += periods * window
+
+        self.current += 1
+        overlap = 1 - (now - self.start) / window
+        return self.previous * overlap + self.current
+
+    def reset(self):
+        self.current = 0
+        self.previous = 0
+
+action_windows = collections.OrderedDict()
+
+def record_action(entry):
+    # Returns True when this entry pushes its actor over the guild's limit.
+    if entry.action not in WATCHED_ACTIONS or entry.user_id is None:
+        return False
+
+    guild = entry.guild
+    settings = get_section(guild.id, 'antinuke')
+    if not settings.enabled or entry.user_id in (guild.owner_id, guild.me.id) or entry.user_id in settings.trusted:
+        return False
+
+    now = time.monotonic()
+    key = (guild.id, entry.user_id)
+    window = action_windows.get(key)
+    if window is None:
+        window = action_windows[key] = ActionWindow(now)
+        if len(action_windows) > ACTION_WINDOW_LIMIT:
+            action_windows.popitem(last=False)
+    else:
+        action_windows.move_to_end(key)
+
+    if window.add(now, settings.window) < settings.limit:
+        return False
+
+    # Entries that were already in flight shouldn't trigger a second strip
+    # straight away.
+    window.reset()
+    return True
+
+def strippable_roles(member):
+    top_role = member.guild.me.top_role
+    return [role for role in member.roles if not role.is_default() and not role.managed and role < top_role]
+
+async def strip_member(member, reason):
+    removed = strippable_roles(member)
+    if not removed:
+        return []
+
+    # One PATCH with the roles the bot can't take away, instead of a
+    # remove_roles call per role. The snapshot is kept apart from the jail's,
+    # so stripping a jailed member doesn't lose the roles unjail gives back.
+    save_user_roles(member, 'stripped_roles')
+    kept = [role for role in member.roles if not role.is_default() and role not in removed]
+    await member.edit(roles=kept, reason=reason)
+    return removed
+
+async def unstrip_member(member, reason):
+    previous_roles = restore_user_roles(member, 'stripped_roles')
+    if not previous_roles:
+        return []
+
+    top_role = member.guild.me.top_role
+    restored = [role for role in previous_roles if role not in member.roles and not role.managed and role < top_role]
+    if restored:
+        kept = [role for role in member.roles if not role.is_default()]
+        await member.edit(roles=kept + restored, reason=reason)
+    return restored
@@ -0,0 +1,296 @@
+import array
+import re
+import time
+
+from grind.config import get_section
+from grind.logs import logger, log_fields
+
+# AUTORESPONDER
+# A guild's triggers are compiled into one Matcher, which on_message keeps
+# reusing until the autoresponder section is replaced. Exact triggers are a
+# dict lookup and prefix and contains triggers are walks over a character
+# trie. A regex that has to contain some literal text (the "hello" in
+# `\bhello+\b`) is only searched when that literal shows up in the same kind
+# of trie walk; the rest share a single alternation with a named group per
+# trigger. Regexes are probed for runaway backtracking before they are
+# accepted, and a guild whose regexes still go over MATCH_BUDGET a few times
+# has them switched off until the triggers are edited again.
+TRIGGER_TYPES = ('exact', 'prefix', 'contains', 'regex')
+MAX_TRIGGERS = 5000
+MAX_PATTERN_LENGTH = 200
+MAX_RESPONSE_LENGTH = 2000
+MAX_MATCH_LENGTH = 2000
+DEFAULT_COOLDOWN = 5
+VALIDATION_BUDGET = 0.001
+MATCH_BUDGET = 0.02
+SLOW_MATCH_STRIKES = 3
+PROBE_LENGTHS = tuple(range(2, 34, 2)) + (64, 128, 256, 512, 1024, MAX_MATCH_LENGTH)
+MIN_LITERAL_LENGTH = 3
+BACKREFERENCE = re.compile(r'\\[1-9]|\(\?P=')
+
+END = ''
+
+matchers = {}
+
+def trie_insert(root, text, slot):
+    node = root
+    for char in text:
+        node = node.setdefault(char, {})
+    node.setdefault(END, slot)
+
+def trie_longest(root, text, start):
+    node = root
+    found = node.get(END)
+    for index in range(start, len(text)):
+        node = node.get(text[index])
+        if node is None:
+            break
+        found = node.get(END, found)
+    return found
+
+def trie_first(root, text, start):
+    node = root
+    for index in range(start, len(text)):
+        node = node.get(text[index])
+        if node is None:
+            return None
+        if END in node:
+            return node[END]
+    return None
+
+def trie_collect(root, text, start, found):
+    node = root
+    for index in range(start, len(text)):
+        node = node.get(text[index])
+        if node is None:
+            return
+        found.update(node.get(END, ()))
+
+def required_literal(pattern, flags=0):
+    # The longest run of plain characters outside any group or character
+    # class. Without a top level alternation every match has to contain it.
+    if flags & re.VERBOSE:
+        return None
+
+    best = run = ''
+    depth = 0
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        following = pattern[index + 1:index + 2]
+        if char == '\\':
+            index += 1
+        elif char == '[':
+            index += 2 if following == '^' else 1
+            if pattern[index:index + 1] == ']':
+                index += 1
+            while index < len(pattern) and pattern[index] != ']':
+                index += 2 if pattern[index] == '\\' else 1
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            return None
+        elif depth == 0 and char.isascii() and (char.isalnum() or char == ' ') and following not in ('?', '*', '{'):
+            run += char.lower()
+            if following != '+':
+                index += 1
+                continue
+
+        best = max(best, run, key=len)
+        run = ''
+        index += 1
+
+    best = max(best, run, key=len)
+    return best if len(best.strip()) >= MIN_LITERAL_LENGTH else None
+
+class Matcher:
+    __slots__ = ('section', 'trigger_ids', 'exact', 'prefixes', 'contains', 'literals', 'gated', 'regex', 'regex_enabled', 'cooldowns', 'strikes')
+
+    def __init__(self, section, previous=None):
+        self.section = section
+        self.trigger_ids = sorted(section.triggers)
+        self.exact = {}
+        self.prefixes = {}
+        self.contains = {}
+        self.literals = {}
+        self.gated = {}
+        branches = []
+
+        # Slots follow trigger ids, so when two triggers overlap the older one
+        # wins.
+        for slot, trigger_id in enumerate(self.trigger_ids):
+            trigger = section.triggers[trigger_id]
+            pattern = trigger['pattern']
+            if trigger['type'] == 'exact':
+                self.exact.setdefault(pattern.strip().lower(), slot)
+            elif trigger['type'] == 'prefix':
+                trie_insert(self.prefixes, pattern.lower(), slot)
+            elif trigger['type'] == 'contains':
+                trie_insert(self.contains, pattern.lower(), slot)
+            else:
+                compiled = re.compile(pattern, re.IGNORECASE)
+                literal = required_literal(pattern, compiled.flags)
+                if literal is None:
+                    branches.append(f'(?P<t{slot}>{pattern})')
+                    continue
+
+                node = self.literals
+                for char in literal:
+                    node = node.setdefault(char, {})
+                node.setdefault(END, []).append(slot)
+                self.gated[slot] = compiled
+
+        self.regex = re.compile('|'.join(branches), re.IGNORECASE) if branches else None
+        self.regex_enabled = bool(branches or self.gated)
+        self.strikes = 0
+
+        # One float per trigger: the monotonic time it may fire again.
+        self.cooldowns = array.array('d', bytes(8 * len(self.trigger_ids)))
+        if previous is not None:
+            slots = {trigger_id: slot for slot, trigger_id in enumerate(self.trigger_ids)}
+            for old_slot, trigger_id in enumerate(previous.trigger_ids):
+                if trigger_id in slots:
+                    self.cooldowns[slots[trigger_id]] = previous.cooldowns[old_slot]
+
+    def match(self, content):
+        content = content[:MAX_MATCH_LENGTH]
+        text = content.lower()
+
+        slot = self.exact.get(text.strip())
+        if slot is None and self.prefixes:
+            slot = trie_longest(self.prefixes, text, 0)
+        if slot is None and self.contains:
+            for start in range(len(text)):
+                if text[start] in self.contains:
+                    slot = trie_first(self.contains, text, start)
+                    if slot is not None:
+                        break
+        if slot is None and self.regex_enabled:
+            slot = self.search(content, text)
+        return slot
+
+    def search(self, content, text):
+        start = time.perf_counter()
+        slot = None
+
+        if self.gated:
+            candidates = set()
+            for index in range(len(text)):
+                if text[index] in self.literals:
+                    trie_collect(self.literals, text, index, candidates)
+            for candidate in sorted(candidates):
+                if self.gated[candidate].search(content):
+                    slot = candidate
+                    break
+
+        if slot is None and self.regex is not None:
+            match = self.regex.search(content)
+            if match is not None:
+                slot = int(match.lastgroup[1:])
+
+        elapsed = time.perf_counter() - start
+        if elapsed > MATCH_BUDGET:
+            self.strikes += 1
+            logger.warning("Autoresponder regexes took %.1fms", elapsed * 1000, extra=log_fields(category='autoresponder', guild_id=self.section.guild_id, strikes=self.strikes))
+            if self.strikes >= SLOW_MATCH_STRIKES:
+                self.regex_enabled = False
+        return slot
+
+    def trigger(self, slot):
+        return self.section.triggers[self.trigger_ids[slot]]
+
+    def ready(self, slot, now):
+        if self.cooldowns[slot] > now:
+            return False
+        self.cooldowns[slot] = now + self.trigger(slot).get('cooldown', DEFAULT_COOLDOWN)
+        return True
+
+def get_matcher(guild_id):
+    section = get_section(guild_id, 'autoresponder')
+    matcher = matchers.get(guild_id)
+    if matcher is None or matcher.section is not section:
+        matcher = matchers[guild_id] = Matcher(section, matcher)
+    return matcher
+
+def rebuild_matcher(guild_id):
+    matchers[guild_id] = Matcher(get_section(guild_id, 'autoresponder'), matchers.get(guild_id))
+
+def match_response(message):
+    matcher = get_matcher(message.guild.id)
+    if not matcher.trigger_ids:
+        return None
+
+    slot = matcher.match(message.content)
+    if slot is None or not matcher.ready(slot, time.monotonic()):
+        return None
+    return matcher.trigger(slot)['response']
+
+def probe_regex(compiled, pattern):
+    # Repeat a few characters (including the pattern's own) at growing
+    # lengths and give up at the first probe over budget, so a pattern that
+    # backtracks exponentially is caught long before it can hang.
+    units = sorted({'a', '0', ' ', 'a '} | {char for char in pattern.lower() if char.isalnum()})[:16]
+    for unit in units:
+        for length in PROBE_LENGTHS:
+            text = (unit * length)[:MAX_MATCH_LENGTH] + '\x00'
+            start = time.perf_counter()
+            compiled.search(text)
+            if time.perf_counter() - start > VALIDATION_BUDGET:
+                return "That regex is too slow on long messages. Avoid nested repeats like `(a+)+` and leading `.*`."
+    return None
+
+def validate_trigger(trigger_type, pattern, response):
+    if trigger_type not in TRIGGER_TYPES:
+        return f"Trigger type must be one of: {', '.join(TRIGGER_TYPES)}."
+    if not pattern.strip() or len(pattern) > MAX_PATTERN_LENGTH:
+        return f"Triggers must be between 1 and {MAX_PATTERN_LENGTH} characters."
+    if not response.strip() or len(response) > MAX_RESPONSE_LENGTH:
+        return f"Responses must be between 1 and {MAX_RESPONSE_LENGTH} characters."
+    if trigger_type != 'regex':
+        return None
+
+    try:
+        compiled = re.compile(pattern, re.IGNORECASE)
+    except re.error as e:
+        return f"Invalid regex: {e}"
+
+    if compiled.groupindex or BACKREFERENCE.search(pattern):
+        return "Named groups and backreferences aren't supported."
+
+    # Inline flags are only allowed at the very start, which breaks once the
+    # pattern is one branch of the combined alternation.
+    try:
+        re.compile(f'(?P<t0>{pattern})|x')
+    except re.error as e:
+        return f"Invalid regex: {e}"
+    if compiled.search('') is not None:
+        return "That regex matches every message."
+    return probe_regex(compiled, pattern)
+
+def add_trigger(guild_id, trigger_type, pattern, response, cooldown=DEFAULT_COOLDOWN):
+    section = get_section(guild_id, 'autoresponder')
+    trigger_id = section.next_id
+    section.triggers[trigger_id] = {'type': trigger_type, 'pattern': pattern, 'response': response, 'cooldown': cooldown}
+    section.next_id += 1
+    section.save()
+    rebuild_matcher(guild_id)
+    return trigger_id
+
+def remove_trigger(guild_id, trigger_id):
+    section = get_section(guild_id, 'autoresponder')
+    if section.triggers.pop(trigger_id, None) is None:
+        return False
+    section.save()
+    rebuild_matcher(guild_id)
+    return True
+
+def set_trigger_cooldown(guild_id, trigger_id, cooldown):
+    section = get_section(guild_id, 'autoresponder')
+    trigger = section.triggers.get(trigger_id)
+    if trigger is None:
+        return False
+    trigger['cooldown'] = cooldown
+    section.save()
+    return True
@@ -0,0 +1,227 @@
+import asyncio
+import io
+import json
+import os
+import shutil
+import tarfile
+import time
+
+from grind.cases import case_indexes
+from grind.config import bot_config_cache, guild_sections
+from grind.levels import dirty_xp_guilds, leaderboards
+from grind.logs import logger, log_fields
+
+# BACKUPS
+# A snapshot covers bot_config.json, timers and jobs, every guild's config
+# (sections and not yet migrated legacy files), lockdown snapshots, levels and
+# case logs with their archives. Files written with os.replace are hard linked,
+# which freezes the version that was current at that moment. Case logs and
+# archives are appended in place, so they are copied instead, and a line cut
+# short by a concurrent append is dropped when the log is loaded. Only files
+# that changed since the last snapshot are staged, and staging and streaming
+# them into backups/<snapshot>.tar.gz both run in a worker thread.
+# backups/manifest.json records which archive holds the newest copy of every
+# file, so restoring one guild only opens the archives that contain its files.
+BACKUP_DIR = 'backups'
+BACKUP_MANIFEST = 'backups/manifest.json'
+BACKUP_STAGING = 'backups/staging'
+BACKUP_FILES = ('bot_config.json', 'server_data/timers.json', 'server_data/jobs.json')
+BACKUP_STORES = {
+    'server_data/lockdown': ('.json',),
+    'server_data/levels': ('.json',),
+    'server_data/cases': ('.jsonl', '.meta.json'),
+    'server_data/cases/archive': ('.jsonl.gz',)
+}
+APPENDED_SUFFIXES = ('.jsonl', '.jsonl.gz')
+
+# The timer and job runners keep their state in memory and would overwrite a
+# restored file, so these are only restored from the command line while the
+# bot is stopped.
+OFFLINE_RESTORE_ONLY = ('server_data/timers.json', 'server_data/jobs.json')
+
+backup_state = {'lock': None}
+
+def backup_sources():
+    paths = [path for path in BACKUP_FILES if os.path.exists(path)]
+    if not os.path.isdir('server_data'):
+        return paths
+
+    with os.scandir('server_data') as entries:
+        for entry in entries:
+            if entry.is_dir() and entry.name.isdigit():
+                with os.scandir(entry.path) as files:
+                    paths.extend(f'server_data/{entry.name}/{f.name}' for f in files if f.name.endswith('.json'))
+            elif entry.name.endswith('.json') and entry.name[:-len('.json')].isdigit():
+                paths.append(f'server_data/{entry.name}')
+
+    for directory, suffixes in BACKUP_STORES.items():
+        if os.path.isdir(directory):
+            with os.scandir(directory) as files:
+                paths.extend(f'{directory}/{f.name}' for f in files if f.is_file() and f.name.endswith(suffixes))
+    return paths
+
+def backup_guild(path):
+    directory, name = os.path.split(path)
+    if directory in BACKUP_STORES or directory == 'server_data':
+        guild_id = name.split('.')[0]
+    else:
+        guild_id = os.path.basename(directory)
+    return int(guild_id) if guild_id.isdigit() else None
+
+def load_manifest():
+    try:
+        with open(BACKUP_MANIFEST, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'snapshots': [], 'files': {}}
+
+def write_atomic(path, data):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path + '.tmp', 'wb') as f:
+        f.write(data)
+    os.replace(path + '.tmp', path)
+
+def stage_snapshot(full=False):
+    manifest = load_manifest()
+    previous = {} if full else manifest['files']
+    name = f'snapshot-{int(time.time() * 1000)}'
+    staging = os.path.join(BACKUP_STAGING, name)
+    files = {}
+    changed = []
+
+    for path in backup_sources():
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+
+        entry = previous.get(path)
+        if entry and entry['mtime'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            files[path] = entry
+            continue
+
+        target = os.path.join(staging, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            if path.endswith(APPENDED_SUFFIXES):
+                shutil.copy2(path, target)
+            else:
+                os.link(path, target)
+        except FileNotFoundError:
+            continue
+        except OSError:
+            shutil.copy2(path, target)
+
+        # The staged link is what gets archived, so its stat is what the next
+        # snapshot compares against.
+        stat = os.stat(target)
+        files[path] = {'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'archive': f'{name}.tar.gz'}
+        changed.append(path)
+
+    manifest['files'] = files
+    return name, staging, changed, manifest
+
+def write_snapshot(name, staging, changed, manifest):
+    manifest['snapshots'].append(name)
+    manifest_data = json.dumps(manifest, indent=4).encode()
+    archive = os.path.join(BACKUP_DIR, f'{name}.tar.gz')
+
+    with tarfile.open(archive + '.tmp', 'w:gz') as tar:
+        for path in changed:
+            tar.add(os.path.join(staging, path), arcname=path)
+        info = tarfile.TarInfo('manifest.json')
+        info.size = len(manifest_data)
+        info.mtime = int(time.time())
+        tar.addfile(info, io.BytesIO(manifest_data))
+    os.replace(archive + '.tmp', archive)
+    shutil.rmtree(staging, ignore_errors=True)
+
+    # Archives whose files have all been superseded are no longer needed.
+    referenced = {entry['archive'][:-len('.tar.gz')] for entry in manifest['files'].values()}
+    for snapshot in manifest['snapshots'][:-1]:
+        if snapshot not in referenced:
+            try:
+                os.remove(os.path.join(BACKUP_DIR, f'{snapshot}.tar.gz'))
+            except FileNotFoundError:
+                pass
+    manifest['snapshots'] = [snapshot for snapshot in manifest['snapshots'] if snapshot in referenced or snapshot == name]
+
+    write_atomic(BACKUP_MANIFEST, json.dumps(manifest, indent=4).encode())
+
+def restore_snapshot(guild_id=None, skip=()):
+    manifest = load_manifest()
+    archives = {}
+    for path, entry in manifest['files'].items():
+        if path in skip:
+            continue
+        if guild_id is None or backup_guild(path) == guild_id:
+            archives.setdefault(entry['archive'], []).append(path)
+
+    restored = 0
+    for archive, paths in archives.items():
+        with tarfile.open(os.path.join(BACKUP_DIR, archive), 'r:gz') as tar:
+            for path in paths:
+                member = tar.extractfile(path)
+                if member is None:
+                    continue
+                write_atomic(path, member.read())
+                restored += 1
+    return restored
+
+def create_backup_sync(full=False):
+    name, staging, changed, manifest = stage_snapshot(full)
+    if not changed:
+        shutil.rmtree(staging, ignore_errors=True)
+        return None, 0
+
+    write_snapshot(name, staging, changed, manifest)
+    return name, len(changed)
+
+def get_backup_lock():
+    if backup_state['lock'] is None:
+        backup_state['lock'] = asyncio.Lock()
+    return backup_state['lock']
+
+async def create_backup(full=False):
+    async with get_backup_lock():
+        start = time.monotonic()
+        name, changed = await asyncio.get_running_loop().run_in_executor(None, create_backup_sync, full)
+        if name:
+            logger.info("Backup %s written", name, extra=log_fields(category='backup', files=changed, latency=round(time.monotonic() - start, 4)))
+        return name, changed
+
+async def restore_backup(guild_id=None):
+    async with get_backup_lock():
+        restored = await asyncio.get_running_loop().run_in_executor(None, restore_snapshot, guild_id, OFFLINE_RESTORE_ONLY)
+
+        # Cached sections, case indexes and XP would otherwise keep serving
+        # (and later overwrite) the pre-restore values.
+        for key in list(guild_sections):
+            if guild_id is None or key[0] == guild_id:
+                del guild_sections[key]
+        for server_id in list(case_indexes):
+            if guild_id is None or int(server_id) == guild_id:
+                del case_indexes[server_id]
+        for key in list(leaderboards):
+            if guild_id is None or key == guild_id:
+                del leaderboards[key]
+                dirty_xp_guilds.discard(key)
+        if guild_id is None:
+            bot_config_cache.clear()
+
+        logger.info("Restored %s files from backup", restored, extra=log_fields(category='backup', guild_id=guild_id))
+        return restored
+
+def run_backup_cli(argv):
+    # python main.py backup [full]
+    # python main.py restore [guild_id|all]
+    command = argv[0]
+    if command == 'backup':
+        name, changed = create_backup_sync(full='full' in argv[1:])
+        print(f'Wrote {name} ({changed} files)' if name else 'Nothing changed since the last backup.')
+    elif command == 'restore':
+        target = argv[1] if len(argv) > 1 else 'all'
+        restored = restore_snapshot(None if target == 'all' else int(target))
+        print(f'Restored {restored} files.')
@@ -0,0 +1,325 @@
+import asyncio
+import datetime
+import gzip
+import json
+import os
+import time
+
+import discord
+
+from grind.config import get_settings
+from grind.logs import logger, log_fields
+from grind.outbound import send_cosmetic
+
+# Every guild gets an append-only JSON lines file in server_data/cases. The
+# indexes below only hold case numbers and byte offsets, so a history page is
+# a dict lookup plus a handful of seeks no matter how big the log gets.
+# Building them means parsing the whole file, so the first lookup for a guild
+# does that in a worker thread and everyone else waits on the same load.
+# Cases older than CASE_ARCHIVE_AFTER_DAYS are moved to a gzipped archive when
+# the log is loaded and every CASE_COMPACT_INTERVAL seconds after that.
+CASES_PER_PAGE = 10
+CASE_ARCHIVE_AFTER_DAYS = 180
+CASE_COMPACT_INTERVAL = 6 * 3600
+
+case_indexes = {}
+load_tasks = {}
+
+class CaseIndex:
+    def __init__(self, server_id):
+        self.server_id = server_id
+        self.path = f'server_data/cases/{server_id}.jsonl'
+        self.meta_path = f'server_data/cases/{server_id}.meta.json'
+        self.archive_path = f'server_data/cases/archive/{server_id}.jsonl.gz'
+        self.lock = asyncio.Lock()
+        self.last_case = 0
+        self.archived_through = 0
+        self.first_case = None
+        self.oldest = None
+        self.offsets = {}
+        self.by_user = {}
+        self.by_moderator = {}
+        self.moderator_counts = {}
+
+    def load(self):
+        try:
+            with open(self.meta_path, 'r') as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            meta = {}
+
+        self.last_case = meta.get('last_case', 0)
+        self.archived_through = meta.get('archived_through', 0)
+        if 'archive_size' in meta:
+            self._rollback_archive(meta['archive_size'])
+
+        try:
+            with open(self.path, 'rb') as f:
+                offset = 0
+                torn = False
+                for line in f:
+                    try:
+                        record = json.loads(line) if line.endswith(b'\n') else None
+                    except ValueError:
+                        record = None
+                    if record is None:
+                        # Only the last line can be cut short by a crash in
+                        # the middle of an append.
+                        if f.read():
+                            raise ValueError(f'Corrupt case log line at offset {offset}')
+                        torn = True
+                        break
+                    self._index(record, offset)
+                    offset += len(line)
+        except FileNotFoundError:
+            return
+
+        if torn:
+            logger.warning("Dropped a partially written case", extra=log_fields(category='moderation', guild_id=self.server_id, offset=offset))
+            with open(self.path, 'r+b') as f:
+                f.truncate(offset)
+
+        now = time.time()
+        if self.needs_compact(now):
+            self.apply_compact(self.prepare_compact(now))
+
+    def _index(self, record, offset):
+        case_number = record['case']
+        self.offsets[case_number] = offset
+        self.last_case = max(self.last_case, case_number)
+        if self.first_case is None:
+            self.first_case = case_number
+            self.oldest = record['timestamp']
+
+        if record.get('user_id'):
+            self.by_user.setdefault(record['user_id'], []).append(case_number)
+
+        moderator_id = record['moderator_id']
+        self.by_moderator.setdefault(moderator_id, []).append(case_number)
+        counts = self.moderator_counts.setdefault(moderator_id, {})
+        counts[record['action']] = counts.get(record['action'], 0) + 1
+
+    def _save_meta(self, **extra):
+        with open(self.meta_path + '.tmp', 'w') as f:
+            json.dump({'last_case': self.last_case, 'archived_through': self.archived_through, **extra}, f, indent=4)
+        os.replace(self.meta_path + '.tmp', self.meta_path)
+
+    def append(self, record):
+        os.makedirs('server_data/cases', exist_ok=True)
+        record['case'] = self.last_case + 1
+
+        with open(self.path, 'ab') as f:
+            f.seek(0, os.SEEK_END)
+            offset = f.tell()
+            f.write(json.dumps(record).encode() + b'\n')
+
+        self._index(record, offset)
+        return record['case']
+
+    def read(self, case_numbers):
+        records = []
+        with open(self.path, 'rb') as f:
+            for case_number in case_numbers:
+                f.seek(self.offsets[case_number])
+                records.append(json.loads(f.readline()))
+        return records
+
+    def get(self, case_number):
+        if case_number not in self.offsets:
+            return None
+        return self.read([case_number])[0]
+
+    def page(self, case_numbers, page):
+        # Case lists are appended in order, so the newest cases sit at the end
+        # and any page is a plain slice.
+        end = len(case_numbers) - (page - 1) * CASES_PER_PAGE
+        start = max(end - CASES_PER_PAGE, 0)
+        if end <= 0:
+            return []
+        return self.read(reversed(case_numbers[start:end]))
+
+    def needs_compact(self, now):
+        if self.first_case is None:
+            return False
+        return self.oldest < now - CASE_ARCHIVE_AFTER_DAYS * 86400 or self.first_case <= self.archived_through
+
+    def prepare_compact(self, now):
+        # Archives expired cases and writes the rest to a temporary log with
+        # its own index, without touching the live log or index, so it can
+        # run in a worker thread while lookups carry on.
+        cutoff = now - CASE_ARCHIVE_AFTER_DAYS * 86400
+        kept = CaseIndex(self.server_id)
+        kept.last_case = self.last_case
+        archived = []
+
+        with open(self.path, 'rb') as source, open(self.path + '.tmp', 'wb') as f:
+            for line in source:
+                record = json.loads(line)
+                if record['case'] <= self.archived_through:
+                    # Archived already, the log just wasn't rewritten before
+                    # the bot stopped.
+                    continue
+                if record['timestamp'] < cutoff:
+                    archived.append(record)
+                else:
+                    kept._index(record, f.tell())
+                    f.write(line)
+
+        if archived:
+            self._archive(archived)
+        return kept
+
+    def apply_compact(self, kept):
+        os.replace(self.path + '.tmp', self.path)
+        self.first_case = kept.first_case
+        self.oldest = kept.oldest
+        self.offsets = kept.offsets
+        self.by_user = kept.by_user
+        self.by_moderator = kept.by_moderator
+        self.moderator_counts = kept.moderator_counts
+
+    def _archive(self, records):
+        os.makedirs('server_data/cases/archive', exist_ok=True)
+        try:
+            size = os.path.getsize(self.archive_path)
+        except FileNotFoundError:
+            size = 0
+
+        # The archive's size is saved before appending, so an append cut short
+        # by a crash is truncated away on the next load instead of leaving a
+        # broken or duplicate gzip member behind.
+        self._save_meta(archive_size=size)
+        with gzip.open(self.archive_path, 'at') as f:
+            for record in records:
+                compacted = {key: value for key, value in record.items() if value is not None}
+                f.write(json.dumps(compacted, separators=(',', ':')) + '\n')
+
+        self.archived_through = max(self.archived_through, records[-1]['case'])
+        self._save_meta()
+
+    def _rollback_archive(self, size):
+        try:
+            with open(self.archive_path, 'r+b') as f:
+                f.truncate(size)
+        except FileNotFoundError:
+            pass
+        self._save_meta()
+
+async def get_case_index(server_id):
+    server_id = str(server_id)
+    index = case_indexes.get(server_id)
+    if index is not None:
+        return index
+
+    task = load_tasks.get(server_id)
+    if task is None:
+        task = load_tasks[server_id] = asyncio.ensure_future(load_case_index(server_id))
+    return await asyncio.shield(task)
+
+async def load_case_index(server_id):
+    start = time.monotonic()
+    try:
+        index = CaseIndex(server_id)
+        await asyncio.get_running_loop().run_in_executor(None, index.load)
+        case_indexes[server_id] = index
+        logger.info("Loaded case index", extra=log_fields(category='moderation', guild_id=server_id, cases=len(index.offsets), latency=round(time.monotonic() - start, 4)))
+        return index
+    finally:
+        del load_tasks[server_id]
+
+async def compact_case_indexes():
+    now = time.time()
+    loop = asyncio.get_running_loop()
+    for index in list(case_indexes.values()):
+        if not index.needs_compact(now):
+            continue
+
+        # New cases wait on the lock while the log is rewritten, lookups keep
+        # reading the old log until the new one is swapped in.
+        try:
+            async with index.lock:
+                kept = await loop.run_in_executor(None, index.prepare_compact, now)
+                index.apply_compact(kept)
+        except Exception:
+            logger.exception("Case log compaction failed", extra=log_fields(category='moderation', guild_id=index.server_id))
+
+async def record_case(guild, action_type, member, moderator, reason=None, duration=None):
+    index = await get_case_index(guild.id)
+    async with index.lock:
+        return index.append({
+            'action': action_type.lower(),
+            'user_id': getattr(member, 'id', None),
+            'user': str(member),
+            'moderator_id': moderator.id,
+            'reason': reason,
+            'duration': duration,
+            'timestamp': int(time.time())
+        })
+
+def format_case(record):
+    target = f"<@{record['user_id']}>" if record.get('user_id') else record['user']
+    line = f"**#{record['case']}** `{record['action']}` {target} by <@{record['moderator_id']}> <t:{record['timestamp']}:R>"
+    if record.get('duration') and record['duration'] != 'infinite':
+        line += f" ({record['duration']})"
+    if record.get('reason'):
+        line += f"\n└ {record['reason']}"
+    return line
+
+async def log_action(guild, action_type, member, moderator, reason=None, duration=None, log_type="general"):
+    case_number = await record_case(guild, action_type, member, moderator, reason, duration)
+    settings = get_settings(guild.id)
+    
+    channel_id = None
+    if log_type == "jail":
+        channel_id = settings.jail_logs_channel_id
+    else:
+        channel_id = settings.logs_channel_id
+    
+    if not channel_id:
+        return
+    
+    channel = guild.get_channel(channel_id)
+    if not channel:
+        return
+    
+    colors = {
+        'ban': discord.Color.dark_red(),
+        'unban': discord.Color.green(),
+        'unbanall': discord.Color.green(),
+        'lockdown': discord.Color.dark_red(),
+        'unlock': discord.Color.green(),
+        'hide': discord.Color.dark_red(),
+        'unhide': discord.Color.green(),
+        'kick': discord.Color.orange(),
+        'mute': discord.Color.gold(),
+        'unmute': discord.Color.green(),
+        'jail': discord.Color.red(),
+        'unjail': discord.Color.green(),
+        'antinuke': discord.Color.dark_red(),
+        'strip': discord.Color.red(),
+        'unstrip': discord.Color.green(),
+        'warning': discord.Color.yellow()
+    }
+    
+    color = colors.get(action_type.lower(), discord.Color.blue())
+    
+    embed = discord.Embed(
+        title=f"🛡️ Moderation Action: {action_type.capitalize()}",
+        color=color,
+        timestamp=datetime.datetime.now()
+    )
+    embed.set_footer(text=f"Case #{case_number}")
+    
+    embed.add_field(name="User", value=member.mention if hasattr(member, "mention") else member, inline=False)
+    embed.add_field(name="Moderator", value=moderator.mention, inline=False)
+    
+    if duration:
+        embed.add_field(name="Duration", value=duration, inline=False)
+    
+    if reason:
+        embed.add_field(name="Reason", value=reason, inline=False)
+    
+    try:
+        await send_cosmetic(channel, embed=embed)
+    except Exception as e:
+        logger.warning("Error logging action: %s", e, extra=log_fields(guild=guild, category='moderation'))
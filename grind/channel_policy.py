@@ -0,0 +1,121 @@
+import asyncio
+import re
+import time
+
+import discord
+
+from grind.config import get_section
+from grind.logs import logger, log_fields
+from grind.outbound import request_priority, send_cosmetic
+
+# CHANNEL POLICIES
+# Media-only and sticky channels are kept in the channel_policies section,
+# keyed by channel id, so on_message pays one dict lookup in every other
+# channel. Messages that break a media-only channel are collected for
+# MEDIA_DELETE_DELAY seconds and removed with one bulk delete. A sticky
+# message is reposted once the channel has been quiet for STICKY_QUIET
+# seconds (or after STICKY_MAX_DELAY in a channel that never goes quiet),
+# so a busy channel costs one repost per quiet period instead of one per
+# message. Slowmode is Discord's own, so it needs no work here at all.
+MEDIA_DELETE_DELAY = 1.5
+BULK_DELETE_LIMIT = 100
+STICKY_QUIET = 5
+STICKY_MAX_DELAY = 30
+MEDIA_URL = re.compile(r'https?://\S')
+
+class ChannelState:
+    __slots__ = ('pending_deletes', 'delete_task', 'last_activity', 'sticky_task')
+
+    def __init__(self):
+        self.pending_deletes = []
+        self.delete_task = None
+        self.last_activity = 0.0
+        self.sticky_task = None
+
+channel_states = {}
+
+def get_channel_policy(channel):
+    return get_section(channel.guild.id, 'channel_policies').channels.get(channel.id)
+
+def get_channel_state(channel_id):
+    state = channel_states.get(channel_id)
+    if state is None:
+        state = channel_states[channel_id] = ChannelState()
+    return state
+
+def is_media(message):
+    return bool(message.attachments or message.stickers or MEDIA_URL.search(message.content))
+
+def queue_delete(message):
+    state = get_channel_state(message.channel.id)
+    state.pending_deletes.append(message.id)
+    if state.delete_task is None:
+        state.delete_task = asyncio.ensure_future(flush_deletes(message.channel, state))
+
+async def flush_deletes(channel, state):
+    try:
+        await asyncio.sleep(MEDIA_DELETE_DELAY)
+    finally:
+        state.delete_task = None
+
+    while state.pending_deletes:
+        batch = state.pending_deletes[:BULK_DELETE_LIMIT]
+        del state.pending_deletes[:BULK_DELETE_LIMIT]
+        try:
+            if len(batch) == 1:
+                await channel.get_partial_message(batch[0]).delete()
+            else:
+                await channel.delete_messages([discord.Object(id=message_id) for message_id in batch], reason="Media only channel")
+        except discord.NotFound:
+            pass
+        except discord.HTTPException as e:
+            logger.warning("Could not delete messages in media only channel: %s", e, extra=log_fields(guild=channel.guild, category='channels', channel_id=channel.id))
+
+def touch_sticky(channel):
+    state = get_channel_state(channel.id)
+    state.last_activity = time.monotonic()
+    if state.sticky_task is None:
+        state.sticky_task = asyncio.ensure_future(repost_sticky(channel, state))
+
+async def repost_sticky(channel, state):
+    started = time.monotonic()
+    try:
+        while True:
+            wait = min(state.last_activity + STICKY_QUIET, started + STICKY_MAX_DELAY) - time.monotonic()
+            if wait <= 0:
+                break
+            await asyncio.sleep(wait)
+    finally:
+        state.sticky_task = None
+
+    section = get_section(channel.guild.id, 'channel_policies')
+    policy = section.channels.get(channel.id)
+    if not policy or not policy.get('sticky'):
+        return
+
+    if policy.get('sticky_message_id'):
+        with request_priority('cosmetic'):
+            try:
+                await channel.get_partial_message(policy['sticky_message_id']).delete()
+            except discord.DiscordException:
+                pass
+
+    message = await send_cosmetic(channel, policy['sticky'], allowed_mentions=discord.AllowedMentions.none())
+    if message is not None:
+        policy['sticky_message_id'] = message.id
+        section.save()
+
+def update_channel_policy(channel, **changes):
+    # Options set to None are removed, and a channel without options drops
+    # out of the table.
+    section = get_section(channel.guild.id, 'channel_policies')
+    policy = section.channels.setdefault(channel.id, {})
+    for name, value in changes.items():
+        if value is None:
+            policy.pop(name, None)
+        else:
+            policy[name] = value
+
+    if not policy.get('media_only') and not policy.get('sticky'):
+        del section.channels[channel.id]
+    section.save()
@@ -0,0 +1,312 @@
+import json
+import os
+
+DEFAULT_PREFIX = '!'
+OWNER_ID = 0
+BOT_TOKEN = 'x'
+
+# Guild settings are split into sections stored as server_data/<guild_id>/<section>.json.
+# A section is only read the first time it is used and then stays cached, so
+# hot paths like get_prefix never parse role snapshots or VoiceMaster state.
+class GuildSection:
+    __slots__ = ('guild_id',)
+    name = None
+
+    def __init__(self, guild_id, data):
+        self.guild_id = guild_id
+
+    def to_dict(self):
+        raise NotImplementedError
+
+    def save(self):
+        save_section(self)
+
+class CoreSettings(GuildSection):
+    __slots__ = ('prefix', 'logs_channel_id', 'jail_logs_channel_id', 'jailed_role_id', 'jail_channel_id', 'muted_role_id')
+    name = 'core'
+
+    def __init__(self, guild_id, data):
+        super().__init__(guild_id, data)
+        self.prefix = data.get('prefix', DEFAULT_PREFIX)
+        self.logs_channel_id = data.get('logs_channel_id')
+        self.jail_logs_channel_id = data.get('jail_logs_channel_id')
+        self.jailed_role_id = data.get('jailed_role_id')
+        self.jail_channel_id = data.get('jail_channel_id')
+        self.muted_role_id = data.get('muted_role_id')
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in CoreSettings.__slots__}
+
+class Aliases(GuildSection):
+    __slots__ = ('aliases',)
+    name = 'aliases'
+
+    def __init__(self, guild_id, data):
+        super().__init__(guild_id, data)
+        self.aliases = dict(data)
+
+    def to_dict(self):
+        return self.aliases
+
+class FakePermissions(GuildSection):
+    __slots__ = ('roles',)
+    name = 'fake_permissions'
+
+    def __init__(self, guild_id, data):
+        super().__init__(guild_id, data)
+        self.roles = {int(role_id): list(perms) for role_id, perms in data.items()}
+
+    def to_dict(self):
+        return self.roles
+
+class RoleSnapshots(GuildSection):
+    __slots__ = ('users',)
+    name = 'user_roles'
+
+    def __init__(self, guild_id, data):
+        super().__init__(guild_id, data)
+        self.users = {int(user_id): tuple(role_ids) for user_id, role_ids in data.items()}
+
+    def to_dict(self):
+        return self.users
+
+class StrippedRoles(RoleSnapshots):
+    __slots__ = ()
+    name = 'stripped_roles'
+
+class VoiceMasterState(GuildSection):
+    __slots__ = ('enabled', 'join_channel_id', 'category_id', 'user_channels')
+    name = 'voice_master'
+
+    def __init__(self, guild_id, data):
+        super().__init__(guild_id, data)
+        self.enabled = data.get('enabled', False)
+        self.join_channel_id = data.get('join_channel_id')
+        self.category_id = data.get('category_id')
+        self.user_channels = {int(channel_id): owner_id for channel_id, owner_id in data.get('user_channels', {}).items()}
+
+    def to_dict(self):
+        return {
+            'enabled': self.enabled,
+            'join_channel_id': self.join_channel_id,
+            'category_id': self.category_id,
+            'user_channels': self.user_channels
+        }
+
+class AntinukeSettings(GuildSection):
+    __slots__ = ('enabled', 'limit', 'window', 'trusted')
+    name = 'antinuke'
+
+    def __init__(self, guild_id, data):
+        super().__init__(guild_id, data)
+        self.enabled = data.get('enabled', False)
+        self.limit = data.get('limit', 3)
+        self.window = data.get('window', 10)
+        self.trusted = set(data.get('trusted', []))
+
+    def to_dict(self):
+        return {
+            'enabled': self.enabled,
+            'limit': self.limit,
+            'window': self.window,
+            'trusted': sorted(self.trusted)
+        }
+
+class AutoresponderTriggers(GuildSection):
+    __slots__ = ('next_id', 'triggers')
+    name = 'autoresponder'
+
+    def __init__(self, guild_id, data):
+        super().__init__(guild_id, data)
+        self.next_id = data.get('next_id', 1)
+        self.triggers = {int(trigger_id): trigger for trigger_id, trigger in data.get('triggers', {}).items()}
+
+    def to_dict(self):
+        return {'next_id': self.next_id, 'triggers': self.triggers}
+
+class JailedMembers(GuildSection):
+    __slots__ = ('users',)
+    name = 'jailed'
+
+    def __init__(self, guild_id, data):
+        super().__init__(guild_id, data)
+        self.users = set(data.get('users', []))
+
+    def to_dict(self):
+        return {'users': sorted(self.users)}
+
+class WelcomeSettings(GuildSection):
+    __slots__ = ('channel_id', 'message', 'autorole_ids')
+    name = 'welcome'
+
+    def __init__(self, guild_id, data):
+        super().__init__(guild_id, data)
+        self.channel_id = data.get('channel_id')
+        self.message = data.get('message', 'Welcome to {server}, {user}!')
+        self.autorole_ids = list(data.get('autorole_ids', []))
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in WelcomeSettings.__slots__}
+
+class ChannelPolicies(GuildSection):
+    __slots__ = ('channels',)
+    name = 'channel_policies'
+
+    def __init__(self, guild_id, data):
+        super().__init__(guild_id, data)
+        self.channels = {int(channel_id): dict(policy) for channel_id, policy in data.items()}
+
+    def to_dict(self):
+        return self.channels
+
+class AfkUsers(GuildSection):
+    __slots__ = ('users',)
+    name = 'afk'
+
+    def __init__(self, guild_id, data):
+        super().__init__(guild_id, data)
+        self.users = {int(user_id): entry for user_id, entry in data.items()}
+
+    def to_dict(self):
+        return self.users
+
+class EntrantSet:
+    # A list plus each id's position in it. Removing swaps the last id into
+    # the hole, so adds and removes are O(1) and the list can be sampled
+    # directly.
+    __slots__ = ('ids', 'positions')
+
+    def __init__(self, ids=()):
+        self.ids = list(dict.fromkeys(ids))
+        self.positions = {user_id: index for index, user_id in enumerate(self.ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, user_id):
+        if user_id not in self.positions:
+            self.positions[user_id] = len(self.ids)
+            self.ids.append(user_id)
+
+    def discard(self, user_id):
+        index = self.positions.pop(user_id, None)
+        if index is None:
+            return
+        last = self.ids.pop()
+        if last != user_id:
+            self.ids[index] = last
+            self.positions[last] = index
+
+class Giveaways(GuildSection):
+    __slots__ = ('giveaways', 'polls')
+    name = 'giveaways'
+
+    def __init__(self, guild_id, data):
+        super().__init__(guild_id, data)
+        self.giveaways = {int(message_id): dict(giveaway, entrants=EntrantSet(giveaway.get('entrants', []))) for message_id, giveaway in data.get('giveaways', {}).items()}
+        self.polls = {int(message_id): dict(poll, voters=[set(voters) for voters in poll['voters']]) for message_id, poll in data.get('polls', {}).items()}
+
+    def to_dict(self):
+        return {
+            'giveaways': {message_id: dict(giveaway, entrants=giveaway['entrants'].ids) for message_id, giveaway in self.giveaways.items()},
+            'polls': {message_id: dict(poll, voters=[list(voters) for voters in poll['voters']]) for message_id, poll in self.polls.items()}
+        }
+
+class ForcedNicknames(GuildSection):
+    __slots__ = ('users',)
+    name = 'forced_nicknames'
+
+    def __init__(self, guild_id, data):
+        super().__init__(guild_id, data)
+        self.users = {int(user_id): nickname for user_id, nickname in data.items()}
+
+    def to_dict(self):
+        return self.users
+
+GUILD_SECTIONS = {section.name: section for section in (CoreSettings, Aliases, FakePermissions, RoleSnapshots, StrippedRoles, VoiceMasterState, AntinukeSettings, AutoresponderTriggers, JailedMembers, WelcomeSettings, ChannelPolicies, AfkUsers, Giveaways, ForcedNicknames)}
+
+guild_sections = {}
+
+def get_section(guild_id, name):
+    key = (int(guild_id), name)
+    section = guild_sections.get(key)
+    if section is None:
+        section = guild_sections[key] = load_section(int(guild_id), name)
+    return section
+
+def get_settings(guild_id):
+    return get_section(guild_id, 'core')
+
+def load_section(guild_id, name):
+    try:
+        with open(f'server_data/{guild_id}/{name}.json', 'r') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        data = migrate_legacy_config(guild_id).get(name, {})
+    return GUILD_SECTIONS[name](guild_id, data)
+
+def save_section(section):
+    os.makedirs(f'server_data/{section.guild_id}', exist_ok=True)
+    path = f'server_data/{section.guild_id}/{section.name}.json'
+    with open(path + '.tmp', 'w') as f:
+        json.dump(section.to_dict(), f, indent=4)
+    os.replace(path + '.tmp', path)
+
+def migrate_legacy_config(guild_id):
+    # Older versions kept everything in a single server_data/<guild_id>.json.
+    # Split it into sections the first time any section is missing.
+    legacy_path = f'server_data/{guild_id}.json'
+    try:
+        with open(legacy_path, 'r') as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        return {}
+
+    jail = config.get('jail', {})
+    sections = {
+        'core': {
+            'prefix': config.get('prefix', DEFAULT_PREFIX),
+            'logs_channel_id': config.get('logs_channel_id'),
+            'jail_logs_channel_id': config.get('jail_logs_channel_id'),
+            'jailed_role_id': jail.get('jailed_role_id'),
+            'jail_channel_id': jail.get('jail_channel_id'),
+            'muted_role_id': config.get('mute', {}).get('muted_role_id')
+        },
+        'aliases': config.get('aliases', {}),
+        'fake_permissions': config.get('fake_permissions', {}),
+        'user_roles': config.get('user_roles', {}),
+        'voice_master': config.get('voice_master', {})
+    }
+
+    for name, data in sections.items():
+        if not os.path.exists(f'server_data/{guild_id}/{name}.json'):
+            save_section(GUILD_SECTIONS[name](guild_id, data))
+
+    os.replace(legacy_path, legacy_path + '.migrated')
+    return sections
+
+bot_config_cache = {}
+
+def load_bot_config():
+    if 'config' in bot_config_cache:
+        return bot_config_cache['config']
+    try:
+        with open('bot_config.json', 'r') as f:
+            bot_config_cache['config'] = json.load(f)
+    except FileNotFoundError:
+        default_config = {
+            'whitelisted_servers': []
+        }
+        save_bot_config(default_config)
+    return bot_config_cache['config']
+    
+def save_bot_config(config):
+    bot_config_cache['config'] = config
+    with open('bot_config.json.tmp', 'w') as f:
+        json.dump(config, f, indent=4)
+    os.replace('bot_config.json.tmp', 'bot_config.json')
+
+async def is_server_whitelisted(guild):
+    bot_config = load_bot_config()
+    whitelisted_servers = bot_config.get('whitelisted_servers', [])
+    return str(guild.id) in whitelisted_servers or not whitelisted_servers
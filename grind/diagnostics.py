@@ -0,0 +1,140 @@
+import asyncio
+import collections
+import functools
+import os
+import sys
+import threading
+import time
+import traceback
+
+from grind.logs import logger, log_fields
+
+
+# Opt-in with GRIND_DIAGNOSTICS=1. A heartbeat task measures event loop lag and
+# a watchdog thread samples the loop thread's stack. Samples are aggregated as
+# folded stacks (flamegraph.pl / speedscope format), and when the heartbeat
+# stalls for longer than BLOCKING_THRESHOLD the current stack is kept as the
+# culprit.
+DIAGNOSTICS_ENABLED = os.environ.get('GRIND_DIAGNOSTICS') == '1'
+BLOCKING_THRESHOLD = 0.1
+HEARTBEAT_INTERVAL = 0.05
+PROFILE_SAMPLE_INTERVAL = 0.02
+PROFILE_PATH = 'diagnostics/profile.folded'
+
+class LoopMonitor:
+    def __init__(self):
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self.reported_beat = None
+        self.lag = collections.deque(maxlen=1200)
+        self.blocked = collections.deque(maxlen=20)
+        self.stacks = collections.Counter()
+        self.timings = {}
+        self.thread = threading.Thread(target=self.watch, name='loop-watchdog', daemon=True)
+
+    def start(self):
+        asyncio.ensure_future(self.heartbeat())
+        self.thread.start()
+
+    async def heartbeat(self):
+        while True:
+            start = time.monotonic()
+            self.last_beat = start
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            lag = time.monotonic() - start - HEARTBEAT_INTERVAL
+            self.lag.append(lag)
+
+            if self.reported_beat == start and self.blocked:
+                self.blocked[-1]['duration'] = lag
+
+    def watch(self):
+        while True:
+            time.sleep(PROFILE_SAMPLE_INTERVAL)
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+
+            self.stacks[fold_stack(frame)] += 1
+
+            beat = self.last_beat
+            if time.monotonic() - beat > BLOCKING_THRESHOLD and beat != self.reported_beat:
+                self.reported_beat = beat
+                stack = ''.join(traceback.format_stack(frame)[-8:])
+                self.blocked.append({'at': time.time(), 'duration': None, 'stack': stack})
+                logger.warning("Event loop blocked for more than %ss", BLOCKING_THRESHOLD, extra=log_fields(category='diagnostics', stack=stack))
+
+    def record(self, name, elapsed):
+        stats = self.timings.get(name)
+        if stats is None:
+            stats = self.timings[name] = [0, 0.0, 0.0]
+        stats[0] += 1
+        stats[1] += elapsed
+        stats[2] = max(stats[2], elapsed)
+
+    def dump_profile(self, path=PROFILE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        stacks = self.stacks.copy()
+        with open(path, 'w') as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return sum(stacks.values())
+
+loop_monitor = None
+
+def fold_stack(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+def timed_run_event(run_event):
+    # Client._run_event is the single place every event handler and cog
+    # listener is awaited from, so wrapping it times all of them, including
+    # listeners added after an extension reload.
+    @functools.wraps(run_event)
+    async def wrapper(coro, event_name, *args, **kwargs):
+        start = time.monotonic()
+        try:
+            return await run_event(coro, event_name, *args, **kwargs)
+        finally:
+            loop_monitor.record(f"event:{event_name}:{getattr(coro, '__qualname__', coro)}", time.monotonic() - start)
+
+    wrapper.timed = True
+    return wrapper
+
+# Commands are timed with listeners rather than bot.before_invoke and
+# bot.after_invoke, which only hold one hook each and would replace any the
+# bot sets itself. Listeners run as their own tasks, so the clock starts when
+# the command first yields to the loop.
+async def diagnostics_command_started(ctx):
+    ctx.diagnostics_started = time.monotonic()
+
+async def diagnostics_command_finished(ctx):
+    started = getattr(ctx, 'diagnostics_started', None)
+    if started is not None and ctx.command is not None:
+        loop_monitor.record(f"command:{ctx.command.qualified_name}", time.monotonic() - started)
+
+async def diagnostics_command_failed(ctx, error):
+    await diagnostics_command_finished(ctx)
+
+def start_diagnostics(bot):
+    global loop_monitor
+    if not DIAGNOSTICS_ENABLED:
+        return
+
+    # on_ready runs again after every reconnect, so the monitor and the hooks
+    # are only installed the first time.
+    if loop_monitor is None:
+        loop_monitor = LoopMonitor()
+        loop_monitor.start()
+        logger.info("Diagnostics enabled (blocking threshold %ss)", BLOCKING_THRESHOLD, extra=log_fields(category='diagnostics'))
+
+    if getattr(bot._run_event, 'timed', False):
+        return
+
+    bot._run_event = timed_run_event(bot._run_event)
+    bot.add_listener(diagnostics_command_started, 'on_command')
+    bot.add_listener(diagnostics_command_finished, 'on_command_completion')
+    bot.add_listener(diagnostics_command_failed, 'on_command_error')
@@ -0,0 +1,51 @@
+import random
+
+from grind.config import get_section
+
+# GIVEAWAYS AND POLLS
+# Entries and votes come from raw reaction events, so nothing depends on the
+# message being cached and nothing pages through reaction.users() at the end.
+# Giveaway entrants are an EntrantSet (O(1) add and remove, and winners are a
+# random.sample of k ids straight from its list), and each poll option keeps
+# the set of users who voted for it, so a repeated or replayed event can't
+# count twice. Both only change in memory; guilds with changes are written back
+# by the giveaways cog every GIVEAWAY_FLUSH_INTERVAL seconds and on shutdown.
+# Ending is a timer in the shared scheduler.
+GIVEAWAY_EMOJI = '🎉'
+POLL_EMOJIS = ('1️⃣', '2️⃣', '3️⃣', '4️⃣', '5️⃣', '6️⃣', '7️⃣', '8️⃣', '9️⃣', '🔟')
+YES_NO_EMOJIS = ('👍', '👎')
+GIVEAWAY_FLUSH_INTERVAL = 60
+MAX_WINNERS = 50
+
+dirty_guilds = set()
+
+def record_reaction(guild_id, message_id, user_id, emoji, added):
+    section = get_section(guild_id, 'giveaways')
+
+    giveaway = section.giveaways.get(message_id)
+    if giveaway is not None:
+        if emoji != GIVEAWAY_EMOJI:
+            return
+        if added:
+            giveaway['entrants'].add(user_id)
+        else:
+            giveaway['entrants'].discard(user_id)
+        dirty_guilds.add(guild_id)
+        return
+
+    poll = section.polls.get(message_id)
+    if poll is not None and emoji in poll['emojis']:
+        voters = poll['voters'][poll['emojis'].index(emoji)]
+        if added:
+            voters.add(user_id)
+        else:
+            voters.discard(user_id)
+        dirty_guilds.add(guild_id)
+
+def draw_winners(giveaway, count):
+    entrants = giveaway['entrants'].ids
+    return random.sample(entrants, min(count, len(entrants)))
+
+def flush_giveaways():
+    while dirty_guilds:
+        get_section(dirty_guilds.pop(), 'giveaways').save()
@@ -0,0 +1,192 @@
+import asyncio
+import collections
+import json
+import os
+import time
+
+import discord
+
+# Long running admin operations run as jobs. Each guild has its own queue that
+# is worked through one job at a time, and a global semaphore caps how many
+# guilds can run a job at once. Job state is written to server_data/jobs.json so
+# anything still queued or running is picked up again after a restart. Only
+# cancel_job ends a job as cancelled, a job cancelled by the bot shutting down
+# stays in jobs.json.
+JOB_CONCURRENCY = 3
+JOB_PROGRESS_INTERVAL = 3
+JOB_SAVE_INTERVAL = 5
+
+job_handlers = {}
+jobs = {}
+job_queues = {}
+job_workers = {}
+job_tasks = {}
+cancel_requests = set()
+recent_jobs = {}
+job_state = {'next_id': 1, 'semaphore': None, 'last_save': 0, 'resumed': False, 'bot': None}
+
+def job_handler(name):
+    def decorator(func):
+        job_handlers[name] = func
+        return func
+    return decorator
+
+def load_jobs():
+    try:
+        with open('server_data/jobs.json', 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'next_id': 1, 'jobs': []}
+
+def save_jobs():
+    os.makedirs('server_data', exist_ok=True)
+    active = [job for job in jobs.values() if job['status'] in ('queued', 'running')]
+    with open('server_data/jobs.json.tmp', 'w') as f:
+        json.dump({'next_id': job_state['next_id'], 'jobs': active}, f, indent=4)
+    os.replace('server_data/jobs.json.tmp', 'server_data/jobs.json')
+    job_state['last_save'] = time.monotonic()
+
+def format_job(job):
+    text = f"Job #{job['id']} ({job['description']}): {job['status']}"
+    if job['total']:
+        text += f" - {job['done']}/{job['total']}"
+    if job.get('error'):
+        text += f"\nError: {job['error']}"
+    return text
+
+async def update_job_message(job, force=False):
+    if not force and time.monotonic() - job.get('last_update', 0) < JOB_PROGRESS_INTERVAL:
+        return
+    job['last_update'] = time.monotonic()
+
+    channel = job_state['bot'].get_channel(job['channel_id'])
+    if not channel or not job.get('message_id'):
+        return
+
+    try:
+        await channel.get_partial_message(job['message_id']).edit(content=format_job(job))
+    except discord.HTTPException:
+        pass
+
+async def job_progress(job, done, total):
+    job['done'] = done
+    job['total'] = total
+
+    if time.monotonic() - job_state['last_save'] > JOB_SAVE_INTERVAL:
+        save_jobs()
+    await update_job_message(job)
+
+async def submit_job(ctx, job_type, description, params=None):
+    job_state['bot'] = ctx.bot
+    job = {
+        'id': job_state['next_id'],
+        'type': job_type,
+        'description': description,
+        'guild_id': ctx.guild.id,
+        'channel_id': ctx.channel.id,
+        'message_id': None,
+        'author_id': ctx.author.id,
+        'params': params or {},
+        'state': {},
+        'status': 'queued',
+        'done': 0,
+        'total': 0
+    }
+    job_state['next_id'] += 1
+
+    message = await ctx.send(format_job(job))
+    job['message_id'] = message.id
+    enqueue_job(job)
+    return job
+
+def enqueue_job(job):
+    jobs[job['id']] = job
+    job_queues.setdefault(job['guild_id'], collections.deque()).append(job)
+    save_jobs()
+
+    if job['guild_id'] not in job_workers:
+        job_workers[job['guild_id']] = asyncio.ensure_future(guild_job_worker(job['guild_id']))
+
+async def guild_job_worker(guild_id):
+    if job_state['semaphore'] is None:
+        job_state['semaphore'] = asyncio.Semaphore(JOB_CONCURRENCY)
+
+    queue = job_queues[guild_id]
+    try:
+        while queue:
+            job = queue.popleft()
+            if job['status'] != 'queued':
+                continue
+
+            async with job_state['semaphore']:
+                if job['status'] != 'queued':
+                    continue
+                task = job_tasks[job['id']] = asyncio.ensure_future(run_job(job))
+                try:
+                    await asyncio.wait([task])
+                except asyncio.CancelledError:
+                    task.cancel()
+                    raise
+                finally:
+                    del job_tasks[job['id']]
+
+                # Cancelled by cancel_job before the handler got to run.
+                if task.cancelled():
+                    cancel_requests.discard(job['id'])
+                    finish_job(job, 'cancelled')
+                    await update_job_message(job, force=True)
+    finally:
+        del job_workers[guild_id]
+
+async def run_job(job):
+    guild = job_state['bot'].get_guild(job['guild_id'])
+    job['status'] = 'running'
+    save_jobs()
+    await update_job_message(job, force=True)
+
+    try:
+        if guild is None:
+            raise RuntimeError('Guild is no longer available')
+        await job_handlers[job['type']](job, guild)
+        status = 'done'
+    except asyncio.CancelledError:
+        if job['id'] not in cancel_requests:
+            save_jobs()
+            raise
+        cancel_requests.discard(job['id'])
+        status = 'cancelled'
+    except Exception as e:
+        status = 'failed'
+        job['error'] = str(e)
+
+    finish_job(job, status)
+    await update_job_message(job, force=True)
+
+def finish_job(job, status):
+    job['status'] = status
+    del jobs[job['id']]
+    recent_jobs.setdefault(job['guild_id'], collections.deque(maxlen=10)).append(job)
+    save_jobs()
+
+def resume_jobs(bot):
+    job_state['bot'] = bot
+    if job_state['resumed']:
+        return
+    job_state['resumed'] = True
+
+    saved = load_jobs()
+    job_state['next_id'] = saved.get('next_id', 1)
+    for job in sorted(saved.get('jobs', []), key=lambda job: job['id']):
+        if job['type'] in job_handlers:
+            job['status'] = 'queued'
+            enqueue_job(job)
+
+def cancel_job(job_id):
+    job = jobs[job_id]
+    if job_id in job_tasks:
+        cancel_requests.add(job_id)
+        job_tasks[job_id].cancel()
+        return
+
+    finish_job(job, 'cancelled')
+    asyncio.ensure_future(update_job_message(job, force=True))
@@ -0,0 +1,107 @@
+import asyncio
+import collections
+
+import discord
+
+from grind.cases import log_action
+from grind.config import get_section, get_settings
+from grind.logs import logger, log_fields
+from grind.outbound import request_priority, send_cosmetic
+
+# JOIN PIPELINE
+# on_member_join only queues the member. Each guild gets up to JOIN_WORKERS
+# workers that give every joiner their autoroles (or the jailed role, if they
+# left while jailed) in a single member edit, so a join wave turns into a
+# bounded stream of requests instead of one burst per joiner. Autoroles run at
+# normal priority, so bans during a raid still go first. Welcomes are held for
+# WELCOME_WINDOW seconds and everyone who joined in that time is greeted in
+# one message.
+JOIN_WORKERS = 2
+WELCOME_WINDOW = 5
+WELCOME_MENTIONS_PER_MESSAGE = 40
+
+class GuildJoins:
+    __slots__ = ('queue', 'workers', 'welcomes', 'welcome_task')
+
+    def __init__(self):
+        self.queue = collections.deque()
+        self.workers = set()
+        self.welcomes = []
+        self.welcome_task = None
+
+guild_joins = {}
+
+def enqueue_join(member):
+    joins = guild_joins.get(member.guild.id)
+    if joins is None:
+        joins = guild_joins[member.guild.id] = GuildJoins()
+
+    joins.queue.append(member)
+    if len(joins.workers) < min(JOIN_WORKERS, len(joins.queue)):
+        task = asyncio.ensure_future(join_worker(member.guild, joins))
+        joins.workers.add(task)
+        task.add_done_callback(joins.workers.discard)
+
+async def join_worker(guild, joins):
+    # Workers exit once the queue is empty and are started again by the next
+    # join.
+    while joins.queue:
+        member = joins.queue.popleft()
+        try:
+            await process_join(member, joins)
+        except discord.HTTPException as e:
+            logger.warning("Could not set up joining member: %s", e, extra=log_fields(guild=guild, category='joins', user_id=member.id))
+        except Exception:
+            logger.exception("Join pipeline failed", extra=log_fields(guild=guild, category='joins', user_id=member.id))
+
+async def process_join(member, joins):
+    guild = member.guild
+
+    if member.id in get_section(guild.id, 'jailed').users:
+        jailed_role = guild.get_role(get_settings(guild.id).jailed_role_id or 0)
+        if jailed_role:
+            await member.add_roles(jailed_role, reason="Rejoined while jailed")
+            await log_action(guild, "jail", member, guild.me, "Rejoined while jailed", log_type="jail")
+            return
+
+    welcome = get_section(guild.id, 'welcome')
+    roles = [guild.get_role(role_id) for role_id in welcome.autorole_ids]
+    roles = [role for role in roles if role is not None and role < guild.me.top_role]
+    if roles:
+        with request_priority('normal'):
+            await member.add_roles(*roles, reason="Autorole", atomic=False)
+
+    if welcome.channel_id:
+        joins.welcomes.append(member)
+        if joins.welcome_task is None:
+            joins.welcome_task = asyncio.ensure_future(send_welcomes(guild, joins))
+
+async def send_welcomes(guild, joins):
+    try:
+        await asyncio.sleep(WELCOME_WINDOW)
+    finally:
+        joins.welcome_task = None
+        members, joins.welcomes = joins.welcomes, []
+
+    welcome = get_section(guild.id, 'welcome')
+    channel = guild.get_channel(welcome.channel_id or 0)
+    if channel is None:
+        return
+
+    for start in range(0, len(members), WELCOME_MENTIONS_PER_MESSAGE):
+        batch = members[start:start + WELCOME_MENTIONS_PER_MESSAGE]
+        await send_cosmetic(channel, format_welcome(welcome.message, guild, batch),
+                            allowed_mentions=discord.AllowedMentions(everyone=False, roles=False, users=True))
+
+def format_welcome(message, guild, members):
+    mentions = ', '.join(member.mention for member in members)
+    text = message.replace('{user}', mentions).replace('{server}', guild.name).replace('{count}', str(guild.member_count))
+    if len(text) <= 2000:
+        return text
+
+    # Cut back to before a mention that didn't fit instead of sending half of it.
+    text = text[:2000]
+    cut = text.rfind('<')
+    if cut > text.rfind('>'):
+        text = text[:cut]
+    return text.rstrip(', ')
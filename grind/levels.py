@@ -0,0 +1,139 @@
+import asyncio
+import bisect
+import collections
+import json
+import os
+import random
+import time
+
+# XP is only ever changed in memory. Dirty guilds are written back by
+# the levels cog from a worker thread, and each guild keeps a ranking list
+# sorted by (-xp, user_id) that is updated with bisect, so rank lookups and
+# leaderboard pages never sort.
+XP_PER_MESSAGE = (15, 25)
+XP_COOLDOWN = 60
+XP_FLUSH_INTERVAL = 60
+LEADERBOARD_PAGE_SIZE = 10
+
+class Leaderboard:
+    def __init__(self, xp):
+        self.xp = xp
+        self.ranking = sorted((-amount, user_id) for user_id, amount in xp.items())
+
+    def add(self, user_id, amount):
+        old = self.xp.get(user_id)
+        if old is not None:
+            del self.ranking[bisect.bisect_left(self.ranking, (-old, user_id))]
+
+        new = (old or 0) + amount
+        self.xp[user_id] = new
+        bisect.insort(self.ranking, (-new, user_id))
+        return old or 0, new
+
+    def rank(self, user_id):
+        if user_id not in self.xp:
+            return None
+        return bisect.bisect_left(self.ranking, (-self.xp[user_id], user_id)) + 1
+
+    def page(self, page):
+        start = (page - 1) * LEADERBOARD_PAGE_SIZE
+        return [(start + i + 1, user_id, -amount) for i, (amount, user_id) in enumerate(self.ranking[start:start + LEADERBOARD_PAGE_SIZE])]
+
+class XpCooldowns:
+    # Every cooldown is XP_COOLDOWN long, so the order users were added in is
+    # also the order they expire in and expired users are popped off the front
+    # of the queue on each check.
+    __slots__ = ('until', 'order')
+
+    def __init__(self):
+        self.until = {}
+        self.order = collections.deque()
+
+    def __len__(self):
+        return len(self.until)
+
+    def prune(self, now):
+        while self.order and self.until[self.order[0]] <= now:
+            del self.until[self.order.popleft()]
+
+    def start(self, user_id, now):
+        self.prune(now)
+        if user_id in self.until:
+            return False
+        self.until[user_id] = now + XP_COOLDOWN
+        self.order.append(user_id)
+        return True
+
+leaderboards = {}
+xp_cooldowns = {}
+dirty_xp_guilds = set()
+
+def get_leaderboard(guild_id):
+    leaderboard = leaderboards.get(guild_id)
+    if leaderboard is None:
+        try:
+            with open(f'server_data/levels/{guild_id}.json', 'r') as f:
+                xp = {int(user_id): amount for user_id, amount in json.load(f).items()}
+        except FileNotFoundError:
+            xp = {}
+        leaderboard = leaderboards[guild_id] = Leaderboard(xp)
+    return leaderboard
+
+def write_xp(guild_id, data):
+    os.makedirs('server_data/levels', exist_ok=True)
+    with open(f'server_data/levels/{guild_id}.json.tmp', 'w') as f:
+        f.write(data)
+    os.replace(f'server_data/levels/{guild_id}.json.tmp', f'server_data/levels/{guild_id}.json')
+
+def flush_xp_sync():
+    while dirty_xp_guilds:
+        guild_id = dirty_xp_guilds.pop()
+        if guild_id in leaderboards:
+            write_xp(guild_id, json.dumps(leaderboards[guild_id].xp))
+
+async def flush_xp():
+    loop = asyncio.get_running_loop()
+    while dirty_xp_guilds:
+        guild_id = dirty_xp_guilds.pop()
+        leaderboard = leaderboards.get(guild_id)
+        if leaderboard is None:
+            continue
+        try:
+            await loop.run_in_executor(None, write_xp, guild_id, json.dumps(leaderboard.xp))
+        except OSError:
+            dirty_xp_guilds.add(guild_id)
+            raise
+
+    now = int(time.monotonic())
+    for guild_id, cooldowns in list(xp_cooldowns.items()):
+        cooldowns.prune(now)
+        if not cooldowns:
+            del xp_cooldowns[guild_id]
+
+def level_for_xp(xp):
+    level = 0
+    while xp >= xp_for_next_level(level):
+        xp -= xp_for_next_level(level)
+        level += 1
+    return level, xp
+
+def xp_for_next_level(level):
+    return 5 * level ** 2 + 50 * level + 100
+
+def add_message_xp(message):
+    guild_id = message.guild.id
+    now = int(time.monotonic())
+
+    cooldowns = xp_cooldowns.get(guild_id)
+    if cooldowns is None:
+        cooldowns = xp_cooldowns[guild_id] = XpCooldowns()
+    if not cooldowns.start(message.author.id, now):
+        return None
+
+    old, new = get_leaderboard(guild_id).add(message.author.id, random.randint(*XP_PER_MESSAGE))
+    dirty_xp_guilds.add(guild_id)
+
+    new_level = level_for_xp(new)[0]
+    if new_level > level_for_xp(old)[0]:
+        return new_level
+    return None
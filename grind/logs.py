@@ -0,0 +1,98 @@
+import copy
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+
+# Log calls only put a record on a queue. A QueueListener thread formats the
+# records as JSON lines and writes them to stdout and a rotating file, so a slow
+# pipe or disk never blocks the event loop. Categories listed in
+# LOG_SAMPLE_RATES are only kept at the given rate.
+LOG_PATH = 'logs/grind.log'
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+LOG_SAMPLE_RATES = {
+    'command': 0.25,
+    'voice': 0.1,
+    'outbound': 0.1
+}
+LOG_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+logger = logging.getLogger('grind')
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            'time': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+
+        for field, value in vars(record).items():
+            if field not in LOG_RECORD_ATTRIBUTES and value is not None:
+                data[field] = value
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exception'] = record.exc_text
+
+        return json.dumps(data, default=str)
+
+class SamplingFilter(logging.Filter):
+    def filter(self, record):
+        rate = LOG_SAMPLE_RATES.get(getattr(record, 'category', None))
+        return rate is None or random.random() < rate
+
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # The stock QueueHandler flattens everything into the message string.
+        # Keep the extra fields and only render what can't cross threads.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def setup_logging(level=logging.INFO):
+    os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
+    formatter = JsonFormatter()
+
+    file_handler = logging.handlers.RotatingFileHandler(LOG_PATH, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8')
+    file_handler.setFormatter(formatter)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = StructuredQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter())
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+
+    listener = logging.handlers.QueueListener(log_queue, file_handler, stream_handler)
+    listener.start()
+    return listener
+
+def log_fields(ctx=None, guild=None, category=None, **fields):
+    if ctx is not None:
+        guild = guild or ctx.guild
+        fields.setdefault('channel', ctx.channel.id)
+        fields.setdefault('user', ctx.author.id)
+        if ctx.command:
+            fields.setdefault('command', ctx.command.qualified_name)
+
+    if guild is not None:
+        fields['guild'] = guild.id
+        fields['shard'] = guild.shard_id
+
+    fields['category'] = category
+    return fields
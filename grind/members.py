@@ -0,0 +1,153 @@
+import asyncio
+import collections
+import json
+import os
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+import discord
+
+from grind.config import load_bot_config
+from grind.logs import logger, log_fields
+
+# MEMBER CACHE
+# The policy is read from bot_config.json ("member_cache") when the bot starts:
+#   full   - every guild is chunked at startup and every member stays cached
+#   lazy   - nothing is chunked at startup, a guild is chunked the first time a
+#            moderation command or a role restore needs its members
+#   active - nothing is chunked, only members in voice are cached by discord.py
+#            and the most recently active members are kept in a bounded LRU
+MEMBER_CACHE_POLICIES = ('full', 'lazy', 'active')
+DEFAULT_MEMBER_CACHE = 'full'
+ACTIVE_MEMBER_LIMIT = 5000
+MEMBER_CACHE_REPORT_PATH = 'server_data/member_cache_report.json'
+
+active_members = collections.OrderedDict()
+chunk_tasks = {}
+member_cache_state = {'policy': DEFAULT_MEMBER_CACHE, 'started': time.monotonic(), 'reported': False}
+
+def configured_member_cache_policy():
+    policy = load_bot_config().get('member_cache', DEFAULT_MEMBER_CACHE)
+    if policy not in MEMBER_CACHE_POLICIES:
+        return DEFAULT_MEMBER_CACHE
+    return policy
+
+def member_cache_policy():
+    # The policy the bot was started with, a changed config only applies
+    # after a restart.
+    return member_cache_state['policy']
+
+def member_cache_options(intents):
+    policy = member_cache_state['policy'] = configured_member_cache_policy()
+    if policy == 'full':
+        return {'chunk_guilds_at_startup': True, 'member_cache_flags': discord.MemberCacheFlags.from_intents(intents)}
+    if policy == 'lazy':
+        return {'chunk_guilds_at_startup': False, 'member_cache_flags': discord.MemberCacheFlags.from_intents(intents)}
+
+    # VoiceMaster reads channel.members, which is built from cached members,
+    # so voice members are always kept.
+    return {'chunk_guilds_at_startup': False, 'member_cache_flags': discord.MemberCacheFlags(voice=True, joined=False)}
+
+def remember_member(member):
+    if not isinstance(member, discord.Member) or member_cache_policy() != 'active':
+        return
+
+    key = (member.guild.id, member.id)
+    active_members[key] = member
+    active_members.move_to_end(key)
+    if len(active_members) > ACTIVE_MEMBER_LIMIT:
+        active_members.popitem(last=False)
+
+def get_member(guild, user_id):
+    member = guild.get_member(user_id)
+    if member is None:
+        member = active_members.get((guild.id, user_id))
+    return member
+
+async def ensure_chunked(guild):
+    if member_cache_policy() != 'lazy' or guild.chunked:
+        return
+
+    # Concurrent callers wait on the same chunk request instead of each
+    # asking the gateway for the whole member list.
+    task = chunk_tasks.get(guild.id)
+    if task is None:
+        task = chunk_tasks[guild.id] = asyncio.ensure_future(chunk_guild(guild))
+    await asyncio.shield(task)
+
+async def chunk_guild(guild):
+    start = time.monotonic()
+    try:
+        await guild.chunk(cache=True)
+        logger.info("Chunked guild on demand", extra=log_fields(guild=guild, category='members', members=len(guild.members), latency=round(time.monotonic() - start, 4)))
+    finally:
+        del chunk_tasks[guild.id]
+
+async def resolve_member(guild, user_id):
+    member = get_member(guild, user_id)
+    if member is not None:
+        return member
+
+    await ensure_chunked(guild)
+    member = guild.get_member(user_id)
+    if member is None:
+        try:
+            member = await guild.fetch_member(user_id)
+        except discord.NotFound:
+            return None
+        remember_member(member)
+    return member
+
+def current_rss():
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return peak_rss()
+
+def peak_rss():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def load_member_cache_report():
+    try:
+        with open(MEMBER_CACHE_REPORT_PATH, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def record_member_cache_report(bot, startup_seconds=None):
+    report = load_member_cache_report()
+    policy = member_cache_policy()
+    entry = report.setdefault(policy, {})
+
+    if startup_seconds is not None:
+        entry['startup_seconds'] = round(startup_seconds, 2)
+    entry['rss'] = current_rss()
+    entry['peak_rss'] = peak_rss()
+    entry['cached_members'] = sum(len(guild.members) for guild in bot.guilds) + len(active_members)
+    entry['total_members'] = sum(guild.member_count or 0 for guild in bot.guilds)
+    entry['guilds'] = len(bot.guilds)
+    entry['recorded_at'] = int(time.time())
+
+    os.makedirs('server_data', exist_ok=True)
+    with open(MEMBER_CACHE_REPORT_PATH + '.tmp', 'w') as f:
+        json.dump(report, f, indent=4)
+    os.replace(MEMBER_CACHE_REPORT_PATH + '.tmp', MEMBER_CACHE_REPORT_PATH)
+    return report
+
+def record_startup(bot):
+    # With chunk_guilds_at_startup READY is held back until every guild is
+    # chunked, so the time to on_ready is the startup cost of the policy.
+    if member_cache_state['reported']:
+        return
+    member_cache_state['reported'] = True
+
+    startup_seconds = time.monotonic() - member_cache_state['started']
+    record_member_cache_report(bot, startup_seconds)
+    logger.info("Startup finished", extra=log_fields(category='members', policy=member_cache_policy(), latency=round(startup_seconds, 4), rss=current_rss()))
@@ -0,0 +1,112 @@
+import asyncio
+import time
+
+import discord
+
+from grind.config import get_section, is_server_whitelisted
+from grind.logs import logger, log_fields
+from grind.members import ensure_chunked, resolve_member
+from grind.outbound import request_priority
+from grind.utils import gather_bounded
+
+# FORCED NICKNAMES
+# on_member_update looks the member up in the guild's forced_nicknames map and
+# does nothing else for everyone who isn't in it. A changed nickname is put
+# back after a delay that doubles with every edit the bot had to make (up to
+# FORCENICK_MAX_DELAY), and renames while an edit is pending are folded into
+# it, so a rename war costs a bounded number of edits. On startup only the
+# members in the map are checked, and the lookups and edits run
+# FORCENICK_CONCURRENCY at a time. Members who aren't cached (the active cache
+# policy only keeps a bounded set) are fetched.
+FORCENICK_DELAY = 2
+FORCENICK_MAX_DELAY = 300
+FORCENICK_RESET = 600
+FORCENICK_CONCURRENCY = 4
+
+class NicknameWatch:
+    __slots__ = ('task', 'strikes', 'last_edit')
+
+    def __init__(self):
+        self.task = None
+        self.strikes = 0
+        self.last_edit = 0.0
+
+nickname_watches = {}
+
+def forced_nickname(guild_id, user_id):
+    return get_section(guild_id, 'forced_nicknames').users.get(user_id)
+
+def enforce_nickname(member):
+    forced = forced_nickname(member.guild.id, member.id)
+    if forced is None or member.nick == forced:
+        return
+
+    key = (member.guild.id, member.id)
+    watch = nickname_watches.get(key)
+    if watch is None:
+        watch = nickname_watches[key] = NicknameWatch()
+    if watch.task is not None:
+        return
+
+    if time.monotonic() - watch.last_edit > FORCENICK_RESET:
+        watch.strikes = 0
+    delay = min(FORCENICK_DELAY * 2 ** watch.strikes, FORCENICK_MAX_DELAY)
+    watch.task = asyncio.ensure_future(restore_nickname(member.guild, member.id, watch, delay))
+
+async def restore_nickname(guild, user_id, watch, delay):
+    try:
+        await asyncio.sleep(delay)
+    finally:
+        watch.task = None
+
+    forced = forced_nickname(guild.id, user_id)
+    if forced is None:
+        return
+
+    try:
+        with request_priority('normal'):
+            member = await resolve_member(guild, user_id)
+            if member is None or member.nick == forced:
+                return
+
+            watch.strikes += 1
+            watch.last_edit = time.monotonic()
+            await member.edit(nick=forced, reason="Forced nickname")
+    except discord.HTTPException as e:
+        logger.warning("Could not restore forced nickname: %s", e, extra=log_fields(guild=guild, category='nicknames', user_id=user_id))
+
+def clear_nickname_watch(guild_id, user_id):
+    watch = nickname_watches.pop((guild_id, user_id), None)
+    if watch is not None and watch.task is not None:
+        watch.task.cancel()
+
+async def reconcile_nicknames(guild):
+    forced = get_section(guild.id, 'forced_nicknames').users
+    if not forced:
+        return 0
+
+    await ensure_chunked(guild)
+    with request_priority('normal'):
+        results = await gather_bounded([reconcile_member(guild, user_id, nickname) for user_id, nickname in list(forced.items())], FORCENICK_CONCURRENCY)
+
+    edited = sum(result is True for result in results)
+    failed = sum(isinstance(result, Exception) for result in results)
+    if edited or failed:
+        logger.info("Reconciled forced nicknames", extra=log_fields(guild=guild, category='nicknames', edited=edited, failed=failed))
+    return edited
+
+async def reconcile_member(guild, user_id, nickname):
+    member = await resolve_member(guild, user_id)
+    if member is None or member.nick == nickname:
+        return False
+    await member.edit(nick=nickname, reason="Forced nickname")
+    return True
+
+async def reconcile_all_nicknames(bot):
+    for guild in bot.guilds:
+        if not await is_server_whitelisted(guild):
+            continue
+        try:
+            await reconcile_nicknames(guild)
+        except Exception:
+            logger.exception("Forced nickname reconciliation failed", extra=log_fields(guild=guild, category='nicknames'))
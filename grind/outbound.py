@@ -0,0 +1,223 @@
+import asyncio
+import collections
+import contextlib
+import contextvars
+import functools
+import itertools
+import time
+
+import discord
+
+from grind.logs import logger, log_fields
+
+# OUTBOUND REQUESTS
+# Every REST call goes through bot.http.request, which is wrapped so that only
+# MAX_IN_FLIGHT calls run at once and waiting calls are let through by class:
+# enforcement (bans, kicks, role and member edits) first, then normal traffic,
+# then cosmetic messages like log embeds and confirmations. ENFORCEMENT_RESERVED
+# slots are kept free for enforcement. Cosmetic calls only get a few slots, and
+# are dropped if they wait too long or too many pile up, so a raid's bans never
+# queue behind its log messages.
+# A call still running after STALLED_AFTER seconds is almost always sleeping on
+# a rate limited bucket inside discord.py, so its slot is given back and its
+# bucket (route and major parameters, like discord.py keys them) is marked as
+# stalled. Further calls to a stalled bucket skip the slots and wait in
+# discord.py's own queue for that bucket, so one rate limited channel can't hold
+# up requests to every other bucket.
+REQUEST_CLASSES = ('enforcement', 'normal', 'cosmetic')
+MAX_IN_FLIGHT = 8
+ENFORCEMENT_RESERVED = 2
+STALLED_AFTER = 2
+COSMETIC_IN_FLIGHT = 2
+COSMETIC_MAX_WAIT = 30
+COSMETIC_QUEUE_LIMIT = 200
+
+ENFORCEMENT_ROUTES = {
+    ('PUT', '/guilds/{guild_id}/bans/{user_id}'),
+    ('DELETE', '/guilds/{guild_id}/bans/{user_id}'),
+    ('POST', '/guilds/{guild_id}/bulk-ban'),
+    ('DELETE', '/guilds/{guild_id}/members/{user_id}'),
+    ('PATCH', '/guilds/{guild_id}/members/{user_id}'),
+    ('PUT', '/guilds/{guild_id}/members/{user_id}/roles/{role_id}'),
+    ('DELETE', '/guilds/{guild_id}/members/{user_id}/roles/{role_id}'),
+    ('PUT', '/channels/{channel_id}/permissions/{overwrite_id}'),
+}
+
+current_priority = contextvars.ContextVar('request_priority', default=None)
+
+class RequestDropped(discord.DiscordException):
+    pass
+
+class RequestStats:
+    __slots__ = ('requests', 'dropped', 'stalled', 'total_wait', 'max_wait', 'max_depth')
+
+    def __init__(self):
+        self.requests = 0
+        self.dropped = 0
+        self.stalled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.max_depth = 0
+
+class HeldSlot:
+    __slots__ = ('scheduler', 'name', 'bucket', 'stalled', 'timer')
+
+    def __init__(self, scheduler, name, bucket):
+        self.scheduler = scheduler
+        self.name = name
+        self.bucket = bucket
+        self.stalled = False
+        self.timer = asyncio.get_running_loop().call_later(STALLED_AFTER, self.stall)
+
+    def stall(self):
+        self.stalled = True
+        self.scheduler.stats[self.name].stalled += 1
+        self.scheduler.stalled[self.bucket] += 1
+        self.scheduler.release(self.name)
+
+    def done(self):
+        if not self.stalled:
+            self.timer.cancel()
+            self.scheduler.release(self.name)
+        else:
+            self.scheduler.unstall(self.bucket)
+
+class RequestScheduler:
+    def __init__(self):
+        self.waiters = {name: collections.deque() for name in REQUEST_CLASSES}
+        self.in_flight = collections.Counter()
+        self.stalled = collections.Counter()
+        self.stats = {name: RequestStats() for name in REQUEST_CLASSES}
+        self.sequence = itertools.count()
+
+    def depth(self, name):
+        return len(self.waiters[name])
+
+    def can_start(self, name):
+        total = sum(self.in_flight.values())
+        if total >= MAX_IN_FLIGHT:
+            return False
+        if name == 'enforcement':
+            return True
+        if total - self.in_flight['enforcement'] >= MAX_IN_FLIGHT - ENFORCEMENT_RESERVED:
+            return False
+        return name != 'cosmetic' or self.in_flight['cosmetic'] < COSMETIC_IN_FLIGHT
+
+    async def acquire(self, name, bucket=None):
+        stats = self.stats[name]
+        stats.requests += 1
+
+        if bucket in self.stalled:
+            return False
+
+        # Only jump straight in if nothing of the same or a higher class is
+        # already waiting, otherwise take a place in line.
+        higher = REQUEST_CLASSES[:REQUEST_CLASSES.index(name) + 1]
+        if self.can_start(name) and not any(self.waiters[other] for other in higher):
+            self.in_flight[name] += 1
+            return True
+
+        if name == 'cosmetic' and len(self.waiters[name]) >= COSMETIC_QUEUE_LIMIT:
+            stats.dropped += 1
+            raise RequestDropped('Cosmetic request queue is full')
+
+        waiter = (time.monotonic(), asyncio.get_running_loop().create_future(), bucket)
+        self.waiters[name].append(waiter)
+        stats.max_depth = max(stats.max_depth, len(self.waiters[name]))
+
+        try:
+            held = await waiter[1]
+        except asyncio.CancelledError:
+            if waiter[1].done() and not waiter[1].cancelled() and waiter[1].exception() is None:
+                if waiter[1].result():
+                    self.release(name)
+            elif waiter in self.waiters[name]:
+                self.waiters[name].remove(waiter)
+            raise
+
+        wait = time.monotonic() - waiter[0]
+        stats.total_wait += wait
+        stats.max_wait = max(stats.max_wait, wait)
+        return held
+
+    def release(self, name):
+        self.in_flight[name] -= 1
+        self.wake()
+
+    def unstall(self, bucket):
+        self.stalled[bucket] -= 1
+        if not self.stalled[bucket]:
+            del self.stalled[bucket]
+
+    def wake(self):
+        now = time.monotonic()
+        for name in REQUEST_CLASSES:
+            waiters = self.waiters[name]
+            while waiters and self.can_start(name):
+                queued_at, future, bucket = waiters.popleft()
+                if future.done():
+                    continue
+                if name == 'cosmetic' and now - queued_at > COSMETIC_MAX_WAIT:
+                    self.stats[name].dropped += 1
+                    future.set_exception(RequestDropped('Cosmetic request waited too long'))
+                    continue
+                # Its bucket stalled while it was waiting, it goes on without a slot.
+                if bucket in self.stalled:
+                    future.set_result(False)
+                    continue
+                self.in_flight[name] += 1
+                future.set_result(True)
+
+scheduler = RequestScheduler()
+
+@contextlib.contextmanager
+def request_priority(name):
+    token = current_priority.set(name)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+def request_class(route):
+    name = current_priority.get()
+    if name is not None:
+        return name
+    if (route.method, route.path) in ENFORCEMENT_ROUTES:
+        return 'enforcement'
+    return 'normal'
+
+def install_request_scheduler(bot):
+    http = bot.http
+    if getattr(http.request, 'scheduled', False):
+        return
+
+    original = http.request
+
+    @functools.wraps(original)
+    async def request(route, **kwargs):
+        name = request_class(route)
+        bucket = (route.key, route.major_parameters)
+        if not await scheduler.acquire(name, bucket):
+            # The bucket stays stalled until everything queued on it is done.
+            scheduler.stalled[bucket] += 1
+            try:
+                return await original(route, **kwargs)
+            finally:
+                scheduler.unstall(bucket)
+
+        slot = HeldSlot(scheduler, name, bucket)
+        try:
+            return await original(route, **kwargs)
+        finally:
+            slot.done()
+
+    request.scheduled = True
+    http.request = request
+
+async def send_cosmetic(destination, *args, **kwargs):
+    with request_priority('cosmetic'):
+        try:
+            return await destination.send(*args, **kwargs)
+        except RequestDropped as e:
+            logger.info("Dropped cosmetic message: %s", e, extra=log_fields(guild=getattr(destination, 'guild', None), category='outbound'))
+            return None
@@ -0,0 +1,130 @@
+import asyncio
+import heapq
+import json
+import os
+import time
+
+from grind.logs import logger, log_fields
+
+# Timers (temporary ban/mute/jail expiry and anything else that has to fire
+# later) are kept in one heap and persisted to server_data/timers.json, so they
+# survive both restarts and extension reloads. Handlers are looked up by name
+# when a timer fires, which lets a reloaded cog swap in new handler code.
+TIMER_RETRY_DELAY = 60
+
+timer_handlers = {}
+timers = {}
+timer_keys = {}
+timer_heap = []
+scheduler_state = {'next_id': 1, 'bot': None, 'task': None, 'wakeup': None}
+
+def timer_handler(name):
+    def decorator(func):
+        timer_handlers[name] = func
+        return func
+    return decorator
+
+def load_timers():
+    try:
+        with open('server_data/timers.json', 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'next_id': 1, 'timers': []}
+
+def save_timers():
+    os.makedirs('server_data', exist_ok=True)
+    with open('server_data/timers.json.tmp', 'w') as f:
+        json.dump({'next_id': scheduler_state['next_id'], 'timers': list(timers.values())}, f, indent=4)
+    os.replace('server_data/timers.json.tmp', 'server_data/timers.json')
+
+def _add_timer(timer):
+    timers[timer['id']] = timer
+    if timer.get('key'):
+        timer_keys[timer['key']] = timer['id']
+    heapq.heappush(timer_heap, (timer['due'], timer['id']))
+
+def schedule(name, delay, data, key=None):
+    # A key identifies what the timer is for (e.g. "mute:<guild>:<user>"), so
+    # scheduling the same thing twice replaces the older timer.
+    if key is not None:
+        cancel(key, save=False)
+
+    timer = {'id': scheduler_state['next_id'], 'name': name, 'due': time.time() + delay, 'data': data, 'key': key}
+    scheduler_state['next_id'] += 1
+    _add_timer(timer)
+    save_timers()
+
+    if scheduler_state['wakeup'] is not None:
+        scheduler_state['wakeup'].set()
+    return timer['id']
+
+def cancel(key, save=True):
+    timer_id = timer_keys.pop(key, None)
+    if timer_id is None:
+        return False
+
+    # The heap entry is left behind and skipped when it comes up.
+    timers.pop(timer_id, None)
+    if save:
+        save_timers()
+    return True
+
+def pending(name=None):
+    return [timer for timer in timers.values() if name is None or timer['name'] == name]
+
+def start_scheduler(bot):
+    scheduler_state['bot'] = bot
+    if scheduler_state['task'] is not None:
+        return
+
+    saved = load_timers()
+    scheduler_state['next_id'] = saved.get('next_id', 1)
+    for timer in saved.get('timers', []):
+        _add_timer(timer)
+
+    scheduler_state['wakeup'] = asyncio.Event()
+    scheduler_state['task'] = asyncio.ensure_future(run_scheduler())
+
+async def run_scheduler():
+    wakeup = scheduler_state['wakeup']
+    while True:
+        while timer_heap and timer_heap[0][1] not in timers:
+            heapq.heappop(timer_heap)
+
+        timeout = None
+        if timer_heap:
+            timeout = max(timer_heap[0][0] - time.time(), 0)
+
+        wakeup.clear()
+        try:
+            await asyncio.wait_for(wakeup.wait(), timeout)
+            continue
+        except asyncio.TimeoutError:
+            pass
+
+        now = time.time()
+        while timer_heap and timer_heap[0][0] <= now:
+            due, timer_id = heapq.heappop(timer_heap)
+            timer = timers.get(timer_id)
+            if timer is not None and timer['due'] == due:
+                asyncio.ensure_future(fire_timer(timer))
+
+async def fire_timer(timer):
+    handler = timer_handlers.get(timer['name'])
+    if handler is None:
+        # The extension that owns this timer is not loaded (e.g. mid reload).
+        timer['due'] = time.time() + TIMER_RETRY_DELAY
+        heapq.heappush(timer_heap, (timer['due'], timer['id']))
+        save_timers()
+        return
+
+    try:
+        await handler(scheduler_state['bot'], timer['data'])
+    except Exception:
+        logger.exception("Timer %s failed", timer['name'], extra=log_fields(category='scheduler', guild_id=timer['data'].get('guild_id')))
+    finally:
+        if timers.get(timer['id']) is timer:
+            del timers[timer['id']]
+            if timer.get('key') and timer_keys.get(timer['key']) == timer['id']:
+                del timer_keys[timer['key']]
+            save_timers()
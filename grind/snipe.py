@@ -0,0 +1,79 @@
+import collections
+import time
+
+
+# Deleted and edited messages go into a per-channel ring buffer. Channels are
+# kept in LRU order and the whole structure is capped by an estimated byte
+# budget, so idle channels are dropped first once the budget is reached.
+SNIPE_MEMORY_BUDGET = 4 * 1024 * 1024
+SNIPE_PER_CHANNEL = 25
+SNIPE_MAX_AGE = 2 * 60 * 60
+SNIPE_MAX_CONTENT = 2000
+
+class SnipedMessage:
+    __slots__ = ('author_id', 'author_name', 'author_avatar', 'content', 'attachments', 'timestamp', 'size')
+
+    def __init__(self, message):
+        self.author_id = message.author.id
+        self.author_name = str(message.author)
+        self.author_avatar = message.author.display_avatar.url
+        self.content = message.content[:SNIPE_MAX_CONTENT]
+        self.attachments = tuple((a.filename, a.size, a.content_type) for a in message.attachments)
+        self.timestamp = time.time()
+        self.size = 256 + len(self.content) + len(self.author_avatar) + sum(len(a[0]) + 64 for a in self.attachments)
+
+class SnipeBuffer:
+    def __init__(self, budget=SNIPE_MEMORY_BUDGET, per_channel=SNIPE_PER_CHANNEL, max_age=SNIPE_MAX_AGE):
+        self.budget = budget
+        self.per_channel = per_channel
+        self.max_age = max_age
+        self.channels = collections.OrderedDict()
+        self.size = 0
+
+    def _drop_channel(self, channel_id):
+        entries = self.channels.pop(channel_id)
+        self.size -= sum(entry.size for entry in entries)
+
+    def _expire(self, channel_id, entries):
+        cutoff = time.time() - self.max_age
+        while entries and entries[0].timestamp < cutoff:
+            self.size -= entries.popleft().size
+        if not entries:
+            del self.channels[channel_id]
+
+    def push(self, channel_id, entry):
+        entries = self.channels.get(channel_id)
+        if entries is None:
+            entries = self.channels[channel_id] = collections.deque()
+        else:
+            self.channels.move_to_end(channel_id)
+
+        if len(entries) >= self.per_channel:
+            self.size -= entries.popleft().size
+        entries.append(entry)
+        self.size += entry.size
+
+        # The least recently used channel is the cheapest place to look for
+        # stale entries, so expire it on every push to keep idle channels from
+        # lingering until the budget is hit.
+        oldest_id = next(iter(self.channels))
+        if oldest_id != channel_id:
+            self._expire(oldest_id, self.channels[oldest_id])
+
+        while self.size > self.budget and len(self.channels) > 1:
+            self._drop_channel(next(iter(self.channels)))
+
+    def get(self, channel_id, index):
+        entries = self.channels.get(channel_id)
+        if not entries:
+            return None, 0
+
+        self._expire(channel_id, entries)
+        if index < 1 or index > len(entries):
+            return None, len(entries)
+
+        self.channels.move_to_end(channel_id)
+        return entries[-index], len(entries)
+
+deleted_snipes = SnipeBuffer()
+edited_snipes = SnipeBuffer()
@@ -0,0 +1,80 @@
+import bisect
+import collections
+
+# GUILD STATS
+# serverinfo and userinfo read aggregates that are built from guild.members
+# once and then kept up to date by member join, leave, update and presence
+# events. Join positions are a list of (joined_at, member_id) kept sorted with
+# bisect, the same way the XP leaderboard is, so a member's join rank is a
+# binary search instead of a sort. Stats are dropped whenever a guild becomes
+# unavailable, since events may have been missed, and rebuilt on next use.
+guild_stats = {}
+
+def join_key(member):
+    joined_at = member.joined_at or member.created_at
+    return (joined_at.timestamp(), member.id)
+
+class GuildStats:
+    __slots__ = ('bots', 'statuses', 'roles', 'joins')
+
+    def __init__(self, members):
+        self.bots = 0
+        self.statuses = collections.Counter()
+        self.roles = collections.Counter()
+        self.joins = []
+        for member in members:
+            self.count(member, 1)
+        self.joins = sorted(join_key(member) for member in members)
+
+    def count(self, member, delta):
+        if member.bot:
+            self.bots += delta
+        self.statuses[str(member.status)] += delta
+        for role in member.roles:
+            self.roles[role.id] += delta
+
+    def add(self, member):
+        self.count(member, 1)
+        bisect.insort(self.joins, join_key(member))
+
+    def remove(self, member):
+        self.count(member, -1)
+        key = join_key(member)
+        index = bisect.bisect_left(self.joins, key)
+        if index < len(self.joins) and self.joins[index] == key:
+            del self.joins[index]
+
+    def update_roles(self, before, after):
+        if before.roles == after.roles:
+            return
+        before_ids = {role.id for role in before.roles}
+        after_ids = {role.id for role in after.roles}
+        for role_id in before_ids - after_ids:
+            self.roles[role_id] -= 1
+        for role_id in after_ids - before_ids:
+            self.roles[role_id] += 1
+
+    def update_status(self, before, after):
+        if before.status != after.status:
+            self.statuses[str(before.status)] -= 1
+            self.statuses[str(after.status)] += 1
+
+    def join_rank(self, member):
+        key = join_key(member)
+        index = bisect.bisect_left(self.joins, key)
+        if index < len(self.joins) and self.joins[index] == key:
+            return index + 1
+        return None
+
+def get_guild_stats(guild):
+    stats = guild_stats.get(guild.id)
+    if stats is None:
+        stats = guild_stats[guild.id] = GuildStats(guild.members)
+    return stats
+
+def tracked_stats(guild):
+    # Events only keep existing stats current, they never build them.
+    return guild_stats.get(guild.id)
+
+def drop_guild_stats(guild):
+    guild_stats.pop(guild.id, None)
@@ -0,0 +1,119 @@
+import asyncio
+import datetime
+
+from discord.ext import commands
+
+from grind.config import OWNER_ID, get_section
+
+def parse_duration(duration_str):
+    if duration_str.lower() == 'infinite':
+        return None
+    
+    unit = duration_str[-1].lower()
+    try:
+        amount = int(duration_str[:-1])
+    except ValueError:
+        return None
+    
+    if unit == 's':
+        return datetime.timedelta(seconds=amount)
+    elif unit == 'm':
+        return datetime.timedelta(minutes=amount)
+    elif unit == 'h':
+        return datetime.timedelta(hours=amount)
+    elif unit == 'd':
+        return datetime.timedelta(days=amount)
+    elif unit == 'y':
+        return datetime.timedelta(days=amount*365)
+    
+    return None
+
+def check_role_hierarchy(ctx, target_member):
+    bot_member = ctx.guild.me
+    bot_highest_role = bot_member.top_role
+
+    if bot_highest_role.position <= target_member.top_role.position:
+        return False, "Bot's role is too low to perform this action. Please move the bot's role higher in the server hierarchy."
+
+    if ctx.author.top_role.position <= target_member.top_role.position:
+        return False, "You cannot moderate a member with an equal or higher role than yours."
+
+    return True, ""
+
+def save_user_roles(member, section='user_roles'):
+    snapshots = get_section(member.guild.id, section)
+    snapshots.users[member.id] = tuple(role.id for role in member.roles if role != member.guild.default_role)
+    snapshots.save()
+
+def restore_user_roles(member, section='user_roles'):
+    snapshots = get_section(member.guild.id, section)
+    
+    role_ids = snapshots.users.pop(member.id, None)
+    if role_ids is None:
+        return []
+    
+    snapshots.save()
+    
+    roles = [member.guild.get_role(role_id) for role_id in role_ids]
+    return [role for role in roles if role is not None]
+
+def custom_check_permissions(ctx):
+    if not hasattr(ctx.command, 'requires_permissions'):
+        return True
+    
+    required_perm = ctx.command.requires_permissions
+    
+    permission_map = {
+        'ban_members': 'ban_members',
+        'kick_members': 'kick_members',
+        'manage_messages': 'manage_messages',
+        'manage_roles': 'manage_roles',
+        'manage_channels': 'manage_channels',
+        'administrator': 'administrator',
+        'manage_guild': 'manage_guild',
+        'manage_nicknames': 'manage_nicknames'
+    }
+    
+    discord_perm_attr = permission_map.get(required_perm)
+    if discord_perm_attr and getattr(ctx.author.guild_permissions, discord_perm_attr, False):
+        return True
+    
+    fake_perms = get_section(ctx.guild.id, 'fake_permissions').roles
+    
+    for role in ctx.author.roles:
+        if required_perm in fake_perms.get(role.id, ()):
+            return True
+    
+    return False
+
+def requires_permission(permission):
+    def decorator(func):
+        func.requires_permissions = permission
+        return func
+    return decorator
+
+def is_owner():
+    async def predicate(ctx):
+        return ctx.author.id == OWNER_ID
+    return commands.check(predicate)
+
+def is_guild_owner():
+    async def predicate(ctx):
+        return ctx.guild is not None and ctx.author.id in (ctx.guild.owner_id, OWNER_ID)
+    return commands.check(predicate)
+
+async def gather_bounded(coros, limit):
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(run(coro) for coro in coros), return_exceptions=True)
+
+def format_size(size):
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
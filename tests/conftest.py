@@ -0,0 +1,12 @@
+import pytest
+
+from grind import config
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    # Everything in grind reads and writes server_data/ relative to the working
+    # directory, so every test gets an empty one and a fresh section cache.
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, 'guild_sections', {})
+    monkeypatch.setattr(config, 'bot_config_cache', {})
+    return tmp_path
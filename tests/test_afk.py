@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+import pytest
+
+from grind import afk
+from grind.config import get_section
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(afk.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(afk, 'notice_cooldowns', {})
+    monkeypatch.setattr(afk, 'notice_order', afk.collections.deque())
+    return now
+
+def mention(channel_id, *user_ids):
+    return SimpleNamespace(guild=SimpleNamespace(id=1), channel=SimpleNamespace(id=channel_id), author=SimpleNamespace(id=99),
+                           mentions=[SimpleNamespace(id=user_id) for user_id in user_ids])
+
+def noticed(message):
+    return [member.id for member, _ in afk.afk_notices(message)]
+
+def test_each_afk_user_is_announced_once_per_cooldown_and_channel(clock):
+    get_section(1, 'afk').users.update({5: {'reason': 'lunch', 'since': 0}, 6: {'reason': 'sleep', 'since': 0}})
+
+    assert noticed(mention(10, 5, 6, 7)) == [5, 6]
+    clock[0] += 10
+    assert noticed(mention(10, 5)) == []
+    assert noticed(mention(11, 5)) == [5]
+
+    clock[0] += afk.AFK_NOTICE_COOLDOWN - 10
+    assert noticed(mention(10, 6)) == [6]
+    assert list(afk.notice_order) == [(11, 5), (10, 6)]
+    assert set(afk.notice_cooldowns) == {(11, 5), (10, 6)}
@@ -0,0 +1,112 @@
+import asyncio
+import functools
+from types import SimpleNamespace
+
+import discord
+import pytest
+
+from grind import antinuke
+from grind.antinuke import ActionWindow, record_action, strip_member, unstrip_member
+from grind.config import get_section
+from grind.utils import restore_user_roles, save_user_roles
+
+@pytest.fixture(autouse=True)
+def fresh_windows(monkeypatch):
+    monkeypatch.setattr(antinuke, 'action_windows', antinuke.collections.OrderedDict())
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(antinuke.time, 'monotonic', lambda: now[0])
+    return now
+
+def make_entry(user_id, action=discord.AuditLogAction.channel_delete):
+    guild = SimpleNamespace(id=1, owner_id=100, me=SimpleNamespace(id=200))
+    return SimpleNamespace(guild=guild, user_id=user_id, action=action)
+
+def enable(limit=3, window=10, trusted=()):
+    settings = get_section(1, 'antinuke')
+    settings.enabled = True
+    settings.limit = limit
+    settings.window = window
+    settings.trusted = set(trusted)
+
+def test_window_weights_the_previous_bucket():
+    window = ActionWindow(0)
+    assert window.add(0, 10) == 1
+    assert window.add(5, 10) == 2
+    assert window.add(15, 10) == 2.0
+    assert window.add(40, 10) == 1
+
+def test_limit_triggers_once_then_resets(clock):
+    enable(limit=3)
+    assert [record_action(make_entry(5)) for _ in range(3)] == [False, False, True]
+    assert record_action(make_entry(5)) is False
+
+def test_actions_spread_out_do_not_trigger(clock):
+    enable(limit=3, window=10)
+    results = []
+    for _ in range(6):
+        results.append(record_action(make_entry(5)))
+        clock[0] += 11
+    assert not any(results)
+
+def test_actors_are_counted_separately(clock):
+    enable(limit=2)
+    assert [record_action(make_entry(user_id)) for user_id in (5, 6, 5)] == [False, False, True]
+
+@pytest.mark.parametrize('user_id', [100, 200, 7])
+def test_owner_bot_and_trusted_users_are_ignored(clock, user_id):
+    enable(limit=1, trusted=[7])
+    assert record_action(make_entry(user_id)) is False
+
+def test_disabled_or_unwatched_actions_are_ignored(clock):
+    assert record_action(make_entry(5)) is False
+    enable(limit=1)
+    assert record_action(make_entry(5, discord.AuditLogAction.message_delete)) is False
+
+def test_window_map_is_bounded(clock, monkeypatch):
+    monkeypatch.setattr(antinuke, 'ACTION_WINDOW_LIMIT', 3)
+    enable(limit=10)
+    for user_id in range(10):
+        record_action(make_entry(user_id))
+    assert list(antinuke.action_windows) == [(1, 7), (1, 8), (1, 9)]
+
+@functools.total_ordering
+class Role:
+    def __init__(self, role_id, position):
+        self.id = role_id
+        self.position = position
+        self.managed = False
+
+    def is_default(self):
+        return self.position == 0
+
+    def __lt__(self, other):
+        return self.position < other.position
+
+class Member:
+    def __init__(self, roles):
+        everyone = Role(1, 0)
+        self.id = 50
+        self.roles = [everyone] + roles
+        self.guild = SimpleNamespace(id=1, default_role=everyone, me=SimpleNamespace(top_role=Role(2, 100)), get_role=lambda role_id: self.known[role_id])
+        self.known = {role.id: role for role in self.roles}
+
+    async def edit(self, roles, reason):
+        self.known.update((role.id, role) for role in roles)
+        self.roles = [self.guild.default_role] + roles
+
+def test_stripping_a_jailed_member_keeps_the_jail_snapshot():
+    staff, helper, jailed = Role(10, 5), Role(11, 4), Role(12, 3)
+    member = Member([staff, helper])
+    member.known[jailed.id] = jailed
+
+    async def main():
+        save_user_roles(member)
+        await member.edit(roles=[jailed], reason='jail')
+        assert await strip_member(member, 'strip') == [jailed]
+        assert await unstrip_member(member, 'unstrip') == [jailed]
+
+    asyncio.run(main())
+    assert restore_user_roles(member) == [staff, helper]
@@ -0,0 +1,88 @@
+import re
+
+import pytest
+
+from grind.autoresponder import Matcher, required_literal, validate_trigger
+from grind.config import AutoresponderTriggers
+
+def make_matcher(*triggers, previous=None):
+    section = AutoresponderTriggers(1, {'triggers': {
+        trigger_id: {'type': trigger_type, 'pattern': pattern, 'response': f'r{trigger_id}', 'cooldown': 5}
+        for trigger_id, (trigger_type, pattern) in enumerate(triggers, 1)
+    }})
+    return Matcher(section, previous)
+
+def response(matcher, content):
+    slot = matcher.match(content)
+    return None if slot is None else matcher.trigger(slot)['response']
+
+def test_exact_prefix_and_contains():
+    matcher = make_matcher(('exact', 'Hello'), ('prefix', 'good morn'), ('contains', 'pizza'))
+
+    assert response(matcher, '  hello ') == 'r1'
+    assert response(matcher, 'hello there') is None
+    assert response(matcher, 'Good morning all') == 'r2'
+    assert response(matcher, 'all good morning') is None
+    assert response(matcher, 'who wants PIZZA?') == 'r3'
+    assert response(matcher, 'nothing here') is None
+
+def test_older_trigger_wins_overlaps():
+    matcher = make_matcher(('contains', 'cat'), ('contains', 'category'))
+    assert response(matcher, 'a category') == 'r1'
+
+def test_longest_prefix_wins():
+    matcher = make_matcher(('prefix', 'hi'), ('prefix', 'hi there'))
+    assert response(matcher, 'hi there friend') == 'r2'
+    assert response(matcher, 'hi you') == 'r1'
+
+def test_gated_and_ungated_regexes():
+    matcher = make_matcher(('regex', r'\bhello+\b'), ('regex', r'^\d{3}-\d{4}$'))
+
+    assert response(matcher, 'well HELLOOO there') == 'r1'
+    assert response(matcher, 'hellno') is None
+    assert response(matcher, '555-1234') == 'r2'
+    assert response(matcher, '555-12345') is None
+
+def test_matches_agree_with_a_linear_scan():
+    triggers = [('contains', 'foo'), ('prefix', 'bar'), ('regex', r'ba[zr]+\d'), ('regex', r'qu+x'), ('exact', 'x')]
+    matcher = make_matcher(*triggers)
+    for content in ('foo', 'barn', 'a bazz9', 'quuux!', 'x', 'nope', 'bar9', 'qx'):
+        found = matcher.match(content) is not None
+        scanned = any(
+            content.lower().strip() == pattern if kind == 'exact' else
+            content.lower().startswith(pattern) if kind == 'prefix' else
+            pattern in content.lower() if kind == 'contains' else
+            re.search(pattern, content, re.IGNORECASE) is not None
+            for kind, pattern in triggers
+        )
+        assert found == scanned, content
+
+@pytest.mark.parametrize('pattern, literal', [
+    (r'\bhello+\b', 'hello'),
+    (r'good (morning|night)', 'good '),
+    (r'a|bcdef', None),
+    (r'[abc]xyz', 'xyz'),
+    (r'[^]]abcd', 'abcd'),
+    (r'ab?cd', None),
+])
+def test_required_literal(pattern, literal):
+    assert required_literal(pattern) == literal
+
+@pytest.mark.parametrize('pattern', [r'(a+)+$', r'.*foo', r'a*', r'(?P<x>a)', r'(a)\1', r'(unclosed'])
+def test_dangerous_or_unsupported_regexes_are_rejected(pattern):
+    assert validate_trigger('regex', pattern, 'hi') is not None
+
+def test_valid_triggers_pass():
+    assert validate_trigger('regex', r'\bhey+\b', 'hi') is None
+    assert validate_trigger('contains', 'anything', 'hi') is None
+    assert validate_trigger('glob', 'x', 'hi') is not None
+
+def test_cooldowns_survive_a_rebuild():
+    matcher = make_matcher(('contains', 'a'), ('contains', 'b'))
+    assert matcher.ready(1, 100)
+    assert not matcher.ready(1, 102)
+
+    rebuilt = make_matcher(('contains', 'a'), ('contains', 'b'), ('contains', 'c'), previous=matcher)
+    assert not rebuilt.ready(1, 103)
+    assert rebuilt.ready(1, 106)
+    assert rebuilt.ready(2, 103)
@@ -0,0 +1,53 @@
+import asyncio
+import json
+import os
+
+from grind import backup, levels
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+def read(path):
+    with open(path) as f:
+        return json.load(f)
+
+def test_sources_cover_every_durable_store():
+    for path in ('bot_config.json', 'server_data/timers.json', 'server_data/jobs.json', 'server_data/5.json', 'server_data/6/core.json',
+                 'server_data/lockdown/6.json', 'server_data/levels/6.json', 'server_data/cases/6.meta.json', 'server_data/member_cache_report.json'):
+        write(path, {})
+    os.makedirs('server_data/cases/archive')
+    for path in ('server_data/cases/6.jsonl', 'server_data/cases/archive/6.jsonl.gz', 'server_data/5.json.migrated', 'server_data/6/core.json.tmp'):
+        open(path, 'w').close()
+
+    assert sorted(backup.backup_sources()) == sorted([
+        'bot_config.json', 'server_data/timers.json', 'server_data/jobs.json', 'server_data/5.json', 'server_data/6/core.json',
+        'server_data/lockdown/6.json', 'server_data/levels/6.json', 'server_data/cases/6.jsonl', 'server_data/cases/6.meta.json',
+        'server_data/cases/archive/6.jsonl.gz'
+    ])
+    assert [backup.backup_guild(path) for path in ('server_data/5.json', 'server_data/6/core.json', 'server_data/levels/6.json',
+                                                   'server_data/cases/6.meta.json', 'server_data/cases/archive/6.jsonl.gz',
+                                                   'server_data/timers.json', 'bot_config.json')] == [5, 6, 6, 6, 6, None, None]
+
+def test_restoring_a_guild_leaves_timers_for_the_command_line(monkeypatch):
+    monkeypatch.setattr(levels, 'leaderboards', {6: levels.Leaderboard({1: 10})})
+    monkeypatch.setattr(levels, 'dirty_xp_guilds', {6})
+    monkeypatch.setattr(backup, 'leaderboards', levels.leaderboards)
+    monkeypatch.setattr(backup, 'dirty_xp_guilds', levels.dirty_xp_guilds)
+    write('server_data/levels/6.json', {'1': 50})
+    write('server_data/timers.json', {'timers': ['before']})
+
+    async def main():
+        assert (await backup.create_backup())[1] == 2
+        write('server_data/levels/6.json', {'1': 70})
+        write('server_data/timers.json', {'timers': ['after']})
+        assert await backup.restore_backup(6) == 1
+
+    asyncio.run(main())
+    assert read('server_data/levels/6.json') == {'1': 50}
+    assert read('server_data/timers.json') == {'timers': ['after']}
+    assert levels.leaderboards == {} and levels.dirty_xp_guilds == set()
+
+    backup.restore_snapshot()
+    assert read('server_data/timers.json') == {'timers': ['before']}
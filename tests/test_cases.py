@@ -0,0 +1,149 @@
+import asyncio
+import gzip
+import json
+import os
+import time
+
+import pytest
+
+from grind import cases
+from grind.cases import CASES_PER_PAGE, CaseIndex, get_case_index
+
+DAY = 86400
+
+@pytest.fixture(autouse=True)
+def fresh_indexes(monkeypatch):
+    monkeypatch.setattr(cases, 'case_indexes', {})
+    monkeypatch.setattr(cases, 'load_tasks', {})
+
+def new_case(user_id, moderator_id=1, action='ban', age=0):
+    return {'action': action, 'user_id': user_id, 'user': str(user_id), 'moderator_id': moderator_id, 'reason': None, 'duration': None, 'timestamp': int(time.time() - age)}
+
+def archived_cases(server_id='1'):
+    with gzip.open(f'server_data/cases/archive/{server_id}.jsonl.gz', 'rt') as f:
+        return [json.loads(line)['case'] for line in f]
+
+def reload(server_id='1'):
+    index = CaseIndex(server_id)
+    index.load()
+    return index
+
+def test_append_numbers_cases_and_indexes_them():
+    index = reload()
+    for user_id in (10, 20, 10):
+        index.append(new_case(user_id, action='kick' if user_id == 20 else 'ban'))
+
+    assert index.last_case == 3
+    assert index.by_user == {10: [1, 3], 20: [2]}
+    assert index.moderator_counts == {1: {'ban': 2, 'kick': 1}}
+    assert index.get(2)['user_id'] == 20
+    assert index.get(4) is None
+
+def test_index_is_rebuilt_from_the_log():
+    index = reload()
+    for user_id in range(5):
+        index.append(new_case(user_id))
+
+    loaded = reload()
+    assert loaded.last_case == 5
+    assert loaded.offsets == index.offsets
+    assert loaded.by_moderator == {1: [1, 2, 3, 4, 5]}
+
+def test_partially_written_last_case_is_dropped():
+    index = reload()
+    for user_id in (1, 2):
+        index.append(new_case(user_id))
+    size = os.path.getsize(index.path)
+    with open(index.path, 'ab') as f:
+        f.write(b'{"action": "ban", "user_id": 3, "us')
+
+    loaded = reload()
+    assert sorted(loaded.offsets) == [1, 2]
+    assert os.path.getsize(index.path) == size
+    assert loaded.append(new_case(3)) == 3
+    assert reload().get(3)['user_id'] == 3
+
+def test_pages_are_newest_first():
+    index = reload()
+    for _ in range(CASES_PER_PAGE + 3):
+        index.append(new_case(7))
+
+    cases_for_user = index.by_user[7]
+    assert [record['case'] for record in index.page(cases_for_user, 1)] == list(range(CASES_PER_PAGE + 3, 3, -1))
+    assert [record['case'] for record in index.page(cases_for_user, 2)] == [3, 2, 1]
+    assert index.page(cases_for_user, 3) == []
+
+def test_load_archives_expired_cases():
+    index = reload()
+    for age in (200 * DAY, 190 * DAY, 0, 0):
+        index.append(new_case(5, age=age))
+
+    loaded = reload()
+    assert archived_cases() == [1, 2]
+    assert loaded.archived_through == 2
+    assert loaded.first_case == 3
+    assert sorted(loaded.offsets) == [3, 4]
+    assert loaded.by_user == {5: [3, 4]}
+    assert loaded.get(3)['case'] == 3
+    assert json.load(open('server_data/cases/1.meta.json')) == {'last_case': 4, 'archived_through': 2}
+
+def test_cases_archived_before_a_crash_are_not_archived_again():
+    index = reload()
+    for age in (200 * DAY, 0):
+        index.append(new_case(5, age=age))
+    with open(index.path, 'rb') as f:
+        log = f.read()
+
+    reload()
+    # The archive and meta were written but the log was never rewritten.
+    with open(index.path, 'wb') as f:
+        f.write(log)
+
+    loaded = reload()
+    assert archived_cases() == [1]
+    assert sorted(loaded.offsets) == [2]
+
+def test_interrupted_archive_append_is_rolled_back():
+    index = reload()
+    index.append(new_case(5, age=200 * DAY))
+    reload()
+    size = os.path.getsize(index.archive_path)
+
+    with open(index.meta_path, 'w') as f:
+        json.dump({'last_case': 1, 'archived_through': 1, 'archive_size': size}, f)
+    with open(index.archive_path, 'ab') as f:
+        f.write(b'\x1f\x8b half a gzip member')
+
+    reload()
+    assert os.path.getsize(index.archive_path) == size
+    assert archived_cases() == [1]
+    assert 'archive_size' not in json.load(open(index.meta_path))
+
+def test_concurrent_lookups_share_one_load():
+    index = reload()
+    index.append(new_case(5))
+
+    async def main():
+        first, second = await asyncio.gather(get_case_index(1), get_case_index('1'))
+        assert first is second
+        assert cases.load_tasks == {}
+        assert await get_case_index(1) is first
+
+    asyncio.run(main())
+
+def test_scheduled_compaction_keeps_cases_logged_meanwhile():
+    index = cases.case_indexes['1'] = CaseIndex('1')
+    for age in (200 * DAY, 200 * DAY, 0):
+        index.append(new_case(5, age=age))
+
+    guild = type('Guild', (), {'id': 1})
+    moderator = type('Moderator', (), {'id': 2})
+
+    async def main():
+        return await asyncio.gather(cases.compact_case_indexes(), *(cases.record_case(guild, 'warning', moderator, moderator) for _ in range(3)))
+
+    assert asyncio.run(main())[1:] == [4, 5, 6]
+    assert archived_cases() == [1, 2]
+    assert sorted(index.offsets) == [3, 4, 5, 6]
+    assert [index.get(case)['case'] for case in (3, 6)] == [3, 6]
+    assert sorted(reload().offsets) == [3, 4, 5, 6]
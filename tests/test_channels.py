@@ -0,0 +1,23 @@
+from types import SimpleNamespace
+
+import discord
+import pytest
+from discord.ext import commands
+
+from cogs.channels import Channels
+
+def run_checks(command, **permissions):
+    ctx = SimpleNamespace(permissions=discord.Permissions(**permissions))
+    for check in command.checks:
+        check(ctx)
+
+def test_purge_requires_manage_messages():
+    with pytest.raises(commands.MissingPermissions):
+        run_checks(Channels.purge, send_messages=True)
+    run_checks(Channels.purge, manage_messages=True)
+
+@pytest.mark.parametrize('command', [Channels.lockdown, Channels.unlockdown, Channels.hide, Channels.unhide])
+def test_lockdown_commands_require_manage_channels(command):
+    with pytest.raises(commands.MissingPermissions):
+        run_checks(command, manage_messages=True)
+    run_checks(command, manage_channels=True)
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from grind import jobs
+
+@pytest.fixture(autouse=True)
+def fresh_jobs(monkeypatch):
+    monkeypatch.setattr(jobs, 'jobs', {})
+    monkeypatch.setattr(jobs, 'job_queues', {})
+    monkeypatch.setattr(jobs, 'job_workers', {})
+    monkeypatch.setattr(jobs, 'job_tasks', {})
+    monkeypatch.setattr(jobs, 'cancel_requests', set())
+    monkeypatch.setattr(jobs, 'recent_jobs', {})
+    monkeypatch.setattr(jobs, 'job_handlers', {})
+    bot = SimpleNamespace(get_guild=lambda guild_id: SimpleNamespace(id=guild_id), get_channel=lambda channel_id: None)
+    monkeypatch.setattr(jobs, 'job_state', {'next_id': 1, 'semaphore': None, 'last_save': 0, 'resumed': False, 'bot': bot})
+    return bot
+
+def make_job(job_id, guild_id=1, job_type='test', params=None):
+    return {'id': job_id, 'type': job_type, 'description': 'test', 'guild_id': guild_id, 'channel_id': 1, 'message_id': None,
+            'author_id': 1, 'params': params or {}, 'state': {}, 'status': 'queued', 'done': 0, 'total': 0}
+
+async def drain():
+    while jobs.job_workers:
+        await asyncio.gather(*jobs.job_workers.values())
+
+def finished(guild_id=1):
+    return {job['id']: job['status'] for job in jobs.recent_jobs.get(guild_id, [])}
+
+def test_jobs_in_a_guild_run_one_at_a_time_in_order():
+    events = []
+
+    @jobs.job_handler('test')
+    async def handler(job, guild):
+        events.append(('start', job['id']))
+        await asyncio.sleep(0.01)
+        events.append(('end', job['id']))
+
+    async def main():
+        for job_id in (1, 2, 3):
+            jobs.enqueue_job(make_job(job_id))
+        await drain()
+
+    asyncio.run(main())
+    assert events == [(edge, job_id) for job_id in (1, 2, 3) for edge in ('start', 'end')]
+    assert finished() == {1: 'done', 2: 'done', 3: 'done'}
+
+def test_guilds_share_the_concurrency_limit():
+    running = []
+    peak = []
+
+    @jobs.job_handler('test')
+    async def handler(job, guild):
+        running.append(job['id'])
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(job['id'])
+
+    async def main():
+        for guild_id in range(1, jobs.JOB_CONCURRENCY + 3):
+            jobs.enqueue_job(make_job(guild_id, guild_id=guild_id))
+        await drain()
+
+    asyncio.run(main())
+    assert max(peak) == jobs.JOB_CONCURRENCY
+    assert len(peak) == jobs.JOB_CONCURRENCY + 2
+
+def test_failures_are_recorded():
+    @jobs.job_handler('test')
+    async def handler(job, guild):
+        raise RuntimeError('missing permissions')
+
+    async def main():
+        jobs.enqueue_job(make_job(1))
+        await drain()
+
+    asyncio.run(main())
+    assert finished() == {1: 'failed'}
+    assert jobs.recent_jobs[1][0]['error'] == 'missing permissions'
+
+def test_cancel_running_and_queued_jobs():
+    started = []
+
+    @jobs.job_handler('test')
+    async def handler(job, guild):
+        started.append(job['id'])
+        await asyncio.sleep(10)
+
+    async def main():
+        jobs.enqueue_job(make_job(1))
+        jobs.enqueue_job(make_job(2))
+        await asyncio.sleep(0.01)
+        jobs.cancel_job(2)
+        jobs.cancel_job(1)
+        await drain()
+
+    asyncio.run(main())
+    assert started == [1]
+    assert finished() == {1: 'cancelled', 2: 'cancelled'}
+    assert jobs.jobs == {}
+
+def test_unfinished_jobs_resume_after_a_restart(fresh_jobs):
+    os.makedirs('server_data')
+    with open('server_data/jobs.json', 'w') as f:
+        json.dump({'next_id': 8, 'jobs': [dict(make_job(7), status='running', state={'unbanned': 40})]}, f)
+
+    resumed = []
+
+    @jobs.job_handler('test')
+    async def handler(job, guild):
+        resumed.append(job['state'])
+
+    async def main():
+        jobs.resume_jobs(fresh_jobs)
+        await drain()
+
+    asyncio.run(main())
+    assert resumed == [{'unbanned': 40}]
+    assert jobs.job_state['next_id'] == 8
+    with open('server_data/jobs.json') as f:
+        assert json.load(f)['jobs'] == []
+
+def test_shutdown_keeps_running_and_waiting_jobs_for_resume():
+    @jobs.job_handler('test')
+    async def handler(job, guild):
+        job['state']['step'] = 1
+        await asyncio.sleep(10)
+
+    guild_ids = range(1, jobs.JOB_CONCURRENCY + 2)
+
+    async def main():
+        for guild_id in guild_ids:
+            jobs.enqueue_job(make_job(guild_id, guild_id=guild_id))
+        await asyncio.sleep(0.01)
+        tasks = list(jobs.job_workers.values()) + list(jobs.job_tasks.values())
+        for worker in list(jobs.job_workers.values()):
+            worker.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(main())
+    assert jobs.recent_jobs == {}
+    assert sorted(jobs.jobs) == list(guild_ids)
+    with open('server_data/jobs.json') as f:
+        saved = {job['id']: (job['status'], job['state']) for job in json.load(f)['jobs']}
+    assert saved == {guild_id: ('running', {'step': 1}) if guild_id <= jobs.JOB_CONCURRENCY else ('queued', {}) for guild_id in guild_ids}
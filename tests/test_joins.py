@@ -0,0 +1,19 @@
+from types import SimpleNamespace
+
+from grind.joins import format_welcome
+
+def make_members(count):
+    return [SimpleNamespace(mention=f'<@{100000000000000000 + user_id}>') for user_id in range(count)]
+
+def test_placeholders_are_filled_in():
+    guild = SimpleNamespace(name='Grind', member_count=42)
+    assert format_welcome('Welcome to {server}, {user}! You are member {count}.', guild, make_members(2)) == \
+        'Welcome to Grind, <@100000000000000000>, <@100000000000000001>! You are member 42.'
+
+def test_long_messages_are_cut_between_mentions():
+    guild = SimpleNamespace(name='Grind', member_count=42)
+    text = format_welcome('Hi {user} {user}', guild, make_members(60))
+
+    assert len(text) <= 2000
+    assert text.endswith('>')
+    assert text.count('<') == text.count('>')
@@ -0,0 +1,58 @@
+import asyncio
+import json
+import os
+import random
+
+from grind import levels
+from grind.levels import LEADERBOARD_PAGE_SIZE, Leaderboard, XpCooldowns, level_for_xp, xp_for_next_level
+
+def test_ranks_follow_xp_then_user_id():
+    leaderboard = Leaderboard({1: 50, 2: 100, 3: 50})
+
+    assert [leaderboard.rank(user_id) for user_id in (2, 1, 3)] == [1, 2, 3]
+    assert leaderboard.rank(4) is None
+
+def test_add_moves_a_user_up():
+    leaderboard = Leaderboard({1: 50, 2: 100})
+
+    assert leaderboard.add(1, 60) == (50, 110)
+    assert leaderboard.add(3, 5) == (0, 5)
+    assert [leaderboard.rank(user_id) for user_id in (1, 2, 3)] == [1, 2, 3]
+
+def test_ranking_matches_a_full_sort():
+    rng = random.Random(1)
+    leaderboard = Leaderboard({})
+    for _ in range(2000):
+        leaderboard.add(rng.randrange(300), rng.randint(15, 25))
+
+    expected = sorted(leaderboard.xp, key=lambda user_id: (-leaderboard.xp[user_id], user_id))
+    assert [leaderboard.rank(user_id) for user_id in expected] == list(range(1, len(expected) + 1))
+    assert [user_id for _, user_id, _ in leaderboard.page(2)] == expected[LEADERBOARD_PAGE_SIZE:2 * LEADERBOARD_PAGE_SIZE]
+    assert leaderboard.page(2)[0][0] == LEADERBOARD_PAGE_SIZE + 1
+
+def test_levels():
+    assert level_for_xp(0) == (0, 0)
+    assert level_for_xp(xp_for_next_level(0)) == (1, 0)
+    assert level_for_xp(xp_for_next_level(0) + xp_for_next_level(1) - 1) == (1, xp_for_next_level(1) - 1)
+
+def test_flush_writes_dirty_guilds(monkeypatch):
+    monkeypatch.setattr(levels, 'leaderboards', {1: Leaderboard({5: 40}), 2: Leaderboard({6: 10})})
+    monkeypatch.setattr(levels, 'dirty_xp_guilds', {1})
+
+    asyncio.run(levels.flush_xp())
+    with open('server_data/levels/1.json') as f:
+        assert json.load(f) == {'5': 40}
+    assert levels.dirty_xp_guilds == set()
+    assert not os.path.exists('server_data/levels/2.json')
+
+def test_cooldowns_expire_in_order():
+    cooldowns = XpCooldowns()
+    assert cooldowns.start(1, 0)
+    assert cooldowns.start(2, 30)
+    assert not cooldowns.start(1, 59)
+
+    assert cooldowns.start(1, 60)
+    assert list(cooldowns.order) == [2, 1]
+    cooldowns.prune(90)
+    assert cooldowns.until == {1: 120}
+    assert len(cooldowns) == 1
@@ -0,0 +1,45 @@
+import asyncio
+from types import SimpleNamespace
+
+import discord
+
+from grind import members
+from grind.config import get_section
+from grind.nicknames import reconcile_nicknames
+
+class Member:
+    def __init__(self, user_id, nick):
+        self.id = user_id
+        self.nick = nick
+
+    async def edit(self, nick, reason):
+        self.nick = nick
+
+class Guild:
+    id = 1
+    shard_id = 0
+    chunked = False
+
+    def __init__(self, cached, remote):
+        self.cached = cached
+        self.remote = remote
+        self.fetched = []
+
+    def get_member(self, user_id):
+        return self.cached.get(user_id)
+
+    async def fetch_member(self, user_id):
+        self.fetched.append(user_id)
+        if user_id not in self.remote:
+            raise discord.NotFound(SimpleNamespace(status=404, reason='Not Found'), 'Unknown Member')
+        return self.remote[user_id]
+
+def test_reconcile_fetches_members_that_are_not_cached(monkeypatch):
+    monkeypatch.setitem(members.member_cache_state, 'policy', 'active')
+    cached, remote = Member(10, 'wrong'), Member(11, 'also wrong')
+    guild = Guild({10: cached}, {11: remote})
+    get_section(1, 'forced_nicknames').users.update({10: 'ten', 11: 'eleven', 12: 'gone'})
+
+    assert asyncio.run(reconcile_nicknames(guild)) == 2
+    assert (cached.nick, remote.nick) == ('ten', 'eleven')
+    assert guild.fetched == [11, 12]
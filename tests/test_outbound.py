@@ -0,0 +1,131 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from discord.http import Route
+
+from grind import outbound
+from grind.outbound import ENFORCEMENT_RESERVED, MAX_IN_FLIGHT, RequestDropped, RequestScheduler, install_request_scheduler, request_priority
+
+@pytest.fixture(autouse=True)
+def fresh_scheduler(monkeypatch):
+    monkeypatch.setattr(outbound, 'scheduler', RequestScheduler())
+
+def make_bot(blocked):
+    started = []
+
+    async def request(route, **kwargs):
+        started.append(route.method)
+        # Stands in for discord.py sleeping on a rate limited bucket.
+        gate = blocked.get(route.method) or blocked.get(route.major_parameters)
+        if gate is not None:
+            await gate.wait()
+        return route.method
+
+    bot = SimpleNamespace(http=SimpleNamespace(request=request))
+    install_request_scheduler(bot)
+    return bot, started
+
+def message_route(channel_id=1):
+    return Route('POST', '/channels/{channel_id}/messages', channel_id=channel_id)
+
+def ban_route():
+    return Route('PUT', '/guilds/{guild_id}/bans/{user_id}', guild_id=1, user_id=2)
+
+def test_enforcement_gets_through_saturated_normal_queue():
+    async def main():
+        gate = asyncio.Event()
+        bot, started = make_bot({'POST': gate})
+        sends = [asyncio.ensure_future(bot.http.request(message_route())) for _ in range(40)]
+        await asyncio.sleep(0)
+
+        assert await asyncio.wait_for(bot.http.request(ban_route()), 1) == 'PUT'
+        assert started.count('POST') == MAX_IN_FLIGHT - ENFORCEMENT_RESERVED
+        assert outbound.scheduler.depth('normal') == 40 - started.count('POST')
+
+        gate.set()
+        assert await asyncio.gather(*sends) == ['POST'] * 40
+
+    asyncio.run(main())
+
+def test_enforcement_can_use_every_slot():
+    async def main():
+        gate = asyncio.Event()
+        bot, started = make_bot({'PUT': gate})
+        bans = [asyncio.ensure_future(bot.http.request(ban_route())) for _ in range(MAX_IN_FLIGHT + 2)]
+        await asyncio.sleep(0)
+
+        assert started.count('PUT') == MAX_IN_FLIGHT
+        gate.set()
+        await asyncio.gather(*bans)
+
+    asyncio.run(main())
+
+def test_waiting_enforcement_goes_before_waiting_normal():
+    async def main():
+        gates = {'POST': asyncio.Event(), 'PUT': asyncio.Event()}
+        bot, started = make_bot(gates)
+        bans = [asyncio.ensure_future(bot.http.request(ban_route())) for _ in range(MAX_IN_FLIGHT)]
+        await asyncio.sleep(0)
+        sends = [asyncio.ensure_future(bot.http.request(message_route())) for _ in range(3)]
+        late_ban = asyncio.ensure_future(bot.http.request(ban_route()))
+        await asyncio.sleep(0)
+
+        gates['PUT'].set()
+        await asyncio.gather(*bans, late_ban)
+        assert started[MAX_IN_FLIGHT] == 'PUT'
+
+        gates['POST'].set()
+        await asyncio.gather(*sends)
+
+    asyncio.run(main())
+
+def test_cosmetic_requests_are_dropped_when_the_queue_is_full(monkeypatch):
+    monkeypatch.setattr(outbound, 'COSMETIC_QUEUE_LIMIT', 2)
+
+    async def main():
+        gate = asyncio.Event()
+        bot, started = make_bot({'POST': gate})
+        with request_priority('cosmetic'):
+            sends = [asyncio.ensure_future(bot.http.request(message_route())) for _ in range(5)]
+            await asyncio.sleep(0)
+
+        results = await asyncio.gather(*sends[-1:], return_exceptions=True)
+        assert isinstance(results[0], RequestDropped)
+        assert outbound.scheduler.stats['cosmetic'].dropped == 1
+
+        gate.set()
+        await asyncio.gather(*sends[:-1])
+
+    asyncio.run(main())
+
+def test_stalled_bucket_gives_back_its_slots(monkeypatch):
+    monkeypatch.setattr(outbound, 'STALLED_AFTER', 0.05)
+
+    async def main():
+        gate = asyncio.Event()
+        bot, started = make_bot({'1': gate})
+        stuck = [asyncio.ensure_future(bot.http.request(message_route(1))) for _ in range(40)]
+        await asyncio.sleep(0)
+        assert started.count('POST') == MAX_IN_FLIGHT - ENFORCEMENT_RESERVED
+
+        # Before the bucket is marked as stalled other channels wait in line.
+        other = asyncio.ensure_future(bot.http.request(message_route(2)))
+        await asyncio.sleep(0.1)
+        assert other.done()
+        assert sum(outbound.scheduler.in_flight.values()) == 0
+        assert outbound.scheduler.depth('normal') == 0
+        assert outbound.scheduler.stalled == {('POST /channels/{channel_id}/messages', '1'): 40}
+
+        # New calls to the stalled bucket go straight through, others get slots.
+        assert await asyncio.wait_for(bot.http.request(message_route(3)), 1) == 'POST'
+        late = asyncio.ensure_future(bot.http.request(message_route(1)))
+        await asyncio.sleep(0)
+        assert sum(outbound.scheduler.in_flight.values()) == 0
+        assert outbound.scheduler.stalled[('POST /channels/{channel_id}/messages', '1')] == 41
+
+        gate.set()
+        await asyncio.gather(*stuck, late)
+        assert outbound.scheduler.stalled == {}
+
+    asyncio.run(main())
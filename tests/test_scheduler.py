@@ -0,0 +1,100 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from grind import scheduler
+
+@pytest.fixture(autouse=True)
+def fresh_scheduler(monkeypatch):
+    monkeypatch.setattr(scheduler, 'timers', {})
+    monkeypatch.setattr(scheduler, 'timer_keys', {})
+    monkeypatch.setattr(scheduler, 'timer_heap', [])
+    monkeypatch.setattr(scheduler, 'scheduler_state', {'next_id': 1, 'bot': None, 'task': None, 'wakeup': None})
+    monkeypatch.setattr(scheduler, 'timer_handlers', {})
+
+def saved_timers():
+    with open('server_data/timers.json') as f:
+        return json.load(f)['timers']
+
+def test_scheduling_a_key_again_replaces_the_timer():
+    scheduler.schedule('unmute', 60, {'user_id': 1}, key='mute:1:1')
+    scheduler.schedule('unmute', 120, {'user_id': 1}, key='mute:1:1')
+
+    assert len(scheduler.pending('unmute')) == 1
+    assert [timer['id'] for timer in saved_timers()] == [2]
+    assert scheduler.cancel('mute:1:1')
+    assert not scheduler.cancel('mute:1:1')
+    assert saved_timers() == []
+
+def test_timers_fire_in_due_order():
+    fired = []
+
+    @scheduler.timer_handler('test')
+    async def handler(bot, data):
+        fired.append((bot, data['name']))
+
+    async def main():
+        scheduler.start_scheduler('bot')
+        scheduler.schedule('test', 0.05, {'name': 'late'})
+        scheduler.schedule('test', 0.01, {'name': 'early'}, key='early')
+        await asyncio.sleep(0.2)
+
+    asyncio.run(main())
+    assert fired == [('bot', 'early'), ('bot', 'late')]
+    assert scheduler.timers == {} and scheduler.timer_keys == {}
+    assert saved_timers() == []
+
+def test_cancelled_timers_do_not_fire():
+    fired = []
+
+    @scheduler.timer_handler('test')
+    async def handler(bot, data):
+        fired.append(data)
+
+    async def main():
+        scheduler.start_scheduler(None)
+        scheduler.schedule('test', 0.02, {}, key='k')
+        scheduler.cancel('k')
+        await asyncio.sleep(0.1)
+
+    asyncio.run(main())
+    assert fired == []
+
+def test_timers_are_loaded_on_start():
+    scheduler.schedule('test', 60, {'user_id': 5}, key='k')
+    scheduler.timers.clear()
+    scheduler.timer_keys.clear()
+    scheduler.timer_heap.clear()
+
+    async def main():
+        scheduler.start_scheduler(None)
+        assert [timer['data'] for timer in scheduler.pending('test')] == [{'user_id': 5}]
+        assert scheduler.cancel('k')
+
+    asyncio.run(main())
+
+def test_timer_without_a_handler_is_retried_later():
+    async def main():
+        scheduler.start_scheduler(None)
+        scheduler.schedule('unloaded', 0, {})
+        await asyncio.sleep(0.05)
+
+    asyncio.run(main())
+    [timer] = scheduler.pending('unloaded')
+    assert timer['due'] > time.time() + scheduler.TIMER_RETRY_DELAY - 5
+
+def test_failing_handler_still_clears_the_timer():
+    @scheduler.timer_handler('broken')
+    async def handler(bot, data):
+        raise RuntimeError('boom')
+
+    async def main():
+        scheduler.start_scheduler(None)
+        scheduler.schedule('broken', 0, {'guild_id': 1}, key='b')
+        await asyncio.sleep(0.05)
+
+    asyncio.run(main())
+    assert scheduler.pending() == []
+    assert scheduler.timer_keys == {}
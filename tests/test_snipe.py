@@ -0,0 +1,54 @@
+import time
+
+from grind.snipe import SnipeBuffer
+
+class Entry:
+    def __init__(self, content, size=100, age=0):
+        self.content = content
+        self.size = size
+        self.timestamp = time.time() - age
+
+def test_newest_entry_is_first():
+    buffer = SnipeBuffer()
+    for content in ('a', 'b', 'c'):
+        buffer.push(1, Entry(content))
+
+    assert buffer.get(1, 1)[0].content == 'c'
+    assert buffer.get(1, 3)[0].content == 'a'
+    assert buffer.get(1, 4) == (None, 3)
+    assert buffer.get(2, 1) == (None, 0)
+
+def test_channels_are_capped():
+    buffer = SnipeBuffer(per_channel=2)
+    for content in ('a', 'b', 'c'):
+        buffer.push(1, Entry(content))
+
+    assert [buffer.get(1, index)[0].content for index in (1, 2)] == ['c', 'b']
+    assert buffer.size == 200
+
+def test_budget_drops_least_recently_used_channel():
+    buffer = SnipeBuffer(budget=300)
+    buffer.push(1, Entry('a'))
+    buffer.push(2, Entry('b'))
+    buffer.get(1, 1)
+    buffer.push(3, Entry('c'))
+    buffer.push(3, Entry('d'))
+
+    assert list(buffer.channels) == [1, 3]
+    assert buffer.size == 300
+
+def test_old_entries_expire():
+    buffer = SnipeBuffer(max_age=60)
+    buffer.push(1, Entry('old', age=120))
+    buffer.push(1, Entry('new'))
+
+    assert buffer.get(1, 1)[0].content == 'new'
+    assert buffer.get(1, 2) == (None, 1)
+
+def test_idle_channels_expire_on_push():
+    buffer = SnipeBuffer(max_age=60)
+    buffer.push(1, Entry('old', age=120))
+    buffer.push(2, Entry('new'))
+
+    assert 1 not in buffer.channels
+    assert buffer.size == 100
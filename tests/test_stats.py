@@ -0,0 +1,48 @@
+import datetime
+from types import SimpleNamespace
+
+from grind.stats import GuildStats
+
+START = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+def make_member(member_id, days=0, bot=False, status='online', roles=()):
+    joined_at = START + datetime.timedelta(days=days)
+    return SimpleNamespace(id=member_id, bot=bot, status=status, roles=[SimpleNamespace(id=role_id) for role_id in roles], joined_at=joined_at, created_at=joined_at)
+
+def test_counts_from_members():
+    stats = GuildStats([make_member(1, roles=[10]), make_member(2, bot=True, status='offline', roles=[10, 11])])
+
+    assert stats.bots == 1
+    assert stats.statuses == {'online': 1, 'offline': 1}
+    assert stats.roles == {10: 2, 11: 1}
+
+def test_join_rank_follows_join_date():
+    members = [make_member(1, days=5), make_member(2, days=1), make_member(3, days=3)]
+    stats = GuildStats(members)
+
+    assert [stats.join_rank(member) for member in members] == [3, 1, 2]
+
+def test_add_and_remove_keep_ranks_current():
+    first, late = make_member(1, days=1), make_member(2, days=10)
+    stats = GuildStats([first, late])
+    newcomer = make_member(3, days=5, bot=True)
+
+    stats.add(newcomer)
+    assert stats.join_rank(newcomer) == 2
+    assert stats.join_rank(late) == 3
+    assert stats.bots == 1
+
+    stats.remove(first)
+    assert stats.join_rank(newcomer) == 1
+    assert stats.join_rank(first) is None
+    assert len(stats.joins) == 2
+
+def test_role_and_status_updates():
+    before = make_member(1, roles=[10, 11])
+    after = make_member(1, status='dnd', roles=[11, 12])
+    stats = GuildStats([before])
+
+    stats.update_roles(before, after)
+    stats.update_status(before, after)
+    assert +stats.roles == {11: 1, 12: 1}
+    assert +stats.statuses == {'dnd': 1}
@@ -0,0 +1,116 @@
+import argparse
+import os
+import random
+import re
+import string
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from grind.autoresponder import MAX_MATCH_LENGTH, Matcher, validate_trigger
+from grind.config import AutoresponderTriggers
+
+# Compares the compiled autoresponder matcher against checking every trigger
+# in turn, for one guild with a few thousand triggers.
+#
+#   python tools/autoresponder_bench.py --triggers 5000 --regex 100
+REGEX_TEMPLATES = (
+    r'\b{word}s?\b',
+    r'{word}\d+',
+    r'(?:hey|hi) {word}',
+    r'{word}[!?.]+$',
+)
+
+def random_word(rng, length=None):
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(length or rng.randint(4, 10)))
+
+def build_triggers(rng, count, regexes):
+    kinds = ['exact', 'prefix', 'contains']
+    triggers = {}
+    for trigger_id in range(1, count + 1):
+        if trigger_id <= regexes:
+            kind = 'regex'
+            pattern = rng.choice(REGEX_TEMPLATES).format(word=random_word(rng))
+        else:
+            kind = kinds[trigger_id % len(kinds)]
+            pattern = ' '.join(random_word(rng) for _ in range(rng.randint(1, 3)))
+        triggers[trigger_id] = {'type': kind, 'pattern': pattern, 'response': f'response {trigger_id}', 'cooldown': 0}
+    return triggers
+
+def build_messages(rng, triggers, count):
+    by_type = {}
+    for trigger in triggers.values():
+        by_type.setdefault(trigger['type'], []).append(trigger['pattern'])
+
+    filler = lambda words: ' '.join(random_word(rng) for _ in range(words))
+    messages = {
+        'miss (short)': [filler(8) for _ in range(count)],
+        'miss (2000 chars)': [filler(400)[:MAX_MATCH_LENGTH] for _ in range(count)],
+        'exact hit': [rng.choice(by_type['exact']) for _ in range(count)],
+        'prefix hit': [f"{rng.choice(by_type['prefix'])} {filler(8)}" for _ in range(count)],
+        'contains hit': [f"{filler(20)} {rng.choice(by_type['contains'])} {filler(20)}" for _ in range(count)],
+    }
+    if 'regex' in by_type:
+        words = [re.search(r'[a-z]{4,}', pattern).group() for pattern in by_type['regex'] if '\\d' not in pattern and '$' not in pattern and 'hey' not in pattern]
+        messages['regex hit'] = [f"{filler(20)} {rng.choice(words)} {filler(20)}" for _ in range(count)]
+    return messages
+
+def linear_match(triggers, compiled, content):
+    content = content[:MAX_MATCH_LENGTH]
+    text = content.lower()
+    for trigger_id, trigger in triggers.items():
+        pattern = trigger['pattern'].lower()
+        if trigger['type'] == 'exact' and text.strip() == pattern:
+            return trigger_id
+        if trigger['type'] == 'prefix' and text.startswith(pattern):
+            return trigger_id
+        if trigger['type'] == 'contains' and pattern in text:
+            return trigger_id
+        if trigger['type'] == 'regex' and compiled[trigger_id].search(content):
+            return trigger_id
+    return None
+
+def measure(match, messages):
+    timings = []
+    for message in messages:
+        start = time.perf_counter()
+        match(message)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1e6, timings[min(int(len(timings) * 0.99), len(timings) - 1)] * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark autoresponder matching.')
+    parser.add_argument('--triggers', type=int, default=5000)
+    parser.add_argument('--regex', type=int, default=100, help='how many of the triggers are regexes')
+    parser.add_argument('--messages', type=int, default=500, help='messages per kind')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    triggers = build_triggers(rng, args.triggers, args.regex)
+
+    start = time.perf_counter()
+    rejected = sum(1 for trigger in triggers.values() if validate_trigger(trigger['type'], trigger['pattern'], trigger['response']))
+    validation = time.perf_counter() - start
+
+    section = AutoresponderTriggers(0, {'next_id': args.triggers + 1, 'triggers': triggers})
+    start = time.perf_counter()
+    matcher = Matcher(section)
+    compile_time = time.perf_counter() - start
+
+    compiled = {trigger_id: re.compile(trigger['pattern'], re.IGNORECASE) for trigger_id, trigger in triggers.items() if trigger['type'] == 'regex'}
+    messages = build_messages(rng, triggers, args.messages)
+
+    print(f"{args.triggers} triggers ({args.regex} regex), {rejected} rejected by validation")
+    print(f"validation {validation * 1000:.1f}ms  compile {compile_time * 1000:.1f}ms  cooldowns {matcher.cooldowns.itemsize * len(matcher.cooldowns)} bytes")
+    print(f"\n{'messages':<20}{'compiled p50':>14}{'p99':>10}{'linear p50':>14}{'p99':>10}")
+    for kind, batch in messages.items():
+        compiled_p50, compiled_p99 = measure(matcher.match, batch)
+        linear_p50, linear_p99 = measure(lambda content: linear_match(triggers, compiled, content), batch)
+        print(f"{kind:<20}{compiled_p50:>12.1f}us{compiled_p99:>8.1f}us{linear_p50:>12.1f}us{linear_p99:>8.1f}us")
+
+if __name__ == '__main__':
+    main()
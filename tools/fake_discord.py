@@ -0,0 +1,473 @@
+import asyncio
+import collections
+import datetime
+import itertools
+import json
+import re
+import time
+import zlib
+
+from aiohttp import WSMsgType, web
+
+# A stand-in for the Discord REST API and gateway, just complete enough to run
+# the real bot against. Everything lives in memory: one guild with a set of
+# fake members, text channels and roles. REST calls are recorded so the load
+# generator can count them, and can optionally be slowed down or rate limited
+# with the same headers and 429 bodies discord.py handles from the real API.
+DISCORD_EPOCH = 1420070400000
+HEARTBEAT_INTERVAL = 41250
+BOT_PERMISSIONS = str((1 << 41) - 1)
+
+# (method, route pattern) -> (requests, per seconds). Anything not listed
+# falls back to DEFAULT_RATE_LIMIT, keyed by the route's major parameter.
+RATE_LIMITS = {
+    ('POST', '/channels/{channel_id}/messages'): (5, 5),
+    ('PATCH', '/guilds/{guild_id}/members/{user_id}'): (10, 10),
+    ('PUT', '/guilds/{guild_id}/members/{user_id}/roles/{role_id}'): (10, 10),
+    ('POST', '/guilds/{guild_id}/channels'): (5, 10),
+}
+DEFAULT_RATE_LIMIT = (50, 1)
+
+class Snowflakes:
+    def __init__(self):
+        self.counter = itertools.count()
+
+    def __call__(self):
+        return ((int(time.time() * 1000) - DISCORD_EPOCH) << 22) | (next(self.counter) & 0x3FFFFF)
+
+def json_response(data, status=200, headers=None):
+    # discord.py only decodes bodies whose content type is exactly
+    # application/json, without the charset aiohttp would add.
+    return web.Response(body=json.dumps(data).encode(), status=status, headers={**(headers or {}), 'Content-Type': 'application/json'})
+
+def timestamp():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+class RateLimiter:
+    def __init__(self):
+        self.buckets = {}
+
+    def hit(self, method, route, major):
+        limit, per = RATE_LIMITS.get((method, route), DEFAULT_RATE_LIMIT)
+        key = (method, route, major)
+        now = time.monotonic()
+
+        reset_at, remaining = self.buckets.get(key, (now + per, limit))
+        if now >= reset_at:
+            reset_at, remaining = now + per, limit
+
+        headers = {
+            'X-RateLimit-Limit': str(limit),
+            'X-RateLimit-Bucket': f'{method}:{route}',
+            'X-RateLimit-Reset': f'{time.time() + reset_at - now:.3f}',
+            'X-RateLimit-Reset-After': f'{reset_at - now:.3f}',
+            'X-RateLimit-Scope': 'user',
+        }
+
+        if remaining <= 0:
+            headers['X-RateLimit-Remaining'] = '0'
+            headers['Retry-After'] = f'{reset_at - now:.3f}'
+            return False, reset_at - now, headers
+
+        self.buckets[key] = (reset_at, remaining - 1)
+        headers['X-RateLimit-Remaining'] = str(remaining - 1)
+        return True, 0, headers
+
+class Expectation:
+    # Resolved by the first REST call matching method and path, which lets a
+    # workload time an injected event until the bot's visible reaction to it.
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.started = time.monotonic()
+        self.future = asyncio.get_running_loop().create_future()
+
+class FakeDiscord:
+    def __init__(self, members=1000, text_channels=5, rest_latency=0.0, gateway_latency=0.0, rate_limits=False):
+        self.snowflake = Snowflakes()
+        self.rest_latency = rest_latency
+        self.gateway_latency = gateway_latency
+        self.rate_limiter = RateLimiter() if rate_limits else None
+
+        self.requests = collections.Counter()
+        self.rate_limited = 0
+        self.expectations = []
+        self.sockets = set()
+        self.routes = []
+        self.runner = None
+        self.url = None
+
+        self.application_id = self.snowflake()
+        self.bot_user = self.make_user('grind', bot=True)
+        self.owner = self.make_user('owner')
+        self.users = {self.bot_user['id']: self.bot_user, self.owner['id']: self.owner}
+
+        self.guild_id = str(self.snowflake())
+        self.everyone_role = self.make_role(self.guild_id, '@everyone', 0, permissions='1024')
+        self.admin_role = self.make_role(self.snowflake(), 'Admin', 2, permissions=BOT_PERMISSIONS)
+        self.bot_role = self.make_role(self.snowflake(), 'grind', 3, permissions=BOT_PERMISSIONS)
+        self.roles = {role['id']: role for role in (self.everyone_role, self.admin_role, self.bot_role)}
+
+        self.channels = {}
+        self.text_channels = [self.make_channel(f'general-{i}', 0) for i in range(text_channels)]
+
+        self.members = {}
+        self.add_member(self.bot_user, [self.bot_role['id']])
+        self.add_member(self.owner, [self.admin_role['id']])
+        for i in range(members):
+            self.add_member(self.make_user(f'member{i}'), [])
+        self.voice_states = {}
+
+        self.add_routes()
+
+    # Fake entities
+
+    def make_user(self, name, bot=False):
+        user = {'id': str(self.snowflake()), 'username': name, 'global_name': name, 'discriminator': '0', 'avatar': None, 'bot': bot}
+        if hasattr(self, 'users'):
+            self.users[user['id']] = user
+        return user
+
+    def make_role(self, role_id, name, position, permissions='0'):
+        return {
+            'id': str(role_id), 'name': name, 'position': position, 'permissions': permissions, 'color': 0,
+            'hoist': False, 'managed': False, 'mentionable': False, 'flags': 0
+        }
+
+    def make_channel(self, name, channel_type, parent_id=None, **fields):
+        channel = {
+            'id': str(self.snowflake()), 'type': channel_type, 'guild_id': self.guild_id, 'name': name,
+            'position': len(self.channels), 'permission_overwrites': [], 'parent_id': parent_id, 'nsfw': False
+        }
+        if channel_type == 2:
+            channel.update({'bitrate': 64000, 'user_limit': 0, 'rtc_region': None})
+        channel.update(fields)
+        self.channels[channel['id']] = channel
+        return channel
+
+    def add_member(self, user, roles):
+        self.members[user['id']] = {
+            'user': user, 'roles': roles, 'joined_at': timestamp(), 'deaf': False, 'mute': False,
+            'nick': None, 'flags': 0, 'pending': False, 'communication_disabled_until': None
+        }
+        return self.members[user['id']]
+
+    def guild_payload(self):
+        # Like a large guild on the real gateway, only the bot and members in
+        # voice come with GUILD_CREATE, the rest has to be chunked.
+        members = [self.members[user_id] for user_id in {self.bot_user['id'], *self.voice_states}]
+        return {
+            'id': self.guild_id, 'name': 'Load Test', 'icon': None, 'owner_id': self.owner['id'],
+            'roles': list(self.roles.values()), 'channels': list(self.channels.values()),
+            'members': members,
+            'member_count': len(self.members), 'voice_states': list(self.voice_states.values()),
+            'presences': [], 'emojis': [], 'stickers': [], 'threads': [], 'stage_instances': [],
+            'guild_scheduled_events': [], 'soundboard_sounds': [], 'features': [], 'large': len(self.members) > 250,
+            'unavailable': False, 'verification_level': 0, 'default_message_notifications': 0,
+            'explicit_content_filter': 0, 'mfa_level': 0, 'nsfw_level': 0, 'premium_tier': 0,
+            'preferred_locale': 'en-US', 'system_channel_flags': 0, 'afk_timeout': 300,
+            'joined_at': timestamp()
+        }
+
+    def message_payload(self, channel_id, author, content, **fields):
+        message = {
+            'id': str(self.snowflake()), 'channel_id': str(channel_id), 'guild_id': self.guild_id,
+            'author': author, 'content': content, 'timestamp': timestamp(), 'edited_timestamp': None,
+            'tts': False, 'mention_everyone': False, 'mentions': [], 'mention_roles': [],
+            'attachments': [], 'embeds': [], 'pinned': False, 'type': 0, 'flags': 0
+        }
+        member = self.members.get(author['id'])
+        if member:
+            message['member'] = {key: value for key, value in member.items() if key != 'user'}
+        message.update(fields)
+        return message
+
+    # Gateway
+
+    async def dispatch(self, event, data):
+        for socket in list(self.sockets):
+            await socket.send_dispatch(event, data)
+
+    async def send_message(self, channel_id, author, content):
+        mentions = []
+        for user_id in re.findall(r'<@!?(\d+)>', content):
+            if user_id in self.members:
+                member = self.members[user_id]
+                mentions.append(dict(member['user'], member={key: value for key, value in member.items() if key != 'user'}))
+        message = self.message_payload(channel_id, author, content, mentions=mentions)
+        await self.dispatch('MESSAGE_CREATE', message)
+        return message
+
+    async def join_voice(self, user_id, channel_id):
+        state = {
+            'guild_id': self.guild_id, 'channel_id': channel_id, 'user_id': user_id,
+            'member': self.members[user_id], 'session_id': 'loadtest', 'deaf': False, 'mute': False,
+            'self_deaf': False, 'self_mute': False, 'self_video': False, 'suppress': False, 'request_to_speak_timestamp': None
+        }
+        if channel_id is None:
+            self.voice_states.pop(user_id, None)
+        else:
+            self.voice_states[user_id] = state
+        await self.dispatch('VOICE_STATE_UPDATE', state)
+
+    async def gateway_handler(self, request):
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        socket = GatewaySocket(self, ws, request.query.get('compress'))
+        await socket.run()
+        return ws
+
+    # REST
+
+    def add_routes(self):
+        route = self.route
+        route('GET', '/gateway/bot', lambda m, body: {'url': self.url.replace('http', 'ws', 1), 'shards': 1, 'session_start_limit': {'total': 1000, 'remaining': 1000, 'reset_after': 0, 'max_concurrency': 1}})
+        route('GET', '/gateway', lambda m, body: {'url': self.url.replace('http', 'ws', 1)})
+        route('GET', '/users/@me', lambda m, body: self.bot_user)
+        route('GET', '/oauth2/applications/@me', self.application_info)
+        route('GET', '/applications/@me', self.application_info)
+        route('GET', '/users/{user_id}', lambda m, body: self.users.get(m['user_id']))
+        route('POST', '/users/@me/channels', lambda m, body: {'id': str(self.snowflake()), 'type': 1, 'recipients': [self.users.get(body.get('recipient_id'), self.owner)]})
+        route('POST', '/channels/{channel_id}/messages', self.create_message)
+        route('PATCH', '/channels/{channel_id}/messages/{message_id}', lambda m, body: self.message_payload(m['channel_id'], self.bot_user, body.get('content') or '', id=m['message_id']))
+        route('DELETE', '/channels/{channel_id}/messages/{message_id}', lambda m, body: None)
+        route('POST', '/channels/{channel_id}/messages/bulk-delete', lambda m, body: None)
+        route('GET', '/channels/{channel_id}/messages', lambda m, body: [])
+        route('GET', '/channels/{channel_id}', lambda m, body: self.channels.get(m['channel_id']))
+        route('PATCH', '/channels/{channel_id}', self.edit_channel)
+        route('DELETE', '/channels/{channel_id}', self.delete_channel)
+        route('PUT', '/channels/{channel_id}/permissions/{target_id}', lambda m, body: None)
+        route('DELETE', '/channels/{channel_id}/permissions/{target_id}', lambda m, body: None)
+        route('POST', '/guilds/{guild_id}/channels', self.create_channel)
+        route('POST', '/guilds/{guild_id}/roles', self.create_role)
+        route('GET', '/guilds/{guild_id}/members/{user_id}', lambda m, body: self.members.get(m['user_id']))
+        route('PATCH', '/guilds/{guild_id}/members/{user_id}', self.edit_member)
+        route('DELETE', '/guilds/{guild_id}/members/{user_id}', lambda m, body: None)
+        route('PUT', '/guilds/{guild_id}/members/{user_id}/roles/{role_id}', self.add_member_role)
+        route('DELETE', '/guilds/{guild_id}/members/{user_id}/roles/{role_id}', self.remove_member_role)
+        route('GET', '/guilds/{guild_id}/bans', lambda m, body: [])
+        route('PUT', '/guilds/{guild_id}/bans/{user_id}', lambda m, body: None)
+        route('DELETE', '/guilds/{guild_id}/bans/{user_id}', lambda m, body: None)
+
+    def route(self, method, template, handler):
+        pattern = re.compile('^' + re.sub(r'\{(\w+)\}', r'(?P<\1>[^/]+)', template) + '$')
+        self.routes.append((method, template, pattern, handler))
+
+    def application_info(self, match, body):
+        return {
+            'id': str(self.application_id), 'name': 'grind', 'icon': None, 'description': '', 'summary': '',
+            'bot_public': True, 'bot_require_code_grant': False, 'owner': self.owner, 'team': None,
+            'verify_key': '', 'flags': 0, 'rpc_origins': []
+        }
+
+    async def create_message(self, match, body):
+        return self.message_payload(match['channel_id'], self.bot_user, body.get('content') or '', embeds=body.get('embeds') or [])
+
+    async def create_channel(self, match, body):
+        channel = self.make_channel(body.get('name', 'channel'), body.get('type', 0), body.get('parent_id'))
+        await self.dispatch('CHANNEL_CREATE', channel)
+        return channel
+
+    async def edit_channel(self, match, body):
+        channel = self.channels.get(match['channel_id'])
+        if channel is None:
+            return None
+        channel.update({key: value for key, value in body.items() if key in ('name', 'user_limit', 'permission_overwrites', 'position')})
+        await self.dispatch('CHANNEL_UPDATE', channel)
+        return channel
+
+    async def delete_channel(self, match, body):
+        channel = self.channels.pop(match['channel_id'], None)
+        if channel:
+            await self.dispatch('CHANNEL_DELETE', channel)
+        return channel
+
+    async def create_role(self, match, body):
+        role = self.make_role(self.snowflake(), body.get('name', 'new role'), 1)
+        self.roles[role['id']] = role
+        await self.dispatch('GUILD_ROLE_CREATE', {'guild_id': self.guild_id, 'role': role})
+        return role
+
+    async def update_member(self, member):
+        await self.dispatch('GUILD_MEMBER_UPDATE', dict(member, guild_id=self.guild_id))
+
+    async def edit_member(self, match, body):
+        member = self.members.get(match['user_id'])
+        if member is None:
+            return None
+        if 'roles' in body:
+            member['roles'] = [str(role_id) for role_id in body['roles'] if str(role_id) != self.guild_id]
+        if 'nick' in body:
+            member['nick'] = body['nick']
+        await self.update_member(member)
+        if 'channel_id' in body:
+            await self.join_voice(match['user_id'], body['channel_id'] and str(body['channel_id']))
+        return member
+
+    async def add_member_role(self, match, body):
+        member = self.members.get(match['user_id'])
+        if member is not None and match['role_id'] not in member['roles']:
+            member['roles'].append(match['role_id'])
+            await self.update_member(member)
+
+    async def remove_member_role(self, match, body):
+        member = self.members.get(match['user_id'])
+        if member is not None and match['role_id'] in member['roles']:
+            member['roles'].remove(match['role_id'])
+            await self.update_member(member)
+
+    def expect(self, method, path):
+        expectation = Expectation(method, path)
+        self.expectations.append(expectation)
+        return expectation
+
+    def resolve_expectations(self, method, path):
+        for expectation in self.expectations:
+            if expectation.method == method and expectation.path == path:
+                self.expectations.remove(expectation)
+                if not expectation.future.done():
+                    expectation.future.set_result(time.monotonic() - expectation.started)
+                return
+
+    async def rest_handler(self, request):
+        path = request.path[len('/api/v10'):]
+        method = request.method
+
+        for route_method, template, pattern, handler in self.routes:
+            match = pattern.match(path) if route_method == method else None
+            if match:
+                break
+        else:
+            template, handler, match = path, None, None
+
+        self.requests[f'{method} {template}'] += 1
+
+        if self.rest_latency:
+            await asyncio.sleep(self.rest_latency)
+
+        headers = {}
+        if self.rate_limiter and handler is not None:
+            params = match.groupdict()
+            major = params.get('channel_id') or params.get('guild_id') or ''
+            allowed, retry_after, headers = self.rate_limiter.hit(method, template, major)
+            if not allowed:
+                self.rate_limited += 1
+                return json_response({'message': 'You are being rate limited.', 'retry_after': retry_after, 'global': False}, status=429, headers=headers)
+
+        if handler is None:
+            return json_response({'message': 'Unknown route', 'code': 0}, status=404, headers=headers)
+
+        body = {}
+        if request.can_read_body and request.content_type == 'application/json':
+            body = await request.json()
+        result = handler(match.groupdict(), body)
+        if asyncio.iscoroutine(result):
+            result = await result
+
+        self.resolve_expectations(method, path)
+
+        if result is None:
+            if method == 'GET':
+                return json_response({'message': 'Unknown', 'code': 10000}, status=404, headers=headers)
+            return web.Response(status=204, headers=headers)
+        return json_response(result, headers=headers)
+
+    async def start(self, host='127.0.0.1', port=0):
+        app = web.Application()
+        app.router.add_get('/', self.gateway_handler)
+        app.router.add_route('*', '/api/v10/{tail:.*}', self.rest_handler)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        self.url = f'http://{host}:{port}'
+        return self.url
+
+    async def stop(self):
+        for socket in list(self.sockets):
+            await socket.ws.close()
+        if self.runner:
+            await self.runner.cleanup()
+
+class GatewaySocket:
+    def __init__(self, server, ws, compress):
+        self.server = server
+        self.ws = ws
+        self.sequence = 0
+        self.outgoing = asyncio.Queue()
+        self.compressor = None
+        if compress == 'zlib-stream':
+            self.compressor = zlib.compressobj()
+        elif compress:
+            # discord.py only asks for zstd-stream when a zstd module is
+            # installed; the fake gateway speaks zlib-stream only.
+            raise RuntimeError(f'Unsupported gateway compression: {compress}')
+
+    async def send(self, payload):
+        await self.outgoing.put((time.monotonic() + self.server.gateway_latency, payload))
+
+    async def send_dispatch(self, event, data):
+        self.sequence += 1
+        await self.send({'op': 0, 't': event, 's': self.sequence, 'd': data})
+
+    async def writer(self):
+        # A single writer keeps events in order while still delaying each one
+        # by the configured gateway latency.
+        while True:
+            due, payload = await self.outgoing.get()
+            delay = due - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            data = json.dumps(payload, separators=(',', ':'))
+            if self.compressor:
+                await self.ws.send_bytes(self.compressor.compress(data.encode()) + self.compressor.flush(zlib.Z_SYNC_FLUSH))
+            else:
+                await self.ws.send_str(data)
+
+    async def run(self):
+        writer = asyncio.ensure_future(self.writer())
+        await self.send({'op': 10, 'd': {'heartbeat_interval': HEARTBEAT_INTERVAL}})
+
+        try:
+            async for msg in self.ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                await self.handle(json.loads(msg.data))
+        finally:
+            self.server.sockets.discard(self)
+            writer.cancel()
+
+    async def handle(self, payload):
+        op = payload.get('op')
+        server = self.server
+
+        if op == 1:
+            await self.send({'op': 11})
+
+        elif op in (2, 6):
+            # Resumes are answered with a fresh session like an identify.
+            server.sockets.add(self)
+            await self.send_dispatch('READY', {
+                'v': 10, 'user': server.bot_user, 'guilds': [{'id': server.guild_id, 'unavailable': True}],
+                'session_id': 'loadtest', 'resume_gateway_url': server.url.replace('http', 'ws', 1),
+                'application': {'id': str(server.application_id), 'flags': 0}, 'private_channels': [], 'relationships': []
+            })
+            await self.send_dispatch('GUILD_CREATE', server.guild_payload())
+
+        elif op == 8:
+            data = payload['d']
+            members = list(server.members.values())
+            if data.get('user_ids'):
+                user_ids = {str(user_id) for user_id in data['user_ids']}
+                members = [member for member in members if member['user']['id'] in user_ids]
+            elif data.get('query'):
+                members = [member for member in members if member['user']['username'].startswith(data['query'])][:data.get('limit') or 100]
+
+            chunks = [members[i:i + 1000] for i in range(0, len(members), 1000)] or [[]]
+            for index, chunk in enumerate(chunks):
+                await self.send_dispatch('GUILD_MEMBERS_CHUNK', {
+                    'guild_id': server.guild_id, 'members': chunk, 'chunk_index': index,
+                    'chunk_count': len(chunks), 'nonce': data.get('nonce')
+                })
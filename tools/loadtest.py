@@ -0,0 +1,275 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+import discord
+import yarl
+
+from fake_discord import FakeDiscord
+
+# Runs the real bot against tools/fake_discord.py and replays scripted
+# workloads. Each injected event is timed until the bot's visible reaction to
+# it (the reply, or the member move for VoiceMaster), and every REST call the
+# bot makes is counted while the workload runs.
+#
+#   python tools/loadtest.py --workload all --count 200 --concurrency 20
+#   python tools/loadtest.py --script workloads.json --rest-latency 50 --rate-limits
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKLOADS = ('flood', 'commands', 'voice', 'jail')
+COMMAND_MIX = (
+    '!help',
+    '!rank',
+    '!leaderboard',
+    '!snipe',
+    '!prefix list',
+    '!history {member}',
+    '!case 1',
+    '!vm',
+    '!serverinfo',
+    '!userinfo {member}',
+)
+
+def percentile(values, fraction):
+    if not values:
+        return 0
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+class LoadTest:
+    def __init__(self, server, bot, timeout):
+        self.server = server
+        self.bot = bot
+        self.timeout = timeout
+        self.member_ids = [user_id for user_id, member in server.members.items() if not member['user']['bot'] and user_id != server.owner['id']]
+
+    def seed_config(self):
+        # Jail and VoiceMaster are configured up front so their workloads don't
+        # measure the setup jobs.
+        from grind.config import get_section, get_settings
+
+        server = self.server
+        jailed_role = server.make_role(server.snowflake(), 'Jailed', 1)
+        server.roles[jailed_role['id']] = jailed_role
+        jail_channel = server.make_channel('jail', 0)
+        logs_channel = server.make_channel('logs', 0)
+        category = server.make_channel('Temporary Voice Channels', 4)
+        self.join_channel = server.make_channel('Create Voice Channel', 2, parent_id=category['id'])
+
+        settings = get_settings(int(server.guild_id))
+        settings.jailed_role_id = int(jailed_role['id'])
+        settings.jail_channel_id = int(jail_channel['id'])
+        settings.logs_channel_id = int(logs_channel['id'])
+        settings.jail_logs_channel_id = int(logs_channel['id'])
+        settings.save()
+
+        voice_master = get_section(int(server.guild_id), 'voice_master')
+        voice_master.enabled = True
+        voice_master.join_channel_id = int(self.join_channel['id'])
+        voice_master.category_id = int(category['id'])
+        voice_master.save()
+
+    async def timed(self, expectation, inject):
+        await inject
+        try:
+            return await asyncio.wait_for(expectation.future, self.timeout)
+        except asyncio.TimeoutError:
+            self.server.expectations.remove(expectation)
+            return None
+
+    async def run_bounded(self, count, concurrency, make_step):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(i):
+            async with semaphore:
+                expectation, inject = make_step(i)
+                return await self.timed(expectation, inject)
+
+        return await asyncio.gather(*(run(i) for i in range(count)))
+
+    def command_step(self, content):
+        channel_id = random.choice(self.server.text_channels)['id']
+        expectation = self.server.expect('POST', f'/channels/{channel_id}/messages')
+        return expectation, self.server.send_message(channel_id, self.server.owner, content)
+
+    async def flood(self, count, concurrency):
+        # Plain chat (XP, level ups, snipe bookkeeping), followed by one command
+        # whose reply marks the point where the backlog has been worked off.
+        server = self.server
+        for i in range(count):
+            author = server.members[random.choice(self.member_ids)]['user']
+            await server.send_message(random.choice(server.text_channels)['id'], author, f'load test message {i}')
+
+        expectation, inject = self.command_step('!prefix list')
+        return [await self.timed(expectation, inject)]
+
+    async def commands(self, count, concurrency):
+        def step(i):
+            content = random.choice(COMMAND_MIX).format(member=f'<@{random.choice(self.member_ids)}>')
+            return self.command_step(content)
+
+        return await self.run_bounded(count, concurrency, step)
+
+    async def voice(self, count, concurrency):
+        server = self.server
+        user_ids = random.sample(self.member_ids, min(count, len(self.member_ids)))
+
+        def step(i):
+            user_id = user_ids[i]
+            expectation = server.expect('PATCH', f'/guilds/{server.guild_id}/members/{user_id}')
+            return expectation, server.join_voice(user_id, self.join_channel['id'])
+
+        return await self.run_bounded(len(user_ids), concurrency, step)
+
+    async def jail(self, count, concurrency):
+        user_ids = random.sample(self.member_ids, min(count, len(self.member_ids)))
+        return await self.run_bounded(len(user_ids), concurrency, lambda i: self.command_step(f'!jail <@{user_ids[i]}> 10m load test'))
+
+    async def run_workload(self, name, count, concurrency):
+        from grind.members import current_rss, peak_rss
+
+        server = self.server
+        requests_before = server.requests.copy()
+        rate_limited_before = server.rate_limited
+        rss_before = current_rss()
+        start = time.monotonic()
+
+        latencies = await getattr(self, name)(count, concurrency)
+
+        elapsed = time.monotonic() - start
+        requests = server.requests - requests_before
+        completed = sorted(latency for latency in latencies if latency is not None)
+        events = count if name == 'flood' else len(latencies)
+
+        return {
+            'workload': name,
+            'events': events,
+            'completed': len(completed),
+            'timeouts': len(latencies) - len(completed),
+            'seconds': round(elapsed, 3),
+            'events_per_second': round(events / elapsed, 1) if elapsed else None,
+            'latency_ms': {
+                'p50': round(percentile(completed, 0.5) * 1000, 1),
+                'p95': round(percentile(completed, 0.95) * 1000, 1),
+                'p99': round(percentile(completed, 0.99) * 1000, 1),
+                'max': round(completed[-1] * 1000, 1) if completed else 0
+            },
+            'rest_calls': sum(requests.values()),
+            'rest_calls_per_event': round(sum(requests.values()) / events, 2) if events else 0,
+            'rate_limited': server.rate_limited - rate_limited_before,
+            'routes': dict(requests.most_common(8)),
+            'rss_before': rss_before,
+            'rss_after': current_rss(),
+            'peak_rss': peak_rss()
+        }
+
+def print_report(results):
+    from grind.utils import format_size
+
+    for result in results:
+        latency = result['latency_ms']
+        print(f"\n== {result['workload']} ==")
+        print(f"events {result['events']}  completed {result['completed']}  timeouts {result['timeouts']}  "
+              f"{result['seconds']}s  ({result['events_per_second']}/s)")
+        print(f"latency p50 {latency['p50']}ms  p95 {latency['p95']}ms  p99 {latency['p99']}ms  max {latency['max']}ms")
+        print(f"rest calls {result['rest_calls']}  ({result['rest_calls_per_event']}/event)  429s {result['rate_limited']}")
+        for route, calls in result['routes'].items():
+            print(f"  {calls:>6}  {route}")
+        rss_before = format_size(result['rss_before']) if result['rss_before'] else 'unknown'
+        rss_after = format_size(result['rss_after']) if result['rss_after'] else 'unknown'
+        peak = format_size(result['peak_rss']) if result['peak_rss'] else 'unknown'
+        print(f"rss {rss_before} -> {rss_after}  peak {peak}")
+
+def load_script(args):
+    if args.script:
+        with open(args.script, 'r') as f:
+            return json.load(f)
+
+    names = WORKLOADS if args.workload == 'all' else (args.workload,)
+    return [{'workload': name, 'count': args.count, 'concurrency': args.concurrency} for name in names]
+
+async def run(args, script):
+    server = FakeDiscord(
+        members=args.members,
+        text_channels=args.channels,
+        rest_latency=args.rest_latency / 1000,
+        gateway_latency=args.gateway_latency / 1000,
+        rate_limits=args.rate_limits
+    )
+    url = await server.start()
+
+    discord.http.Route.BASE = f'{url}/api/v10'
+    discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(url.replace('http', 'ws', 1) + '/')
+
+    with open('bot_config.json', 'w') as f:
+        json.dump({'whitelisted_servers': [], 'member_cache': args.member_cache}, f)
+
+    sys.path.insert(0, ROOT)
+    import main
+    from grind.logs import setup_logging
+
+    log_listener = setup_logging(logging.WARNING)
+    test = LoadTest(server, main.bot, args.timeout)
+    test.seed_config()
+    bot_task = asyncio.ensure_future(main.bot.start('loadtest-token'))
+    results = []
+
+    try:
+        started = time.monotonic()
+        ready_task = asyncio.ensure_future(main.bot.wait_until_ready())
+        await asyncio.wait((ready_task, bot_task), timeout=args.timeout, return_when=asyncio.FIRST_COMPLETED)
+        if bot_task.done():
+            bot_task.result()
+        if not ready_task.done():
+            ready_task.cancel()
+            raise SystemExit('The bot did not become ready in time.')
+        print(f"bot ready after {time.monotonic() - started:.2f}s ({args.member_cache} member cache, {args.members} members)")
+
+        for step in script:
+            if step['workload'] not in WORKLOADS:
+                raise SystemExit(f"Unknown workload: {step['workload']}")
+            results.append(await test.run_workload(step['workload'], step.get('count', args.count), step.get('concurrency', args.concurrency)))
+    finally:
+        await main.bot.close()
+        await asyncio.gather(bot_task, return_exceptions=True)
+        await server.stop()
+        log_listener.stop()
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the bot against a local fake Discord API.')
+    parser.add_argument('--workload', choices=WORKLOADS + ('all',), default='all')
+    parser.add_argument('--script', help='JSON list of {"workload", "count", "concurrency"} steps')
+    parser.add_argument('--count', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--members', type=int, default=1000)
+    parser.add_argument('--channels', type=int, default=5)
+    parser.add_argument('--rest-latency', type=float, default=0, help='milliseconds added to every REST call')
+    parser.add_argument('--gateway-latency', type=float, default=0, help='milliseconds added to every gateway event')
+    parser.add_argument('--rate-limits', action='store_true', help='enforce per-route rate limits and answer with 429s')
+    parser.add_argument('--member-cache', choices=('full', 'lazy', 'active'), default='full')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    script = load_script(args)
+    output = os.path.abspath(args.json) if args.json else None
+
+    # The bot writes server_data/ and logs/ relative to the working directory,
+    # so every run gets a scratch directory.
+    with tempfile.TemporaryDirectory(prefix='grind-loadtest-') as workdir:
+        os.chdir(workdir)
+        results = asyncio.run(run(args, script))
+
+    print_report(results)
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+if __name__ == '__main__':
+    main()